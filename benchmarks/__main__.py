@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+""" Runs the benchmarks and compares them with a stored baseline.
+
+    python3 -m benchmarks                  # run, compare, save results
+    python3 -m benchmarks --save-baseline  # make the results the baseline
+    python3 -m benchmarks -k desk          # only cases containing "desk"
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from benchmarks import harness
+# Cases are registered on import.
+from benchmarks import (  # noqa: F401
+    desk,
+    evaluator,
+    gamestore,
+    handlog,
+    model,
+)
+
+RESULTS_FILE = Path(".benchmarks/results.json")
+BASELINE_FILE = Path(".benchmarks/baseline.json")
+THRESHOLD = 0.25
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks")
+    parser.add_argument("-k", dest="filter", default="",
+                        help="run only cases containing the substring")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="allowed slowdown of the median, 0.25 is 25%%")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    names = [n for n in harness.cases() if args.filter in n]
+    report = harness.run_all(names, repeat=args.repeat)
+
+    for name, result in report["results"].items():
+        metrics = " ".join(
+            f"{k}={v}" for k, v in result.get("metrics", {}).items()
+        )
+        print(
+            f"{name:<36} {result['median'] * 1000:>10.3f} ms "
+            f"{result['ops_per_sec']:>12,.1f} op/s {metrics}"
+        )
+
+    pairs = harness.speedups(report)
+    if pairs:
+        print()
+    for (name, reference, speedup) in pairs:
+        print(f"{name:<36} {speedup:>7.1f}x faster than {reference}")
+
+    harness.save(report, args.output)
+    if args.save_baseline:
+        harness.save(report, args.baseline)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}, run with --save-baseline")
+        return 0
+
+    regressed = False
+    print(f"\ncompared with {args.baseline}:")
+    for (name, base, current, ratio, is_regression) in harness.compare(
+        report, harness.load(args.baseline), args.threshold,
+    ):
+        mark = "REGRESSION" if is_regression else ""
+        print(f"{name:<36} {ratio:>7.2f}x {mark}")
+        regressed = regressed or is_regression
+
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import random
+
+from benchmarks.harness import Metrics, benchmark
+from pokerapp.cards import DECK
+from pokerapp.desk import DeskImageCache, DeskImageGenerator, ImageFormat
+
+
+def _generate_desk(cards_count: int):
+    def case():
+        cards = random.Random(cards_count).sample(DECK, cards_count)
+        generator = DeskImageGenerator()
+
+        return lambda: generator.generate_desk(cards)
+    return case
+
+
+def _encode_desk(cards_count: int, image_format: ImageFormat):
+    def case():
+        cards = random.Random(cards_count).sample(DECK, cards_count)
+        generator = DeskImageGenerator(image_format=image_format)
+        desk_im = generator.generate_desk(cards)
+
+        return lambda: Metrics(bytes=len(generator.encode(desk_im)))
+    return case
+
+
+def _cached_desk(cards_count: int):
+    def case():
+        cards = random.Random(cards_count).sample(DECK, cards_count)
+        cache = DeskImageCache()
+
+        return lambda: cache.get(cards)
+    return case
+
+
+for _count in (2, 5):
+    benchmark(
+        f"desk.cache_hit[{_count}]",
+        number=1000,
+    )(_cached_desk(_count))
+    benchmark(
+        f"desk.generate_desk[{_count}]",
+        number=20,
+    )(_generate_desk(_count))
+    for _format in ImageFormat:
+        benchmark(
+            f"desk.encode_{_format.value}[{_count}]",
+            number=10,
+        )(_encode_desk(_count, _format))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import random
+
+import numpy as np
+
+from benchmarks.harness import Metrics, benchmark, paired
+from pokerapp.batchevaluator import score_many
+from pokerapp.cards import DECK
+from pokerapp.entities import Player
+from pokerapp.winnerdetermination import LookupEvaluator, WinnerDetermination
+
+BATCH_SIZE = 10000
+
+
+def _random_hand(rnd: random.Random, size: int = 7):
+    return rnd.sample(DECK, size)
+
+
+@benchmark("evaluator.combinations_scan", number=20)
+def combinations_scan():
+    hand = _random_hand(random.Random(0))
+    determinator = WinnerDetermination()
+
+    return lambda: determinator._best_hand_score(
+        determinator._make_combinations(hand),
+    )
+
+
+@benchmark("evaluator.lookup", number=1000)
+def lookup():
+    hand = _random_hand(random.Random(0))
+    evaluator = LookupEvaluator.instance()
+
+    return lambda: evaluator.evaluate(hand)
+
+
+def _batch_hands() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.random((BATCH_SIZE, 52)).argpartition(7, axis=1)[:, :7]
+
+
+@benchmark("evaluator.lookup[10k]", number=1)
+def lookup_batch():
+    hands = _batch_hands().tolist()
+    evaluator = LookupEvaluator.instance()
+
+    def run():
+        for hand in hands:
+            evaluator.evaluate_ids(hand)
+        return Metrics(hands=len(hands))
+    return run
+
+
+@benchmark("evaluator.score_many[10k]", number=5)
+def batch():
+    hands = _batch_hands()
+
+    def run():
+        score_many(hands)
+        return Metrics(hands=len(hands))
+    return run
+
+
+paired("evaluator.lookup", "evaluator.combinations_scan")
+paired("evaluator.score_many[10k]", "evaluator.lookup[10k]")
+
+
+def _determinate_scores(players_count: int):
+    def case():
+        rnd = random.Random(players_count)
+        cards = rnd.sample(DECK, 5 + 2 * players_count)
+        players = []
+        for i in range(players_count):
+            player = Player(
+                user_id=i,
+                mention_markdown="@" + str(i),
+                wallet=None,
+                ready_message_id="",
+            )
+            player.cards = cards[5 + 2 * i:7 + 2 * i]
+            players.append(player)
+        determinator = WinnerDetermination()
+
+        return lambda: determinator.determinate_scores(players, cards[:5])
+    return case
+
+
+for _count in range(2, 9):
+    benchmark(
+        f"winner.determinate_scores[{_count}p]",
+        number=100,
+    )(_determinate_scores(_count))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import datetime
+import itertools
+import time
+from types import SimpleNamespace
+from typing import List
+
+from telegram import CallbackQuery, Chat, Message, Update, User
+
+
+class FakeBot:
+    """ Records what would be sent to Telegram. """
+
+    def __init__(self, members_count: int = 0, latency: float = 0):
+        """ Uploads of photos take latency seconds. """
+        self.members_count = members_count
+        self.latency = latency
+        self.sent: List[str] = []
+        self._message_ids = itertools.count(1)
+
+    def _message(self) -> SimpleNamespace:
+        message_id = next(self._message_ids)
+        return SimpleNamespace(
+            message_id=message_id,
+            dice=SimpleNamespace(value=1),
+            photo=[SimpleNamespace(file_id="file" + str(message_id))],
+        )
+
+    def send_message(self, *args, **kwargs) -> None:
+        self.sent.append("send_message")
+
+    def send_photo(self, *args, **kwargs) -> None:
+        self.sent.append("send_photo")
+
+    def send_media_group(self, *args, **kwargs) -> List[SimpleNamespace]:
+        self.sent.append("send_media_group")
+        time.sleep(self.latency)
+        return [self._message()]
+
+    def send_dice(self, *args, **kwargs) -> SimpleNamespace:
+        self.sent.append("send_dice")
+        return self._message()
+
+    def get_chat_member_count(self, *args, **kwargs) -> int:
+        return self.members_count
+
+    def get_chat_administrators(self, *args, **kwargs) -> List:
+        return []
+
+    def edit_message_reply_markup(self, *args, **kwargs) -> None:
+        self.sent.append("edit_message_reply_markup")
+
+    def delete_message(self, *args, **kwargs) -> None:
+        self.sent.append("delete_message")
+
+    def delete_messages(self, *args, **kwargs) -> None:
+        self.sent.append("delete_messages")
+
+
+def make_user(user_id: int) -> User:
+    return User(id=user_id, first_name="user" + str(user_id), is_bot=False)
+
+
+def make_message(chat_id: int, user_id: int, text: str = "") -> Message:
+    return Message(
+        message_id=user_id,
+        date=datetime.datetime.now(),
+        chat=Chat(id=chat_id, type=Chat.GROUP),
+        from_user=make_user(user_id),
+        text=text,
+    )
+
+
+def command_update(chat_id: int, user_id: int, text: str) -> Update:
+    return Update(
+        update_id=0,
+        message=make_message(chat_id, user_id, text),
+    )
+
+
+def callback_update(chat_id: int, user_id: int, data: str) -> Update:
+    return Update(
+        update_id=0,
+        callback_query=CallbackQuery(
+            id=str(user_id),
+            from_user=make_user(user_id),
+            chat_instance=str(chat_id),
+            message=make_message(chat_id, user_id),
+            data=data,
+        ),
+    )
+
+
+def make_context() -> SimpleNamespace:
+    return SimpleNamespace(chat_data={}, bot_data={}, user_data={})
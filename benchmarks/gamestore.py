@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+from benchmarks.harness import Metrics, benchmark
+from pokerapp.entities import Game, GameState, Player
+from pokerapp.gamestore import GameStore, dumps_game, loads_game
+from pokerapp.kvstore import MemoryKV
+from pokerapp.pokerbotmodel import KEY_CHAT_DATA_GAME, WalletManagerModel
+
+CHAT_ID = -1
+
+
+def _game(players_count: int) -> Game:
+    game = Game()
+    game.state = GameState.ROUND_TURN
+    for _ in range(4):
+        game.cards_table.append(game.remain_cards.pop())
+    for user_id in range(1, players_count + 1):
+        player = Player(
+            user_id=user_id,
+            mention_markdown=f"[player {user_id}](tg://user?id={user_id})",
+            wallet=None,
+            ready_message_id=user_id,
+        )
+        player.cards = [game.remain_cards.pop(), game.remain_cards.pop()]
+        game.players.append(player)
+    return game
+
+
+def _dumps(players_count: int):
+    def case():
+        game = _game(players_count)
+
+        return lambda: Metrics(bytes=len(dumps_game(game)))
+    return case
+
+
+def _loads(players_count: int):
+    def case():
+        data = dumps_game(_game(players_count))
+
+        return lambda: loads_game(data, new_wallet=lambda user_id: None)
+    return case
+
+
+def _load_store(players_count: int):
+    """ What the game store adds to an update which changes the game. """
+    def case():
+        kv = MemoryKV()
+        for user_id in range(1, players_count + 1):
+            WalletManagerModel(user_id, kv)
+        store = GameStore(kv)
+        chat_data = {KEY_CHAT_DATA_GAME: _game(players_count)}
+        store.store(CHAT_ID, chat_data)
+
+        def run():
+            store.load(CHAT_ID, chat_data)
+            chat_data[KEY_CHAT_DATA_GAME].pot += 1
+            store.store(CHAT_ID, chat_data)
+        return run
+    return case
+
+
+for _count in (2, 8):
+    benchmark(
+        f"gamestore.dumps[{_count}p]",
+        number=1000,
+    )(_dumps(_count))
+    benchmark(
+        f"gamestore.loads[{_count}p]",
+        number=1000,
+    )(_loads(_count))
+    benchmark(
+        f"gamestore.load_store[{_count}p]",
+        number=1000,
+    )(_load_store(_count))
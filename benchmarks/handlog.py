@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import atexit
+import os
+import random
+import tempfile
+import uuid
+
+from benchmarks.harness import Metrics, benchmark
+from pokerapp.cards import DECK
+from pokerapp.handlog import Event, EventType, pack_event, read_events
+from pokerapp.handstats import collect
+
+CHATS_COUNT = 50
+PLAYERS_COUNT = 4
+
+
+def _hand(rng: random.Random, chat_id: int) -> bytes:
+    """ Blinds, calls around and a showdown on the river. """
+    game_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    deck = rng.sample(DECK, 5 + 2 * PLAYERS_COUNT)
+    user_ids = rng.sample(range(1, 1000), PLAYERS_COUNT)
+
+    events = [Event(EventType.HAND_START, game_id, 0.0, chat_id)]
+    for (i, user_id) in enumerate(user_ids):
+        events.append(Event(
+            EventType.DEAL, game_id, 0.0, user_id, 0,
+            tuple(deck[5 + 2 * i:7 + 2 * i]),
+        ))
+    events.append(Event(EventType.BLIND, game_id, 0.0, user_ids[0], 5))
+    events.append(Event(EventType.BLIND, game_id, 0.0, user_ids[1], 10))
+    for user_id in user_ids[2:] + user_ids[:1]:
+        events.append(Event(EventType.CALL, game_id, 0.0, user_id, 10))
+    events.append(Event(EventType.CHECK, game_id, 0.0, user_ids[1]))
+    for board in (deck[:3], deck[3:4], deck[4:5]):
+        events.append(Event(
+            EventType.BOARD, game_id, 0.0, 0, 0, tuple(board),
+        ))
+        for user_id in user_ids:
+            events.append(Event(EventType.CHECK, game_id, 0.0, user_id))
+
+    pot = 10 * PLAYERS_COUNT
+    events.append(Event(EventType.WIN, game_id, 0.0, user_ids[0], pot))
+    events.append(Event(EventType.HAND_END, game_id, 0.0, 0, pot))
+    return b"".join(pack_event(e) for e in events)
+
+
+def _write_log(hands_count: int) -> str:
+    rng = random.Random(hands_count)
+    (fd, path) = tempfile.mkstemp(suffix=".handlog")
+    atexit.register(os.remove, path)
+    with os.fdopen(fd, "wb") as f:
+        for i in range(hands_count):
+            f.write(_hand(rng, -(i % CHATS_COUNT)))
+    return path
+
+
+def _read(hands_count: int):
+    def case():
+        path = _write_log(hands_count)
+
+        def run():
+            count = sum(1 for _ in read_events(path))
+            return Metrics(events=count)
+        return run
+    return case
+
+
+def _stats(hands_count: int):
+    def case():
+        path = _write_log(hands_count)
+
+        return lambda: Metrics(hands=collect([path]).hands)
+    return case
+
+
+benchmark("handlog.read_events[10k hands]", number=1)(_read(10000))
+benchmark("handstats.collect[10k hands]", number=1)(_stats(10000))
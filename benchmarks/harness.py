@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import json
+import platform
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple, Union
+
+
+class Metrics(dict):
+    """ Returned by a timed callable to store values like output size. """
+
+
+Run = Callable[[], Union[None, Metrics]]
+Case = Callable[[], Union[Run, Tuple[Run, Callable[[], None]]]]
+
+_cases: Dict[str, Tuple[Case, int]] = {}
+# Cases doing the same work by other means: {case: reference case}.
+_pairs: Dict[str, str] = {}
+
+
+def benchmark(name: str, number: int = 100) -> Callable[[Case], Case]:
+    """ Registers a case.
+
+        The decorated function prepares the data and returns the timed
+        callable, or a pair (timed, prepare) where prepare runs untimed
+        before each call. A timed callable can return Metrics,
+        the last ones are stored with the result.
+    """
+    def register(case: Case) -> Case:
+        _cases[name] = (case, number)
+        return case
+    return register
+
+
+def paired(name: str, reference: str) -> None:
+    """ Reports the speedup of a case over a reference case which does
+        the same work per call.
+    """
+    _pairs[name] = reference
+
+
+def cases() -> List[str]:
+    return list(_cases.keys())
+
+
+def run_case(name: str, repeat: int = 5) -> Dict:
+    case, number = _cases[name]
+    run = case()
+    prepare = None
+    if isinstance(run, tuple):
+        run, prepare = run
+
+    # Warm up caches and lazily built tables.
+    if prepare is not None:
+        prepare()
+    run()
+
+    timings = []
+    metrics = None
+    for _ in range(repeat * number):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        res = run()
+        timings.append(time.perf_counter() - start)
+        if isinstance(res, Metrics):
+            metrics = res
+
+    median = statistics.median(timings)
+    result = {
+        "median": median,
+        "min": min(timings),
+        "ops_per_sec": 1 / median if median > 0 else 0,
+        "calls": len(timings),
+    }
+    if metrics is not None:
+        result["metrics"] = metrics
+    return result
+
+
+def run_all(names: List[str], repeat: int = 5) -> Dict:
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": {name: run_case(name, repeat) for name in names},
+    }
+
+
+def save(report: Dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path: Path) -> Dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def compare(
+    report: Dict,
+    baseline: Dict,
+    threshold: float,
+) -> List[Tuple[str, float, float, float, bool]]:
+    """ (name, baseline, current, ratio, regressed) by median time. """
+    res = []
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["median"] / base["median"]
+        res.append((
+            name,
+            base["median"],
+            result["median"],
+            ratio,
+            ratio > 1 + threshold,
+        ))
+    return res
+
+
+def speedups(report: Dict) -> List[Tuple[str, str, float]]:
+    """ (name, reference, speedup) of the paired cases in the report. """
+    results = report["results"]
+    return [
+        (name, reference,
+         results[reference]["median"] / results[name]["median"])
+        for (name, reference) in _pairs.items()
+        if name in results and reference in results
+        and results[name]["median"] > 0
+    ]
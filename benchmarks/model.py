@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import io
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+
+from benchmarks.fakes import (
+    FakeBot,
+    callback_update,
+    command_update,
+    make_context,
+)
+from benchmarks.harness import benchmark
+from pokerapp.cards import DECK
+from pokerapp.config import Config
+from pokerapp.desk import DeskImageCache
+from pokerapp.entities import Game, GameState, Player, PlayerAction
+from pokerapp.kvstore import MemoryKV
+from pokerapp.pokerbotmodel import (
+    KEY_CHAT_DATA_GAME,
+    PokerBotModel,
+    RoundRateModel,
+    WalletManagerModel,
+)
+from pokerapp.pokerbotview import PokerBotViewer
+from pokerapp.privatechatmodel import UserPrivateChatModel
+
+CHAT_ID = -1
+MAX_TURNS = 200
+UPLOAD_LATENCY = 0.02
+
+
+def _finish_rate(players_count: int):
+    def case():
+        round_rate = RoundRateModel()
+        state = SimpleNamespace()
+
+        def prepare():
+            kv = MemoryKV()
+            game = Game()
+            player_scores = {}
+            for i in range(players_count):
+                wallet = WalletManagerModel(i, kv=kv)
+                wallet.authorize(game.id, 100)
+                game.pot += 100
+                player = Player(
+                    user_id=i,
+                    mention_markdown="@" + str(i),
+                    wallet=wallet,
+                    ready_message_id="",
+                )
+                game.players.append(player)
+                # Pairs of players split the pot.
+                player_scores.setdefault(i // 2, []).append(
+                    (player, DECK[:5]),
+                )
+            state.game = game
+            state.player_scores = player_scores
+
+        return (
+            lambda: round_rate.finish_rate(state.game, state.player_scores),
+            prepare,
+        )
+    return case
+
+
+def _full_hand(players_count: int):
+    def case():
+        cfg = Config()
+        bot = FakeBot(members_count=players_count + 1)
+        desk_cache = DeskImageCache()
+        view = PokerBotViewer(bot=bot, desk_cache=desk_cache)
+        state = SimpleNamespace()
+
+        def prepare():
+            kv = MemoryKV()
+            for user_id in range(1, players_count + 1):
+                UserPrivateChatModel(user_id=user_id, kv=kv) \
+                    .set_chat_id(chat_id=user_id)
+            state.model = PokerBotModel(view=view, bot=bot, cfg=cfg, kv=kv)
+            state.context = make_context()
+
+        def run():
+            model, context = state.model, state.context
+            on_button = model.middleware_user_turn(model.call_check)
+
+            with redirect_stdout(io.StringIO()):
+                for user_id in range(1, players_count + 1):
+                    model.ready(
+                        command_update(CHAT_ID, user_id, "/ready"),
+                        context,
+                    )
+
+                game = context.chat_data[KEY_CHAT_DATA_GAME]
+                for _ in range(MAX_TURNS):
+                    if game.state == GameState.INITIAL:
+                        break
+                    player = model._current_turn_player(game)
+                    on_button(
+                        callback_update(
+                            CHAT_ID,
+                            player.user_id,
+                            PlayerAction.CALL.value,
+                        ),
+                        context,
+                    )
+                else:
+                    raise RuntimeError("the hand is not finished")
+
+        return (run, prepare)
+    return case
+
+
+def _deal(players_count: int):
+    def case():
+        cfg = Config()
+        bot = FakeBot(latency=UPLOAD_LATENCY)
+        view = PokerBotViewer(bot=bot, desk_cache=DeskImageCache())
+        kv = MemoryKV()
+        for user_id in range(1, players_count + 1):
+            UserPrivateChatModel(user_id=user_id, kv=kv) \
+                .set_chat_id(chat_id=user_id)
+        model = PokerBotModel(view=view, bot=bot, cfg=cfg, kv=kv)
+        state = SimpleNamespace()
+
+        def prepare():
+            game = Game()
+            for user_id in range(1, players_count + 1):
+                game.players.append(Player(
+                    user_id=user_id,
+                    mention_markdown="@" + str(user_id),
+                    wallet=None,
+                    ready_message_id="",
+                ))
+            state.game = game
+
+        return (
+            lambda: model._divide_cards(game=state.game, chat_id=CHAT_ID),
+            prepare,
+        )
+    return case
+
+
+benchmark("round_rate.finish_rate[4p]", number=200)(_finish_rate(4))
+benchmark("round_rate.finish_rate[8p]", number=200)(_finish_rate(8))
+
+for _count in (2, 4, 8):
+    benchmark(
+        f"model.full_hand[{_count}p]",
+        number=5,
+    )(_full_hand(_count))
+    benchmark(
+        f"model.deal[{_count}p]",
+        number=5,
+    )(_deal(_count))
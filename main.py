@@ -4,6 +4,7 @@ from dotenv import load_dotenv
 
 from pokerapp.config import Config
 from pokerapp.pokerbot import PokerBot
+from pokerapp.sharding import ShardedPokerBot
 
 
 def main() -> None:
@@ -14,7 +15,10 @@ def main() -> None:
         print("Environment varaible POKERBOT_TOKEN is not set")
         exit(1)
 
-    bot = PokerBot(token=cfg.TOKEN, cfg=cfg)
+    if cfg.WORKERS > 1:
+        bot = ShardedPokerBot(token=cfg.TOKEN, cfg=cfg)
+    else:
+        bot = PokerBot(token=cfg.TOKEN, cfg=cfg)
     bot.run()
 
 
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import threading
+import uuid
+from concurrent.futures import Future
+from typing import Any, Coroutine, Dict, Tuple
+
+from telegram import InputFile, TelegramObject
+from telegram.error import (
+    BadRequest,
+    ChatMigrated,
+    Conflict,
+    InvalidToken,
+    NetworkError,
+    RetryAfter,
+    TelegramError,
+    TimedOut,
+    Unauthorized,
+)
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError, HTTPRequest
+
+MAX_CONNECTIONS = 256
+REQUEST_TIMEOUT = 10
+CONNECT_TIMEOUT = 5
+
+
+def _raise_for_response(status: int, body: bytes) -> None:
+    """ Raises the telegram.error exception of a failed Bot API call,
+        the same as the synchronous Bot raises.
+    """
+    try:
+        data = json.loads(body.decode("utf-8", "replace"))
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    parameters = data.get("parameters") or {}
+    if parameters.get("migrate_to_chat_id"):
+        raise ChatMigrated(parameters["migrate_to_chat_id"])
+    if parameters.get("retry_after"):
+        raise RetryAfter(parameters["retry_after"])
+
+    message = data.get("description") or "Unknown HTTPError"
+    if status in (401, 403):
+        raise Unauthorized(message)
+    if status == 400:
+        raise BadRequest(message)
+    if status == 404:
+        raise InvalidToken()
+    if status == 409:
+        raise Conflict(message)
+    if 200 <= status <= 299:
+        raise TelegramError(message)
+    raise NetworkError(f"{message} ({status})")
+
+
+def _result(body: bytes) -> Any:
+    """ The result of a successful Bot API response. """
+    try:
+        data = json.loads(body.decode("utf-8", "replace"))
+    except ValueError as e:
+        raise TelegramError("Invalid server response") from e
+    if not data.get("ok"):
+        _raise_for_response(200, body)
+    return data["result"]
+
+
+class AsyncRuntime:
+    """ An asyncio loop in its own thread for the network calls.
+
+        The handlers of the dispatcher stay synchronous, they hand
+        coroutines over with submit and get a concurrent future back.
+        A request in flight does not hold a thread.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="async-runtime",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def submit(self, coro: Coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def in_loop(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def run(self, coro: Coroutine, timeout: float = None) -> Any:
+        """ Waits for the coroutine, for the synchronous code. """
+        return self.submit(coro).result(timeout)
+
+
+class AsyncHttp:
+    """ A non-blocking HTTP client for the Bot API on the runtime.
+
+        Errors are raised as the same telegram.error exceptions as
+        the synchronous Bot raises.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        timeout: float = REQUEST_TIMEOUT,
+    ):
+        self.max_connections = max_connections
+        self._timeout = timeout
+        self._client = None
+
+    def _http_client(self) -> AsyncHTTPClient:
+        # The client belongs to the loop it is created on.
+        if self._client is None:
+            self._client = AsyncHTTPClient(
+                force_instance=True,
+                max_clients=self.max_connections,
+            )
+        return self._client
+
+    async def fetch(
+        self,
+        url: str,
+        method: str = "POST",
+        body: bytes = None,
+        headers: Dict[str, str] = None,
+        timeout: float = None,
+    ) -> bytes:
+        """ The body of a successful response. """
+        request = HTTPRequest(
+            url=url,
+            method=method,
+            headers=headers,
+            body=body,
+            connect_timeout=CONNECT_TIMEOUT,
+            request_timeout=timeout or self._timeout,
+        )
+        try:
+            response = await self._http_client().fetch(request)
+        except HTTPClientError as e:
+            if e.response is None:
+                raise TimedOut() if e.code == 599 else NetworkError(str(e))
+            _raise_for_response(e.code, e.response.body)
+        except OSError as e:
+            raise NetworkError(str(e)) from e
+        return response.body
+
+
+class AsyncBotApi:
+    """ Calls methods of the Telegram Bot API from coroutines. """
+
+    def __init__(
+        self,
+        base_url: str,
+        http: AsyncHttp = None,
+    ):
+        self._base_url = base_url
+        self._http = http if http is not None else AsyncHttp()
+
+    @staticmethod
+    def _params(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        params = {}
+        for (key, value) in kwargs.items():
+            if value is None:
+                continue
+            if isinstance(value, TelegramObject):
+                value = value.to_dict()
+            params[key] = value
+        return params
+
+    async def call(self, method: str, **kwargs) -> Any:
+        body = await self._http.fetch(
+            url=self._base_url + "/" + method,
+            headers={"Content-Type": "application/json"},
+            body=json.dumps(self._params(kwargs)).encode("utf-8"),
+        )
+        return _result(body)
+
+
+def _form_value(value: Any) -> Any:
+    if isinstance(value, InputFile):
+        return value.field_tuple
+    if isinstance(value, (float, int)):
+        return str(value)
+    if isinstance(value, list):
+        return json.dumps(value)
+    return value
+
+
+def _multipart(fields: Dict[str, Any]) -> Tuple[bytes, str]:
+    """ multipart/form-data body of the fields and its content type.
+        A file is a (filename, content, mime type) tuple.
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for (name, value) in fields.items():
+        disposition = f'form-data; name="{name}"'
+        headers = ""
+        if isinstance(value, tuple):
+            (filename, value, mimetype) = value
+            disposition += f'; filename="{filename}"'
+            headers = f"Content-Type: {mimetype}\r\n"
+        elif isinstance(value, dict):
+            value = json.dumps(value)
+        if not isinstance(value, bytes):
+            value = str(value).encode("utf-8")
+        head = f"--{boundary}\r\nContent-Disposition: {disposition}\r\n"
+        parts += [
+            (head + headers + "\r\n").encode("utf-8"),
+            value,
+            b"\r\n",
+        ]
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return (b"".join(parts), "multipart/form-data; boundary=" + boundary)
+
+
+def _encode_params(data: Dict[str, Any]) -> Tuple[bytes, str]:
+    """ Body and content type of the parameters of a Bot method, JSON
+        or multipart/form-data with files, as the Bot sends them.
+    """
+    fields = {}
+    files = False
+    for (key, value) in data.items():
+        if isinstance(value, InputFile):
+            files = True
+        elif key == "media":
+            files = True
+            media = value if isinstance(value, list) else [value]
+            for m in media:
+                if isinstance(m.media, InputFile):
+                    fields[m.media.attach] = m.media.field_tuple
+                    thumb = getattr(m, "thumb", None)
+                    if isinstance(thumb, InputFile):
+                        fields[thumb.attach] = thumb.field_tuple
+            if isinstance(value, list):
+                value = [m.to_dict() for m in value]
+            else:
+                value = value.to_dict()
+            fields[key] = json.dumps(value)
+            continue
+        fields[key] = _form_value(value)
+
+    if files:
+        return _multipart(fields)
+    return (json.dumps(fields).encode("utf-8"), "application/json")
+
+
+class AsyncRequest:
+    """ The transport of the synchronous Bot over AsyncHttp.
+
+        It has the public interface of telegram.utils.request.Request
+        which Bot, File and Updater use: post, retrieve, download, stop
+        and con_pool_size. Every Bot method, uploads included, is sent
+        on the connections of the runtime instead of a small urllib3
+        pool. The calling thread still waits for its response.
+    """
+
+    def __init__(self, runtime: AsyncRuntime, http: AsyncHttp = None):
+        self.runtime = runtime
+        self.http = http if http is not None else AsyncHttp()
+
+    @property
+    def con_pool_size(self) -> int:
+        return self.http.max_connections
+
+    def stop(self) -> None:
+        pass
+
+    def _fetch(
+        self,
+        url: str,
+        method: str,
+        body: bytes = None,
+        headers: Dict[str, str] = None,
+        timeout: float = None,
+    ) -> bytes:
+        if self.runtime.in_loop():
+            raise RuntimeError("a blocking bot call on the runtime loop")
+        if timeout is not None:
+            # The timeout of the Bot is for the read only.
+            timeout += CONNECT_TIMEOUT
+        return self.runtime.run(self.http.fetch(
+            url=url,
+            method=method,
+            body=body,
+            headers=headers,
+            timeout=timeout,
+        ))
+
+    def post(
+        self,
+        url: str,
+        data: Dict[str, Any],
+        timeout: float = None,
+    ) -> Any:
+        (body, content_type) = _encode_params(data or {})
+        return _result(self._fetch(
+            url,
+            "POST",
+            body=body,
+            headers={"Content-Type": content_type},
+            timeout=timeout,
+        ))
+
+    def retrieve(self, url: str, timeout: float = None) -> bytes:
+        return self._fetch(url, "GET", timeout=timeout)
+
+    def download(self, url: str, filename: str, timeout: float = None):
+        content = self.retrieve(url, timeout=timeout)
+        with open(filename, "wb") as f:
+            f.write(content)
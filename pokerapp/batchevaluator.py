@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pokerapp.cards import RANKS, SUITS
+from pokerapp.winnerdetermination import HAND_RANK, HandsOfPoker
+
+# Rows are scored in chunks to keep the temporary arrays small.
+CHUNK_SIZE = 1 << 16
+
+_RANKS_COUNT = len(RANKS)
+_RANK_MASK = (1 << _RANKS_COUNT) - 1
+
+
+def _build_mask_tables():
+    """ Tables indexed by a 13-bit rank mask. """
+    size = 1 << _RANKS_COUNT
+    popcount = np.zeros(size, dtype=np.int64)
+    top_bit = np.zeros(size, dtype=np.int64)
+    straight = np.zeros(size, dtype=np.int64)
+    # kickers[k][mask]: the k highest values, the highest has most weight.
+    kickers = np.zeros((6, size), dtype=np.int64)
+
+    for mask in range(1, size):
+        popcount[mask] = mask.bit_count()
+        top_bit[mask] = 1 << (mask.bit_length() - 1)
+
+        for high in range(_RANKS_COUNT - 1, 3, -1):
+            window = 0b11111 << (high - 4)
+            if mask & window == window:
+                straight[mask] = high + 2
+                break
+
+        values = [i + 2 for i in range(_RANKS_COUNT - 1, -1, -1)
+                  if mask & (1 << i)]
+        for k in range(1, 6):
+            for value in values[:k]:
+                kickers[k][mask] = kickers[k][mask] * 15 + value
+            kickers[k][mask] *= 15 ** max(0, k - len(values))
+
+    return popcount, top_bit, straight, kickers
+
+
+_POPCOUNT, _TOP_BIT, _STRAIGHT, _KICKERS = _build_mask_tables()
+_TOP = _KICKERS[1]
+
+
+def _kind(kind: HandsOfPoker) -> np.int64:
+    return np.int64(HAND_RANK * kind.value)
+
+
+def _score_chunk(hands: np.ndarray) -> np.ndarray:
+    # The whole hand as a 52-bit mask, 13 bits per suit.
+    cards = np.zeros(len(hands), dtype=np.int64)
+    # Ranks present at least 1, 2, 3 and 4 times.
+    ranks = [np.zeros(len(hands), dtype=np.int64) for _ in range(4)]
+
+    for column in hands.T:
+        card = np.int64(1) << column
+        cards |= card
+        bit = np.int64(1) << (column % _RANKS_COUNT)
+        ranks[3] |= ranks[2] & bit
+        ranks[2] |= ranks[1] & bit
+        ranks[1] |= ranks[0] & bit
+        ranks[0] |= bit
+    (once, twice, three, four) = ranks
+
+    # At most one suit can have 5 of 7 cards.
+    flush = np.zeros(len(hands), dtype=np.int64)
+    for suit in range(len(SUITS)):
+        suited = (cards >> (suit * _RANKS_COUNT)) & _RANK_MASK
+        flush |= np.where(_POPCOUNT[suited] >= 5, suited, 0)
+
+    straight_flush = _STRAIGHT[flush]
+    straight = _STRAIGHT[once]
+
+    quad_bit = _TOP_BIT[four]
+    trips_bit = _TOP_BIT[three]
+    full_pair = _TOP[twice & ~trips_bit]
+
+    pairs = twice & ~three
+    high_pair_bit = _TOP_BIT[pairs]
+    low_pair_bit = _TOP_BIT[pairs & ~high_pair_bit]
+
+    return np.select(
+        [
+            straight_flush == 14,
+            straight_flush > 0,
+            four > 0,
+            (three > 0) & (full_pair > 0),
+            flush > 0,
+            straight > 0,
+            three > 0,
+            low_pair_bit > 0,
+            pairs > 0,
+        ],
+        [
+            _kind(HandsOfPoker.ROYAL_FLUSH),
+            _kind(HandsOfPoker.STRAIGHT_FLUSH) + straight_flush,
+            _kind(HandsOfPoker.FOUR_OF_A_KIND) +
+            _TOP[once & ~quad_bit] + _TOP[four] * 15,
+            _kind(HandsOfPoker.FULL_HOUSE) + full_pair + _TOP[three] * 15,
+            _kind(HandsOfPoker.FLUSH) + _TOP[flush],
+            _kind(HandsOfPoker.STRAIGHTS) + straight,
+            _kind(HandsOfPoker.THREE_OF_A_KIND) +
+            _KICKERS[2][once & ~trips_bit] + _TOP[three] * 15**2,
+            _kind(HandsOfPoker.TWO_PAIR) +
+            _TOP[once & ~high_pair_bit & ~low_pair_bit] +
+            _TOP[low_pair_bit] * 15 + _TOP[high_pair_bit] * 15**2,
+            _kind(HandsOfPoker.PAIR) +
+            _KICKERS[3][once & ~high_pair_bit] +
+            _TOP[high_pair_bit] * 15**3,
+        ],
+        default=_kind(HandsOfPoker.HIGH_CARD) + _KICKERS[5][once],
+    )
+
+
+def score_many(hands: np.ndarray) -> np.ndarray:
+    """ Scores of (N, 5..7) card ids, equal to LookupEvaluator.evaluate_ids.
+
+        Everything is computed on rank bit masks of the whole batch,
+        the kickers and straights come from tables indexed by 13-bit masks.
+    """
+    hands = np.asarray(hands, dtype=np.int64)
+    if hands.ndim != 2 or not 5 <= hands.shape[1] <= 7:
+        raise ValueError("hands must be (N, 5..7), got " + str(hands.shape))
+
+    scores = np.empty(len(hands), dtype=np.int64)
+    for start in range(0, len(hands), CHUNK_SIZE):
+        chunk = hands[start:start + CHUNK_SIZE]
+        scores[start:start + len(chunk)] = _score_chunk(chunk)
+    return scores
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+""" All the card images resized and packed into one image.
+
+    python3 -m pokerapp.cardatlas  # builds ./assets/atlas
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import List, Tuple
+
+from PIL import Image
+
+from pokerapp.cards import CARDS_COUNT, DECK, RANKS, Card
+
+CARD_ASSETS = Path("./assets/cards")
+ATLAS_IMAGE = Path("./assets/atlas/cards.png")
+CARD_SIZE = (84, 128)
+
+# By suit index of the card.
+FILE_SUITS = ("H", "D", "C", "S")
+
+Size = Tuple[int, int]
+
+
+class CardAtlas:
+    """ Cards in rows by suit and in columns by rank, so the card
+        with id i is at column i % 13 and row i // 13.
+    """
+
+    def __init__(self, image: Image, card_size: Size):
+        self.image = image
+        self.card_size = card_size
+        self.offsets = [
+            self._offset(card_id, card_size)
+            for card_id in range(CARDS_COUNT)
+        ]
+
+    @staticmethod
+    def _offset(card_id: int, card_size: Size) -> Tuple[int, int]:
+        return (
+            card_id % len(RANKS) * card_size[0],
+            card_id // len(RANKS) * card_size[1],
+        )
+
+    @staticmethod
+    def offsets_path(image_path: Path) -> Path:
+        return image_path.with_suffix(".json")
+
+    @classmethod
+    def build(
+        cls,
+        card_assets: Path = CARD_ASSETS,
+        card_size: Size = CARD_SIZE,
+    ) -> "CardAtlas":
+        image = Image.new("RGB", (
+            card_size[0] * len(RANKS),
+            card_size[1] * CARDS_COUNT // len(RANKS),
+        ))
+        for card in DECK:
+            with Image.open(_card_file(card_assets, card)) as card_im:
+                image.paste(
+                    card_im.convert("RGB").resize(card_size),
+                    cls._offset(card.id, card_size),
+                )
+        return cls(image, card_size)
+
+    @classmethod
+    def load(cls, image_path: Path = ATLAS_IMAGE) -> "CardAtlas":
+        with open(cls.offsets_path(image_path), "r") as f:
+            meta = json.load(f)
+        with Image.open(image_path) as image:
+            image.load()
+            atlas = cls(image, tuple(meta["card_size"]))
+
+        if atlas.offsets != [tuple(o) for o in meta["offsets"]]:
+            raise ValueError("unexpected card offsets in " + str(image_path))
+        return atlas
+
+    @classmethod
+    def load_or_build(
+        cls,
+        image_path: Path = ATLAS_IMAGE,
+        card_assets: Path = CARD_ASSETS,
+        card_size: Size = CARD_SIZE,
+    ) -> "CardAtlas":
+        """ Loads the prebuilt atlas, builds it in memory if there is
+            no atlas of the card size.
+        """
+        try:
+            atlas = cls.load(image_path)
+            if atlas.card_size == tuple(card_size):
+                return atlas
+            logging.warning(
+                "card atlas %s is of size %s, building %s",
+                image_path, atlas.card_size, card_size,
+            )
+        except FileNotFoundError:
+            logging.warning("no card atlas at %s, building it", image_path)
+
+        return cls.build(card_assets, card_size)
+
+    def save(self, image_path: Path = ATLAS_IMAGE) -> None:
+        image_path.parent.mkdir(parents=True, exist_ok=True)
+        self.image.save(image_path, "PNG")
+        with open(self.offsets_path(image_path), "w") as f:
+            json.dump({
+                "card_size": self.card_size,
+                "offsets": self.offsets,
+            }, f)
+
+    def crop_cards(self) -> List[Image.Image]:
+        """ Card images by card id. """
+        (width, height) = self.card_size
+        return [
+            self.image.crop((x, y, x + width, y + height))
+            for (x, y) in self.offsets
+        ]
+
+
+def _card_file(card_assets: Path, card: Card) -> Path:
+    return card_assets.joinpath(
+        card.rank + FILE_SUITS[card.suit_index] + ".jpg",
+    )
+
+
+if __name__ == "__main__":
+    from pokerapp.config import Config
+
+    cfg = Config()
+    CardAtlas.build(
+        card_size=(cfg.DESK_CARD_WIDTH, cfg.DESK_CARD_HEIGHT),
+    ).save()
+    print("card atlas saved to", ATLAS_IMAGE)
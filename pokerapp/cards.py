@@ -1,49 +1,77 @@
 #!/usr/bin/env python3
 
 import random
-from typing import List
+from typing import Dict, List, Tuple
+
+RANKS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A")
+SUITS = ("♥", "♦", "♣", "♠")
+# Outlined suit symbols are read as the same suits.
+SUIT_ALIASES = {"♡": "♥", "♢": "♦", "♧": "♣", "♤": "♠"}
+
+CARDS_COUNT = len(RANKS) * len(SUITS)
 
 
 class Card(str):
-    @property
-    def suit(self) -> str:
-        return self[-1:]
-
-    @property
-    def rank(self) -> str:
-        return self[:-1]
-
-    @property
-    def value(self) -> str:
-        if self[0] == "J":
-            return 11
-        elif self[0] == "Q":
-            return 12
-        elif self[0] == "K":
-            return 13
-        elif self[0] == "A":
-            return 14
-        return int(self[:-1])
+    """ Interned card: Card("A♥") is always the same object,
+        Card("A♡") too.
+
+        The string form is kept for messages and keyboards, everything
+        else is computed once when the card is registered:
+        id is suit_index * 13 + value - 2, in range [0, 52).
+    """
+
+    _registry: Dict[str, "Card"] = {}
+
+    id: int
+    value: int
+    rank: str
+    suit: str
+    suit_index: int
+    rank_bit: int
+    suit_bit: int
+
+    def __new__(cls, text: str) -> "Card":
+        card = cls._registry.get(text)
+        if card is not None:
+            return card
+
+        rank, suit = text[:-1], text[-1:]
+        if suit in SUIT_ALIASES:
+            card = cls._registry[text] = cls(rank + SUIT_ALIASES[suit])
+            return card
+        if rank not in RANKS or suit not in SUITS:
+            raise ValueError("unknown card: " + text)
+
+        card = super(Card, cls).__new__(cls, text)
+        card.rank = rank
+        card.suit = suit
+        card.value = RANKS.index(rank) + 2
+        card.suit_index = SUITS.index(suit)
+        card.id = card.suit_index * len(RANKS) + card.value - 2
+        card.rank_bit = 1 << (card.value - 2)
+        card.suit_bit = 1 << card.suit_index
+
+        cls._registry[text] = card
+        return card
+
+    def __reduce__(self):
+        return (Card, (str(self), ))
+
+    @staticmethod
+    def from_id(card_id: int) -> "Card":
+        return DECK[card_id]
 
 
 Cards = List[Card]
 
+DECK: Tuple[Card] = tuple(
+    Card(rank + suit) for suit in SUITS for rank in RANKS
+)
+
+_random = random.SystemRandom()
+
 
 def get_cards() -> Cards:
-    cards = [
-        Card("2♥"), Card("3♥"), Card("4♥"), Card("5♥"),
-        Card("6♥"), Card("7♥"), Card("8♥"), Card("9♥"),
-        Card("10♥"), Card("J♥"), Card("Q♥"), Card("K♥"),
-        Card("A♥"), Card("2♦"), Card("3♦"), Card("4♦"),
-        Card("5♦"), Card("6♦"), Card("7♦"), Card("8♦"),
-        Card("9♦"), Card("10♦"), Card("J♦"), Card("Q♦"),
-        Card("K♦"), Card("A♦"), Card("2♣"), Card("3♣"),
-        Card("4♣"), Card("5♣"), Card("6♣"), Card("7♣"),
-        Card("8♣"), Card("9♣"), Card("10♣"), Card("J♣"),
-        Card("Q♣"), Card("K♣"), Card("A♣"), Card("2♠"),
-        Card("3♠"), Card("4♠"), Card("5♠"), Card("6♠"),
-        Card("7♠"), Card("8♠"), Card("9♠"), Card("10♠"),
-        Card("J♠"), Card("Q♠"), Card("K♠"), Card("A♠"),
-    ]
-    random.SystemRandom().shuffle(cards)
+    cards = list(DECK)
+    _random.shuffle(cards)
     return cards
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Tuple
+
+from telegram import Bot
+
+from pokerapp.entities import ChatId, UserId
+
+CHAT_CACHE_TTL = 60
+CHAT_CACHE_SIZE = 4096
+
+
+class _ChatValues:
+    def __init__(self):
+        # Name of the value to the deadline and the value.
+        self.values: Dict[str, Tuple[float, Any]] = {}
+        # Increased by invalidate, a value fetched before is dropped.
+        self.generation = 0
+
+
+class ChatMetadataCache:
+    """ Member count and administrators of the chats.
+
+        Values are asked from Telegram once per ttl seconds. Updates
+        about the members of a chat invalidate its values earlier.
+        The least recently used chats are evicted.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        ttl: float = CHAT_CACHE_TTL,
+        max_chats: int = CHAT_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._bot = bot
+        self._ttl = ttl
+        self._max_chats = max_chats
+        self._clock = clock
+        self._chats: OrderedDict[ChatId, _ChatValues] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _chat(self, chat_id: ChatId) -> _ChatValues:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _ChatValues()
+            while len(self._chats) > self._max_chats:
+                self._chats.popitem(last=False)
+        self._chats.move_to_end(chat_id)
+        return chat
+
+    def _get(self, name: str, chat_id: ChatId, fetch: Callable[[], Any]):
+        now = self._clock()
+        with self._lock:
+            chat = self._chat(chat_id)
+            cached = chat.values.get(name)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+            generation = chat.generation
+
+        # Telegram is asked without the lock, the chat may be
+        # invalidated or evicted meanwhile.
+        value = fetch()
+        with self._lock:
+            if self._chats.get(chat_id) is chat and \
+                    chat.generation == generation:
+                chat.values[name] = (now + self._ttl, value)
+        return value
+
+    def member_count(self, chat_id: ChatId) -> int:
+        return self._get(
+            "member_count",
+            chat_id,
+            lambda: self._bot.get_chat_member_count(chat_id),
+        )
+
+    def administrators(self, chat_id: ChatId) -> FrozenSet[UserId]:
+        """ Ids of the administrators of the chat. """
+        return self._get(
+            "administrators",
+            chat_id,
+            lambda: frozenset(
+                m.user.id for m in self._bot.get_chat_administrators(chat_id)
+            ),
+        )
+
+    def is_admin(self, chat_id: ChatId, user_id: UserId) -> bool:
+        return user_id in self.administrators(chat_id)
+
+    def invalidate(self, chat_id: ChatId) -> None:
+        with self._lock:
+            chat = self._chats.get(chat_id)
+            if chat is not None:
+                chat.values.clear()
+                chat.generation += 1
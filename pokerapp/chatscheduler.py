@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Tuple, Union
+
+from telegram.error import (
+    TimedOut,
+    NetworkError,
+    RetryAfter,
+    BadRequest,
+    ChatMigrated,
+    Conflict,
+    InvalidToken,
+    Unauthorized,
+)
+
+from pokerapp.asyncruntime import AsyncRuntime
+from pokerapp.entities import ChatId
+
+# Telegram allows about 30 messages per second for a bot and
+# 20 messages per minute in a group.
+GLOBAL_RATE = 30
+GLOBAL_BURST = 30
+GROUP_RATE = 20 / 60
+GROUP_BURST = 3
+PRIVATE_RATE = 1
+PRIVATE_BURST = 1
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._time = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self._time:
+            self._tokens = min(
+                self._capacity,
+                self._tokens + (now - self._time) * self._rate,
+            )
+            self._time = now
+
+    def wait_time(self, now: float) -> float:
+        """ Seconds until a token is available. """
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / self._rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self._tokens -= 1
+
+
+class SharedTokenBucket(TokenBucket):
+    """ A bucket of several processes, so together they do not send
+        more than the limit of the bot.
+
+        The tokens and the time of the last refill are kept in a shared
+        array of two doubles, see new_state. Processes may take the
+        same token, the bucket goes below zero and the next waits are
+        longer.
+    """
+
+    def __init__(self, rate: float, capacity: float, state):
+        super().__init__(rate, capacity)
+        self._state = state
+
+    @staticmethod
+    def new_state(ctx, capacity: float):
+        """ The state for the processes of the multiprocessing context. """
+        return ctx.Array("d", [capacity, time.monotonic()])
+
+    def wait_time(self, now: float) -> float:
+        with self._state.get_lock():
+            (self._tokens, self._time) = self._state
+            wait = super().wait_time(now)
+            self._state[:] = [self._tokens, self._time]
+        return wait
+
+    def take(self, now: float) -> None:
+        with self._state.get_lock():
+            (self._tokens, self._time) = self._state
+            super().take(now)
+            self._state[:] = [self._tokens, self._time]
+
+
+class ChatTask:
+    """ A call of a bot method, the method can be a coroutine function.
+
+        Tasks of send_message can be merged into one message, all their
+        futures are resolved with it.
+    """
+
+    def __init__(
+        self,
+        method: Callable,
+        kwargs: Dict[str, Any] = None,
+        mergeable: bool = False,
+    ):
+        self.method = method
+        self.kwargs = kwargs or {}
+        self.mergeable = mergeable
+        self.is_async = asyncio.iscoroutinefunction(method)
+        self.futures: List[Future] = [Future()]
+
+    def __call__(self) -> Any:
+        return self.method(**self.kwargs)
+
+    def merge(self, other: "ChatTask") -> bool:
+        """ Appends the text of the other message if it is sent the same
+            way. Only the last message can have a keyboard.
+        """
+        if not (self.mergeable and other.mergeable):
+            return False
+        if self.kwargs.get("reply_markup") is not None:
+            return False
+
+        (text, other_text) = (self.kwargs["text"], other.kwargs["text"])
+        if len(text) + 2 + len(other_text) > MAX_MESSAGE_LENGTH:
+            return False
+
+        skip = ("text", "reply_markup")
+        if {k: v for k, v in self.kwargs.items() if k not in skip} != \
+                {k: v for k, v in other.kwargs.items() if k not in skip}:
+            return False
+
+        self.kwargs = {
+            **other.kwargs,
+            "text": text + "\n\n" + other_text,
+        }
+        self.futures.extend(other.futures)
+        return True
+
+    def set_result(self, result: Any) -> None:
+        for future in self.futures:
+            future.set_result(result)
+
+    def set_exception(self, e: Exception) -> None:
+        for future in self.futures:
+            future.set_exception(e)
+
+
+def chat_bucket(chat_id: ChatId) -> TokenBucket:
+    # Ids of groups are negative.
+    if str(chat_id).startswith("-"):
+        return TokenBucket(GROUP_RATE, GROUP_BURST)
+    return TokenBucket(PRIVATE_RATE, PRIVATE_BURST)
+
+
+class _ChatQueue:
+    def __init__(self, bucket: TokenBucket):
+        self.tasks: Deque[ChatTask] = deque()
+        self.bucket = bucket
+        self.next_time = 0.0
+        # The chat is in the heap or its task is running.
+        self.scheduled = False
+
+
+class ChatTaskScheduler:
+    """ Runs the tasks of each chat one by one, at least delay seconds
+        apart, on a pool of workers.
+
+        Chats with pending tasks are kept in a heap by the time they
+        are allowed to send the next one. The scheduler thread sleeps
+        until that time or until a task is added, a slow task holds up
+        only its own chat.
+
+        Besides the delay, sends are limited by a token bucket of the bot,
+        which the worker processes share, and one of each chat. Messages
+        which wait in the queue of a chat are merged into one when
+        possible.
+
+        Async tasks run on the runtime, so the number of sends in flight
+        is not limited by the workers.
+    """
+
+    def __init__(
+        self,
+        delay: float = 3,
+        workers: int = 8,
+        global_rate: float = GLOBAL_RATE,
+        global_burst: float = GLOBAL_BURST,
+        new_chat_bucket: Callable[[ChatId], TokenBucket] = chat_bucket,
+        runtime: AsyncRuntime = None,
+        global_bucket: TokenBucket = None,
+    ):
+        self._delay = delay
+        self._runtime = runtime
+        self._new_chat_bucket = new_chat_bucket
+        if global_bucket is None:
+            global_bucket = TokenBucket(global_rate, global_burst)
+        self._bucket = global_bucket
+        self._chats: Dict[ChatId, _ChatQueue] = {}
+        self._heap: List[Tuple[float, int, ChatId]] = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="chat-tasks",
+        )
+        self._thread = threading.Thread(
+            target=self._loop,
+            name="chat-scheduler",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._executor.shutdown(wait=False)
+
+    def add(
+        self,
+        chat_id: ChatId,
+        task: Union[ChatTask, Callable],
+    ) -> Future:
+        """ The future is resolved with the result of the task. """
+        if not isinstance(task, ChatTask):
+            task = ChatTask(task)
+
+        with self._cond:
+            chat = self._chats.get(chat_id)
+            if chat is None:
+                chat = self._chats[chat_id] = _ChatQueue(
+                    self._new_chat_bucket(chat_id),
+                )
+            chat.tasks.append(task)
+            if not chat.scheduled:
+                self._schedule(chat_id, chat)
+        return task.futures[0]
+
+    def _schedule(self, chat_id: ChatId, chat: _ChatQueue) -> None:
+        now = time.monotonic()
+        due = max(chat.next_time, now + chat.bucket.wait_time(now))
+
+        chat.scheduled = True
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, chat_id))
+        if self._heap[0][2] == chat_id:
+            self._cond.notify()
+
+    def _loop(self) -> None:
+        with self._cond:
+            while not self._stopped:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                now = time.monotonic()
+                wait = max(
+                    self._heap[0][0] - now,
+                    self._bucket.wait_time(now),
+                )
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+
+                (_, _, chat_id) = heapq.heappop(self._heap)
+                chat = self._chats[chat_id]
+                task = chat.tasks.popleft()
+                while chat.tasks and task.merge(chat.tasks[0]):
+                    chat.tasks.popleft()
+
+                self._bucket.take(now)
+                chat.bucket.take(now)
+                self._executor.submit(self._run, chat_id, chat, task)
+
+    def _run(self, chat_id: ChatId, chat: _ChatQueue, task: ChatTask) -> None:
+        start = time.monotonic()
+        if not task.is_async:
+            return self._done(chat_id, chat, task, start, task)
+
+        self._runtime.submit(task()).add_done_callback(
+            lambda future:
+                self._done(chat_id, chat, task, start, future.result),
+        )
+
+    def _done(
+        self,
+        chat_id: ChatId,
+        chat: _ChatQueue,
+        task: ChatTask,
+        start: float,
+        result: Callable,
+    ) -> None:
+        retry_after = None
+
+        try:
+            task.set_result(result())
+        except RetryAfter as e:
+            logging.warning(
+                "chat %s: retry after %s s", chat_id, e.retry_after,
+            )
+            retry_after = e.retry_after
+        except (
+            # BadRequest is a NetworkError, but it fails again on retry.
+            BadRequest,
+            ChatMigrated,
+            Conflict,
+            InvalidToken,
+            Unauthorized,
+        ) as e:
+            logging.error(e)
+            task.set_exception(e)
+        except (
+            TimedOut,
+            NetworkError,
+        ):
+            retry_after = 0
+        except Exception as e:
+            logging.exception(e)
+            task.set_exception(e)
+
+        with self._cond:
+            chat.next_time = start + self._delay
+            if retry_after is not None:
+                chat.tasks.appendleft(task)
+                chat.next_time = max(
+                    chat.next_time,
+                    time.monotonic() + retry_after,
+                )
+            chat.scheduled = False
+            if chat.tasks:
+                self._schedule(chat_id, chat)
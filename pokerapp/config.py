@@ -27,3 +27,95 @@ class Config:
             "POKERBOT_DEBUG",
             default="0"
         ) == "1")
+        self.DESK_CACHE_MB: int = int(os.getenv(
+            "POKERBOT_DESK_CACHE_MB",
+            default="64"
+        ))
+        self.DESK_CACHE_PREWARM: bool = bool(os.getenv(
+            "POKERBOT_DESK_CACHE_PREWARM",
+            default="0"
+        ) == "1")
+        self.DESK_IMAGE_FORMAT: str = os.getenv(
+            "POKERBOT_DESK_IMAGE_FORMAT",
+            default="png"
+        )
+        self.DESK_IMAGE_QUALITY: int = int(os.getenv(
+            "POKERBOT_DESK_IMAGE_QUALITY",
+            default="85"
+        ))
+        self.DESK_CARD_WIDTH: int = int(os.getenv(
+            "POKERBOT_DESK_CARD_WIDTH",
+            default="84"
+        ))
+        self.DESK_CARD_HEIGHT: int = int(os.getenv(
+            "POKERBOT_DESK_CARD_HEIGHT",
+            default="128"
+        ))
+        self.ASYNC_RUNTIME: bool = bool(os.getenv(
+            "POKERBOT_ASYNC_RUNTIME",
+            default="0"
+        ) == "1")
+        self.WEBHOOK: bool = bool(os.getenv(
+            "POKERBOT_WEBHOOK",
+            default="0"
+        ) == "1")
+        self.WEBHOOK_URL: str = os.getenv(
+            "POKERBOT_WEBHOOK_URL",
+            default="",
+        )
+        self.WEBHOOK_LISTEN: str = os.getenv(
+            "POKERBOT_WEBHOOK_LISTEN",
+            default="0.0.0.0",
+        )
+        self.WEBHOOK_PORT: int = int(os.getenv(
+            "POKERBOT_WEBHOOK_PORT",
+            default="8443"
+        ))
+        self.WEBHOOK_SECRET: str = os.getenv(
+            "POKERBOT_WEBHOOK_SECRET",
+            default="",
+        )
+        self.WEBHOOK_WORKERS: int = int(os.getenv(
+            "POKERBOT_WEBHOOK_WORKERS",
+            default="4"
+        ))
+        self.WEBHOOK_QUEUE_SIZE: int = int(os.getenv(
+            "POKERBOT_WEBHOOK_QUEUE_SIZE",
+            default="256"
+        ))
+        self.WORKERS: int = int(os.getenv(
+            "POKERBOT_WORKERS",
+            default="1"
+        ))
+        self.CHAT_WORKERS: int = int(os.getenv(
+            "POKERBOT_CHAT_WORKERS",
+            default="8"
+        ))
+        self.CHAT_CACHE_TTL: int = int(os.getenv(
+            "POKERBOT_CHAT_CACHE_TTL",
+            default="60"
+        ))
+        self.KV_BACKEND: str = os.getenv(
+            "POKERBOT_KV_BACKEND",
+            default="redis",
+        )
+        self.KV_AOF_PATH: str = os.getenv(
+            "POKERBOT_KV_AOF_PATH",
+            default="",
+        )
+        self.KV_AOF_FSYNC: bool = bool(os.getenv(
+            "POKERBOT_KV_AOF_FSYNC",
+            default="0"
+        ) == "1")
+        self.DEAL_WORKERS: int = int(os.getenv(
+            "POKERBOT_DEAL_WORKERS",
+            default="8"
+        ))
+        self.HAND_LOG_PATH: str = os.getenv(
+            "POKERBOT_HAND_LOG_PATH",
+            default="",
+        )
+        self.HAND_LOG_FSYNC_INTERVAL: float = float(os.getenv(
+            "POKERBOT_HAND_LOG_FSYNC_INTERVAL",
+            default="1"
+        ))
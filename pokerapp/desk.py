@@ -1,47 +1,67 @@
 #!/usr/bin/env python3
 
+import enum
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from itertools import combinations
+from typing import Tuple
 
 from PIL import Image
 from pathlib import Path
 
-from pokerapp.cards import Cards, Card
+from pokerapp.cardatlas import ATLAS_IMAGE, CARD_ASSETS, CARD_SIZE, CardAtlas
+from pokerapp.cards import DECK, Cards
+
+
+class ImageFormat(enum.Enum):
+    PNG = "png"
+    PNG_PALETTE = "png8"  # Quantized to a 256 colors palette.
+    JPEG = "jpeg"
+    WEBP = "webp"
+
+    @property
+    def extension(self) -> str:
+        return {
+            ImageFormat.PNG: "png",
+            ImageFormat.PNG_PALETTE: "png",
+            ImageFormat.JPEG: "jpg",
+            ImageFormat.WEBP: "webp",
+        }[self]
 
 
 class DeskImageGenerator:
     def __init__(
         self,
-        card_assets: Path = Path("./assets/cards"),
-        card_size=(84, 128),
+        card_assets: Path = CARD_ASSETS,
+        card_size=CARD_SIZE,
         padding=10,
+        image_format: ImageFormat = ImageFormat.PNG,
+        quality: int = 85,
+        atlas: Path = ATLAS_IMAGE,
     ):
-        self._card_assets = card_assets
-        self._file_suit_mapping = {
-            "♣": "C",
-            "♦": "D",
-            "♥": "H",
-            "♠": "S",
-        }
+        self.image_format = image_format
+        self._quality = quality
         self._card_size = card_size
-        self._loaded_card_imgs = {}
         self._padding = padding
+        # By card id, cropped from the atlas once.
+        self._card_imgs = CardAtlas.load_or_build(
+            image_path=atlas,
+            card_assets=card_assets,
+            card_size=card_size,
+        ).crop_cards()
 
-    def _get_file_name(self, card: Card) -> Path:
-        return self._card_assets.joinpath(
-            card.rank + self._file_suit_mapping[card.suit] + ".jpg",
+    @property
+    def render_key(self) -> str:
+        """ Settings which change the encoded image. """
+        return "{}:{}x{}:q{}:p{}".format(
+            self.image_format.value,
+            self._card_size[0],
+            self._card_size[1],
+            self._quality,
+            self._padding,
         )
 
-    def _load_card_image(self, card: Card) -> Image:
-        if card in self._loaded_card_imgs:
-            return self._loaded_card_imgs[card]
-
-        im_file = self._get_file_name(card)
-        im = Image.open(im_file)
-        im = im.resize(self._card_size)
-
-        self._loaded_card_imgs[card] = im
-
-        return im
-
     def generate_desk(self, cards: Cards) -> Image:
         padding_horizontal = self._padding * (len(cards) - 1)
         desk_im = Image.new(mode="RGBA", size=(
@@ -52,9 +72,100 @@ class DeskImageGenerator:
         offset_x = 0
 
         for card in cards:
-            card_im = self._load_card_image(card)
-            desk_im.paste(card_im, (offset_x, 0))
+            desk_im.paste(self._card_imgs[card.id], (offset_x, 0))
 
             offset_x += self._card_size[0] + self._padding
 
         return desk_im
+
+    def render(self, cards: Cards) -> bytes:
+        """ Encoded image of the cards in the image format. """
+        return self.encode(self.generate_desk(cards))
+
+    def encode(self, desk_im: Image) -> bytes:
+        bio = BytesIO()
+
+        if self.image_format == ImageFormat.PNG:
+            desk_im.save(bio, "PNG")
+        elif self.image_format == ImageFormat.PNG_PALETTE:
+            desk_im.quantize(
+                colors=256,
+                method=Image.Quantize.FASTOCTREE,
+            ).save(bio, "PNG", optimize=True)
+        elif self.image_format == ImageFormat.JPEG:
+            # No alpha channel in JPEG, the gaps between cards are white.
+            background = Image.new("RGB", desk_im.size, (255, 255, 255))
+            background.paste(desk_im, mask=desk_im.getchannel("A"))
+            background.save(bio, "JPEG", quality=self._quality)
+        elif self.image_format == ImageFormat.WEBP:
+            desk_im.save(bio, "WEBP", quality=self._quality, method=4)
+
+        return bio.getvalue()
+
+
+class DeskImageCache:
+    """ Encoded desk images by the ordered card ids.
+
+        The least recently used images are evicted when their total size
+        exceeds the budget.
+    """
+
+    def __init__(
+        self,
+        generator: DeskImageGenerator = None,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self._generator = generator or DeskImageGenerator()
+        self._max_bytes = max_bytes
+        self._images: OrderedDict[Tuple[int], bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(cards: Cards) -> Tuple[int]:
+        return tuple(card.id for card in cards)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def image_format(self) -> ImageFormat:
+        return self._generator.image_format
+
+    @property
+    def render_key(self) -> str:
+        return self._generator.render_key
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def get(self, cards: Cards) -> bytes:
+        key = self._key(cards)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                return image
+
+        image = self._generator.render(cards)
+        self._put(key, image)
+        return image
+
+    def _put(self, key: Tuple[int], image: bytes) -> None:
+        if len(image) > self._max_bytes:
+            return
+
+        with self._lock:
+            if key in self._images:
+                return
+            self._images[key] = image
+            self._size += len(image)
+            while self._size > self._max_bytes:
+                (_, evicted) = self._images.popitem(last=False)
+                self._size -= len(evicted)
+
+    def prewarm_hole_cards(self) -> None:
+        """ Renders all 1326 pairs of cards ordered by card id. """
+        for cards in combinations(DECK, 2):
+            self.get(cards)
@@ -3,7 +3,7 @@
 from abc import abstractmethod
 import enum
 import datetime
-from typing import Tuple, List
+from typing import Dict, List, Optional, Tuple
 from uuid import uuid4
 from pokerapp.cards import get_cards
 
@@ -89,6 +89,16 @@ class Game:
         self.trading_end_user_id = 0
         self.ready_users = set()
         self.last_turn_time = datetime.datetime.now()
+        self._seats = None
+
+    @property
+    def seats(self) -> "SeatRing":
+        """ The turn order, built from the states of the players when
+            it is used first. A loaded game does not have it yet.
+        """
+        if getattr(self, "_seats", None) is None:
+            self._seats = SeatRing(self.players)
+        return self._seats
 
     def players_by(self, states: Tuple[PlayerState]) -> List[Player]:
         return list(filter(lambda p: p.state in states, self.players))
@@ -97,6 +107,90 @@ class Game:
         return "{}({!r})".format(self.__class__.__name__, self.__dict__)
 
 
+class SeatRing:
+    """ Seats of the players who can act, linked in the turn order.
+
+        Every seat points to the next active seat, so the next player
+        to act is found and a player who stops acting is unlinked in
+        constant time. A seat which is unlinked keeps its pointer, it
+        leads to the active seats after it.
+    """
+
+    def __init__(self, players: List[Player]):
+        n = len(players)
+        self._seat: Dict[UserId, int] = {
+            p.user_id: i for (i, p) in enumerate(players)
+        }
+        self._active = [p.state == PlayerState.ACTIVE for p in players]
+        self._next: List[Optional[int]] = [None] * n
+        self._prev: List[Optional[int]] = [None] * n
+        self._active_count = sum(self._active)
+        self._in_game_count = sum(
+            p.state != PlayerState.FOLD for p in players
+        )
+
+        following = None
+        for i in reversed(range(2 * n)):
+            seat = i % n
+            if i < n:
+                self._next[seat] = following
+            if self._active[seat]:
+                following = seat
+        for seat in range(n):
+            if self._active[seat]:
+                self._prev[self._next[seat]] = seat
+
+    def __len__(self) -> int:
+        """ Count of the players who can act. """
+        return self._active_count
+
+    @property
+    def in_game_count(self) -> int:
+        """ Count of the players who did not fold. """
+        return self._in_game_count
+
+    def seat_of(self, user_id: UserId) -> int:
+        return self._seat[user_id]
+
+    def next_active(self, seat: int) -> Optional[int]:
+        """ The first active seat after the seat. """
+        if self._active_count == 0:
+            return None
+        following = self._next[seat]
+        while not self._active[following]:
+            following = self._next[following]
+        if not self._active[seat]:
+            self._next[seat] = following
+        return following
+
+    def first_active(self, seat: int) -> Optional[int]:
+        """ The first active seat from the seat. """
+        if self._active[seat]:
+            return seat
+        return self.next_active(seat)
+
+    @staticmethod
+    def passes(start: int, seat: int, stop: int) -> bool:
+        """ Whether the seat is on the way after start up to stop. """
+        if start < stop:
+            return start < seat <= stop
+        return seat > start or seat <= stop
+
+    def set_state(self, player: Player, state: PlayerState) -> None:
+        seat = self._seat[player.user_id]
+        if player.state != PlayerState.FOLD and state == PlayerState.FOLD:
+            self._in_game_count -= 1
+        player.state = state
+
+        if state == PlayerState.ACTIVE or not self._active[seat]:
+            return
+        self._active[seat] = False
+        self._active_count -= 1
+        (prev, following) = (self._prev[seat], self._next[seat])
+        self._next[prev] = following
+        self._prev[following] = prev
+
+
 class GameState(enum.Enum):
     INITIAL = 0
     ROUND_PRE_FLOP = 1  # No cards on the table.
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import random
+from itertools import combinations
+from math import comb
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from pokerapp.batchevaluator import score_many
+from pokerapp.cards import CARDS_COUNT, Cards
+from pokerapp.winnerdetermination import LookupEvaluator
+
+BOARD_SIZE = 5
+DEFAULT_TRIALS = 100000
+# Runouts with fewer boards than this are enumerated, not sampled.
+EXACT_LIMIT = 50000
+SAMPLE_BATCH = 20000
+
+
+class PlayerEquity:
+    def __init__(self, win: float, tie: float, lose: float):
+        self.win = win
+        self.tie = tie
+        self.lose = lose
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, self.__dict__)
+
+
+def _count_outcomes(
+    hands: List[Sequence[int]],
+    boards: Iterable[Sequence[int]],
+) -> Tuple[List[int], List[int], int]:
+    wins = [0] * len(hands)
+    ties = [0] * len(hands)
+    total = 0
+
+    for scores in LookupEvaluator.instance().evaluate_boards(hands, boards):
+        total += 1
+        best = max(scores)
+        if scores.count(best) == 1:
+            wins[scores.index(best)] += 1
+            continue
+        for i, score in enumerate(scores):
+            if score == best:
+                ties[i] += 1
+
+    return (wins, ties, total)
+
+
+def _sample_outcomes(
+    hands: List[Sequence[int]],
+    table: Tuple[int],
+    deck: List[int],
+    trials: int,
+    seed: int,
+) -> Tuple[List[int], List[int], int]:
+    rng = np.random.default_rng(seed)
+    deck = np.asarray(deck, dtype=np.int64)
+    missing = BOARD_SIZE - len(table)
+    wins = np.zeros(len(hands), dtype=np.int64)
+    ties = np.zeros(len(hands), dtype=np.int64)
+
+    for start in range(0, trials, SAMPLE_BATCH):
+        size = min(SAMPLE_BATCH, trials - start)
+        # The smallest of random keys give a uniform sample of the deck.
+        picks = rng.random((size, len(deck))) \
+            .argpartition(missing - 1, axis=1)[:, :missing]
+        boards = np.hstack((
+            np.broadcast_to(np.asarray(table, dtype=np.int64),
+                            (size, len(table))),
+            deck[picks],
+        ))
+
+        scores = np.stack([
+            score_many(np.hstack((
+                np.broadcast_to(np.asarray(hand), (size, len(hand))),
+                boards,
+            ))) for hand in hands
+        ])
+        is_best = scores == scores.max(axis=0)
+        is_tie = is_best.sum(axis=0) > 1
+        wins += (is_best & ~is_tie).sum(axis=1)
+        ties += (is_best & is_tie).sum(axis=1)
+
+    return (wins.tolist(), ties.tolist(), trials)
+
+
+class EquityCalculator:
+    """ Win, tie and lose chances of the players for the rest of the board.
+
+        The runout is enumerated when it is small (the flop and later),
+        otherwise it is sampled in batches scored by score_many.
+    """
+
+    def __init__(
+        self,
+        trials: int = DEFAULT_TRIALS,
+        exact_limit: int = EXACT_LIMIT,
+    ):
+        self._trials = trials
+        self._exact_limit = exact_limit
+
+    def calculate(
+        self,
+        hands: List[Cards],
+        cards_table: Cards,
+        dead_cards: Cards = (),
+        trials: int = None,
+    ) -> List[PlayerEquity]:
+        """ Dead cards (folded hands) are not dealt to the board. """
+        hands_ids = [[card.id for card in hand] for hand in hands]
+        table = tuple(card.id for card in cards_table)
+
+        known = set(table).union(*hands_ids, (c.id for c in dead_cards))
+        deck = [i for i in range(CARDS_COUNT) if i not in known]
+        missing = BOARD_SIZE - len(table)
+
+        if comb(len(deck), missing) <= self._exact_limit:
+            wins, ties, total = _count_outcomes(
+                hands_ids,
+                (table + board for board in combinations(deck, missing)),
+            )
+        else:
+            wins, ties, total = _sample_outcomes(
+                hands_ids,
+                table,
+                deck,
+                trials or self._trials,
+                random.SystemRandom().getrandbits(64),
+            )
+
+        return [
+            PlayerEquity(
+                win=w / total,
+                tie=t / total,
+                lose=(total - w - t) / total,
+            ) for (w, t) in zip(wins, ties)
+        ]
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from pokerapp.kvstore import KV
+
+LOCAL_FILE_IDS = 4096
+# Boards are rarely repeated, their ids should not pile up in the kv.
+FILE_ID_TTL = 7 * 24 * 60 * 60
+
+
+class FileIdStore:
+    """ Telegram file_id of images which were already uploaded.
+
+        Ids are kept in the process and in the kv, so another process
+        or a restarted bot does not upload the same image again.
+        The process keeps the most recently used ids, the kv expires
+        them after the ttl.
+    """
+
+    def __init__(
+        self,
+        kv: KV = None,
+        max_local: int = LOCAL_FILE_IDS,
+        ttl: int = FILE_ID_TTL,
+    ):
+        self._kv = kv
+        self._max_local = max_local
+        self._ttl = ttl
+        self._local: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return "pokerbot:file_ids:" + key
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+    def _remember(self, key: str, file_id: str) -> None:
+        with self._lock:
+            self._local[key] = file_id
+            self._local.move_to_end(key)
+            while len(self._local) > self._max_local:
+                self._local.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            file_id = self._local.get(key)
+            if file_id is not None:
+                self._local.move_to_end(key)
+        if file_id is not None or self._kv is None:
+            return file_id
+
+        file_id = self._kv.get(self._key(key))
+        if file_id is None:
+            return None
+
+        file_id = file_id.decode("utf-8")
+        self._remember(key, file_id)
+        return file_id
+
+    def set(self, key: str, file_id: str) -> None:
+        self._remember(key, file_id)
+        if self._kv is not None:
+            self._kv.set(self._key(key), file_id, ex=self._ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._local.pop(key, None)
+        if self._kv is not None:
+            self._kv.delete(self._key(key))
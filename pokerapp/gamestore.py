@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+
+import datetime
+import secrets
+import struct
+import time
+from typing import Callable, Dict, List, Tuple
+
+from pokerapp.cards import Card, Cards
+from pokerapp.entities import (
+    ChatId,
+    Game,
+    GameState,
+    Player,
+    PlayerState,
+    UserId,
+    Wallet,
+)
+from pokerapp.kvstore import KV, script_twin
+from pokerapp.pokerbotmodel import (
+    KEY_CHAT_DATA_GAME,
+    KEY_OLD_PLAYERS,
+    WalletManagerModel,
+)
+
+KEY_GAME_VERSION = "game_version"
+KEY_GAME_DATA = "game_data"
+KEY_GAME_LOCK = "game_lock"
+
+FORMAT_VERSION = 1
+GAME_TTL = 30 * 24 * 60 * 60
+# The chat is locked while the handlers of an update run.
+LOCK_TTL = 60
+LOCK_WAIT = 5
+LOCK_RETRY_DELAY = 0.05
+
+# format, pot, max_round_rate, state, current_player_index,
+# trading_end_user_id, last_turn_time.
+_GAME = struct.Struct(">BqqBhqd")
+# user_id, state, round_rate, ready_message_id.
+_PLAYER = struct.Struct(">qbqq")
+_COUNT = struct.Struct(">H")
+_ID = struct.Struct(">q")
+
+# The version of the game is checked and increased on the Redis side.
+STORE_GAME_SCRIPT = """
+local version = tonumber(redis.call("HGET", KEYS[1], "version") or "0")
+if version ~= tonumber(ARGV[1]) then
+    return false
+end
+redis.call("HSET", KEYS[1], "version", version + 1, "data", ARGV[2])
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+return version + 1
+"""
+
+
+@script_twin(STORE_GAME_SCRIPT)
+def _store_game(kv: KV, keys: List[str], args: List) -> int:
+    (version,) = kv.hmget(keys[0], "version")
+    version = int(version or 0)
+    if version != int(args[0]):
+        return None
+    kv.hset(keys[0], mapping={"version": version + 1, "data": args[1]})
+    kv.expire(keys[0], args[2])
+    return version + 1
+
+
+# The lock is deleted only by its owner.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+@script_twin(RELEASE_LOCK_SCRIPT)
+def _release_lock(kv: KV, keys: List[str], args: List) -> int:
+    if kv.get(keys[0]) != args[0].encode("utf-8"):
+        return 0
+    return kv.delete(keys[0])
+
+
+class GameVersionConflict(Exception):
+    pass
+
+
+class GameLocked(Exception):
+    pass
+
+
+def _dump_str(buf: bytearray, s: str) -> None:
+    b = s.encode("utf-8")
+    buf += _COUNT.pack(len(b))
+    buf += b
+
+
+def _dump_cards(buf: bytearray, cards: Cards) -> None:
+    buf += _COUNT.pack(len(cards))
+    buf += bytes(card.id for card in cards)
+
+
+def _dump_ids(buf: bytearray, ids: List[int]) -> None:
+    buf += _COUNT.pack(len(ids))
+    for i in ids:
+        buf += _ID.pack(i)
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self._offset = 0
+
+    def unpack(self, s: struct.Struct) -> Tuple:
+        values = s.unpack_from(self._data, self._offset)
+        self._offset += s.size
+        return values
+
+    def read_count(self) -> int:
+        return self.unpack(_COUNT)[0]
+
+    def read_bytes(self) -> bytes:
+        count = self.read_count()
+        b = bytes(self._data[self._offset:self._offset + count])
+        self._offset += count
+        return b
+
+    def read_str(self) -> str:
+        return self.read_bytes().decode("utf-8")
+
+    def read_cards(self) -> Cards:
+        return [Card.from_id(i) for i in self.read_bytes()]
+
+    def read_ids(self) -> List[int]:
+        return [self.unpack(_ID)[0] for _ in range(self.read_count())]
+
+
+def dumps_game(game: Game, old_players: List[UserId] = ()) -> bytes:
+    """ Fixed binary layout of the game, the wallets are not stored. """
+    buf = bytearray(_GAME.pack(
+        FORMAT_VERSION,
+        game.pot,
+        game.max_round_rate,
+        game.state.value,
+        game.current_player_index,
+        game.trading_end_user_id,
+        game.last_turn_time.timestamp(),
+    ))
+    _dump_str(buf, game.id)
+    _dump_cards(buf, game.cards_table)
+    _dump_cards(buf, game.remain_cards)
+    _dump_ids(buf, list(game.ready_users))
+    _dump_ids(buf, list(old_players))
+
+    buf += _COUNT.pack(len(game.players))
+    for player in game.players:
+        buf += _PLAYER.pack(
+            player.user_id,
+            player.state.value,
+            player.round_rate,
+            # Message ids start from 1.
+            int(player.ready_message_id or 0),
+        )
+        _dump_str(buf, player.mention_markdown)
+        _dump_cards(buf, player.cards)
+
+    return bytes(buf)
+
+
+def loads_game(
+    data: bytes,
+    new_wallet: Callable[[UserId], Wallet],
+) -> Tuple[Game, List[UserId]]:
+    """ The game and the ids of the players of the previous game. """
+    r = _Reader(data)
+    (
+        format_version,
+        pot,
+        max_round_rate,
+        state,
+        current_player_index,
+        trading_end_user_id,
+        last_turn_time,
+    ) = r.unpack(_GAME)
+    if format_version != FORMAT_VERSION:
+        raise ValueError(f"unknown game format {format_version}")
+
+    # Not Game(), it shuffles a new deck.
+    game = Game.__new__(Game)
+    game.pot = pot
+    game.max_round_rate = max_round_rate
+    game.state = GameState(state)
+    game.current_player_index = current_player_index
+    game.trading_end_user_id = trading_end_user_id
+    game.last_turn_time = datetime.datetime.fromtimestamp(last_turn_time)
+    game.id = r.read_str()
+    game.cards_table = r.read_cards()
+    game.remain_cards = r.read_cards()
+    game.ready_users = set(r.read_ids())
+    old_players = r.read_ids()
+
+    game.players = []
+    for _ in range(r.read_count()):
+        (user_id, state, round_rate, ready_message_id) = r.unpack(_PLAYER)
+        player = Player(
+            user_id=user_id,
+            mention_markdown=r.read_str(),
+            wallet=new_wallet(user_id),
+            ready_message_id=ready_message_id or "",
+        )
+        player.state = PlayerState(state)
+        player.round_rate = round_rate
+        player.cards = r.read_cards()
+        game.players.append(player)
+
+    return (game, old_players)
+
+
+class GameStore:
+    """ Games of the chats in Redis.
+
+        The game is loaded to the chat data before the handlers of an
+        update and stored after them. The chat is locked from the load
+        until the release, so another process can not change the game
+        while the handlers send messages and move money. A store still
+        fails if the lock expired and another process stored the game.
+    """
+
+    def __init__(
+        self,
+        kv: KV,
+        ttl: int = GAME_TTL,
+        lock_ttl: int = LOCK_TTL,
+        lock_wait: float = LOCK_WAIT,
+    ):
+        self._kv = kv
+        self._ttl = ttl
+        self._lock_ttl = lock_ttl
+        self._lock_wait = lock_wait
+        self._store_script = kv.register_script(STORE_GAME_SCRIPT)
+        self._release_script = kv.register_script(RELEASE_LOCK_SCRIPT)
+
+    @staticmethod
+    def _key(chat_id: ChatId) -> str:
+        return "pokerbot:chat:" + str(chat_id) + ":game"
+
+    @staticmethod
+    def _lock_key(chat_id: ChatId) -> str:
+        return "pokerbot:chat:" + str(chat_id) + ":lock"
+
+    def lock(self, chat_id: ChatId, chat_data: Dict) -> None:
+        """ Waits for the lock of the chat, raises GameLocked after
+            lock_wait seconds.
+        """
+        token = secrets.token_hex(16)
+        deadline = time.monotonic() + self._lock_wait
+        while not self._kv.set(
+            self._lock_key(chat_id),
+            token,
+            nx=True,
+            ex=self._lock_ttl,
+        ):
+            if time.monotonic() >= deadline:
+                raise GameLocked(
+                    f"game of chat {chat_id} is locked by another process",
+                )
+            time.sleep(LOCK_RETRY_DELAY)
+        chat_data[KEY_GAME_LOCK] = token
+
+    def release(self, chat_id: ChatId, chat_data: Dict) -> None:
+        token = chat_data.pop(KEY_GAME_LOCK, None)
+        if token is not None:
+            self._release_script(
+                keys=[self._lock_key(chat_id)],
+                args=[token],
+            )
+
+    def _new_wallet(self, user_id: UserId) -> Wallet:
+        return WalletManagerModel(user_id, self._kv, create=False)
+
+    def load(self, chat_id: ChatId, chat_data: Dict) -> None:
+        (version, data) = self._kv.hmget(
+            self._key(chat_id), "version", "data",
+        )
+        if data is None:
+            chat_data[KEY_GAME_VERSION] = 0
+            return
+
+        (game, old_players) = loads_game(data, self._new_wallet)
+        chat_data[KEY_CHAT_DATA_GAME] = game
+        chat_data[KEY_OLD_PLAYERS] = old_players
+        chat_data[KEY_GAME_VERSION] = int(version)
+        chat_data[KEY_GAME_DATA] = data
+
+    def store(self, chat_id: ChatId, chat_data: Dict) -> None:
+        game = chat_data.get(KEY_CHAT_DATA_GAME)
+        if game is None:
+            return
+
+        data = dumps_game(game, chat_data.get(KEY_OLD_PLAYERS, []))
+        if data == chat_data.get(KEY_GAME_DATA):
+            return
+
+        version = self._store_script(
+            keys=[self._key(chat_id)],
+            args=[chat_data.get(KEY_GAME_VERSION, 0), data, self._ttl],
+        )
+        if version is None:
+            chat_data.pop(KEY_GAME_DATA, None)
+            raise GameVersionConflict(
+                f"game of chat {chat_id} was changed by another process",
+            )
+
+        chat_data[KEY_GAME_VERSION] = int(version)
+        chat_data[KEY_GAME_DATA] = data
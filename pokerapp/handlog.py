@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+
+import argparse
+import collections
+import datetime
+import enum
+import os
+import struct
+import threading
+import uuid
+from typing import (
+    BinaryIO,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Tuple,
+)
+
+from pokerapp.cards import Card, Cards
+from pokerapp.entities import (
+    ChatId,
+    Game,
+    GameState,
+    Money,
+    Player,
+    PlayerState,
+    Score,
+    UserId,
+)
+from pokerapp.winnerdetermination import LookupEvaluator
+
+FSYNC_INTERVAL = 1.0
+READ_SIZE = 1024 * 1024
+# The ids of the games of the recent events, the events of a hand are
+# close and parsing a uuid costs more than the rest of the event.
+GAME_IDS_CACHE = 4096
+# Seconds of the log after which a hand without its end is dropped,
+# the bot stopped or crashed in the middle of it.
+OPEN_HAND_MAX_AGE = 24 * 60 * 60
+
+# Every record is the length of the rest, then the event: type,
+# game id, unix time, user id, amount and the count of the cards with
+# their ids. The user id of HAND_START is the chat id.
+_LENGTH = struct.Struct(">I")
+_EVENT = struct.Struct(">B16sdqqB")
+
+
+class EventType(enum.IntEnum):
+    HAND_START = 1
+    DEAL = 2
+    BLIND = 3
+    CHECK = 4
+    CALL = 5
+    BET = 6
+    RAISE = 7
+    ALL_IN = 8
+    FOLD = 9
+    BOARD = 10
+    WIN = 11
+    HAND_END = 12
+
+
+class Event(NamedTuple):
+    type: EventType
+    game_id: str
+    time: float
+    user_id: UserId = 0
+    amount: Money = 0
+    cards: Cards = ()
+
+
+def pack_event(event: Event) -> bytes:
+    body = _EVENT.pack(
+        event.type,
+        uuid.UUID(event.game_id).bytes,
+        event.time,
+        event.user_id,
+        event.amount,
+        len(event.cards),
+    ) + bytes(card.id for card in event.cards)
+    return _LENGTH.pack(len(body)) + body
+
+
+_EVENT_TYPES = {t.value: t for t in EventType}
+
+
+def _unpack_event(
+    data: bytes,
+    offset: int,
+    game_ids: Dict[bytes, str],
+) -> Event:
+    (event_type, raw_id, t, user_id, amount, count) = \
+        _EVENT.unpack_from(data, offset)
+    offset += _EVENT.size
+
+    game_id = game_ids.get(raw_id)
+    if game_id is None:
+        if len(game_ids) >= GAME_IDS_CACHE:
+            game_ids.clear()
+        game_id = game_ids[raw_id] = str(uuid.UUID(bytes=raw_id))
+
+    return Event(
+        type=_EVENT_TYPES[event_type],
+        game_id=game_id,
+        time=t,
+        user_id=user_id,
+        amount=amount,
+        cards=tuple(Card.from_id(i) for i in data[offset:offset + count]),
+    )
+
+
+class HandLog:
+    """ Events of the hands in an append-only file of the shard.
+
+        append only puts the event in a queue, so logging costs the
+        turn almost nothing. A writer thread writes the queued events
+        and syncs the file once per interval.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = FSYNC_INTERVAL):
+        self._path = path
+        self._interval = fsync_interval
+        self._events: Deque[Event] = collections.deque()
+        self._file: BinaryIO = open(path, "ab")
+        # A torn record of a crash is cut, or the next ones would be
+        # read as its rest.
+        self._file.truncate(self._complete_size(path))
+        self._write_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="hand-log",
+            daemon=True,
+        )
+
+    @staticmethod
+    def _complete_size(path: str) -> int:
+        end = 0
+        with open(path, "rb") as f:
+            for (_, _, end) in _records(f):
+                pass
+        return end
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def append(self, event: Event) -> None:
+        self._events.append(event)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self.flush()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            records = []
+            while self._events:
+                records.append(pack_event(self._events.popleft()))
+            if not records:
+                return
+            self._file.write(b"".join(records))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+        self._file.close()
+
+
+def _records(f: BinaryIO) -> Iterator[Tuple[bytes, int, int]]:
+    """ The buffer with every complete record, the offset of its event
+        in the buffer and the offset of its end in the file.
+    """
+    data = b""
+    start = 0
+    while True:
+        block = f.read(READ_SIZE)
+        if not block:
+            return
+        data += block
+
+        offset = 0
+        while len(data) - offset >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(data, offset)
+            end = offset + _LENGTH.size + length
+            if end > len(data):
+                break
+            yield (data, offset + _LENGTH.size, start + end)
+            offset = end
+        start += offset
+        data = data[offset:]
+
+
+def read_events(path: str) -> Iterator[Event]:
+    """ Events of the file, a torn record at the end is skipped. """
+    game_ids: Dict[bytes, str] = {}
+    with open(path, "rb") as f:
+        for (data, offset, _) in _records(f):
+            yield _unpack_event(data, offset, game_ids)
+
+
+class ReplayedHand(NamedTuple):
+    chat_id: ChatId
+    game: Game
+    events: List[Event]
+    winnings: Dict[UserId, Money]
+
+
+_BOARD_STATES = {
+    3: GameState.ROUND_FLOP,
+    4: GameState.ROUND_TURN,
+    5: GameState.ROUND_RIVER,
+}
+
+
+class _HandReplay:
+    def __init__(self, start: Event):
+        self.chat_id = start.user_id
+        self.start_time = start.time
+        self.events = [start]
+        self.winnings: Dict[UserId, Money] = {}
+        self.players: Dict[UserId, Player] = {}
+
+        # Not Game(), it shuffles a new deck.
+        game = self.game = Game.__new__(Game)
+        game.id = start.game_id
+        game.pot = 0
+        game.max_round_rate = 0
+        game.state = GameState.ROUND_PRE_FLOP
+        game.players = []
+        game.cards_table = []
+        game.current_player_index = 0
+        game.remain_cards = []
+        game.trading_end_user_id = 0
+        game.ready_users = set()
+        game.last_turn_time = datetime.datetime.fromtimestamp(start.time)
+
+    def _to_pot(self) -> None:
+        game = self.game
+        for p in game.players:
+            game.pot += p.round_rate
+            p.round_rate = 0
+        game.max_round_rate = 0
+
+    def apply(self, event: Event) -> None:
+        self.events.append(event)
+        game = self.game
+
+        if event.type == EventType.DEAL:
+            player = Player(
+                user_id=event.user_id,
+                mention_markdown="",
+                wallet=None,
+                ready_message_id="",
+            )
+            player.cards = list(event.cards)
+            game.players.append(player)
+            self.players[event.user_id] = player
+        elif event.type == EventType.BOARD:
+            self._to_pot()
+            game.cards_table += event.cards
+            game.state = _BOARD_STATES[len(game.cards_table)]
+        elif event.type == EventType.WIN:
+            self.winnings[event.user_id] = \
+                self.winnings.get(event.user_id, 0) + event.amount
+        elif event.type == EventType.HAND_END:
+            self._to_pot()
+            game.pot = event.amount
+            game.state = GameState.FINISHED
+            game.last_turn_time = datetime.datetime.fromtimestamp(event.time)
+        elif event.user_id in self.players:
+            player = self.players[event.user_id]
+            player.round_rate += event.amount
+            game.max_round_rate = max(game.max_round_rate, player.round_rate)
+            if event.type == EventType.ALL_IN:
+                player.state = PlayerState.ALL_IN
+            elif event.type == EventType.FOLD:
+                player.state = PlayerState.FOLD
+
+    def result(self) -> ReplayedHand:
+        return ReplayedHand(
+            chat_id=self.chat_id,
+            game=self.game,
+            events=self.events,
+            winnings=self.winnings,
+        )
+
+
+def replay_hands(
+    events: Iterable[Event],
+    max_age: float = OPEN_HAND_MAX_AGE,
+) -> Iterator[ReplayedHand]:
+    """ Finished hands in the order they end. Events of a hand which
+        started before the log are skipped.
+
+        A hand which does not end is dropped when its chat starts
+        another one or when it is older than max_age seconds.
+    """
+    # Hands by the game id in the order they start.
+    hands: collections.OrderedDict[str, _HandReplay] = \
+        collections.OrderedDict()
+    chat_hands: Dict[ChatId, str] = {}
+    for event in events:
+        if event.type == EventType.HAND_START:
+            hand = _HandReplay(event)
+            game_id = chat_hands.pop(hand.chat_id, None)
+            if game_id is not None:
+                hands.pop(game_id, None)
+            while hands:
+                (game_id, first) = next(iter(hands.items()))
+                if first.start_time >= event.time - max_age:
+                    break
+                del hands[game_id]
+                if chat_hands.get(first.chat_id) == game_id:
+                    del chat_hands[first.chat_id]
+            hands[event.game_id] = hand
+            chat_hands[hand.chat_id] = event.game_id
+            continue
+
+        hand = hands.get(event.game_id)
+        if hand is None:
+            continue
+        hand.apply(event)
+        if event.type == EventType.HAND_END:
+            del hands[event.game_id]
+            del chat_hands[hand.chat_id]
+            yield hand.result()
+
+
+def read_hands(paths: Iterable[str]) -> Iterator[ReplayedHand]:
+    for path in paths:
+        yield from replay_hands(read_events(path))
+
+
+def showdown_scores(hand: ReplayedHand) -> Dict[UserId, Score]:
+    """ Scores of the players who did not fold, by the whole board. """
+    game = hand.game
+    if len(game.cards_table) < 5:
+        return {}
+
+    evaluator = LookupEvaluator.instance()
+    board = [card.id for card in game.cards_table]
+    return {
+        p.user_id: evaluator.evaluate_ids(board + [c.id for c in p.cards])
+        for p in game.players
+        if p.state != PlayerState.FOLD
+    }
+
+
+def _describe(hand: ReplayedHand, scores: Dict[UserId, Score]) -> str:
+    game = hand.game
+    winners = ", ".join(
+        f"{user_id} +{money}$" for (user_id, money) in hand.winnings.items()
+    )
+    text = (
+        f"{game.id} chat {hand.chat_id} " +
+        game.last_turn_time.strftime("%Y-%m-%d %H:%M:%S") +
+        f" players {len(game.players)}" +
+        f" board {' '.join(game.cards_table) or '-'}" +
+        f" pot {game.pot}$ won {winners or '-'}"
+    )
+    if scores:
+        text += " scores " + ", ".join(
+            f"{user_id} {score}" for (user_id, score) in scores.items()
+        )
+    return text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m pokerapp.handlog",
+        description="Replays the hands of hand logs.",
+    )
+    parser.add_argument("logs", nargs="+")
+    parser.add_argument(
+        "--count",
+        action="store_true",
+        help="print only the count of the hands",
+    )
+    parser.add_argument(
+        "--scores",
+        action="store_true",
+        help="evaluate the hands of the players at showdown",
+    )
+    args = parser.parse_args()
+
+    count = 0
+    for hand in read_hands(args.logs):
+        count += 1
+        scores = showdown_scores(hand) if args.scores else {}
+        if not args.count:
+            print(_describe(hand, scores))
+    print(count, "hands")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+import argparse
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+import numpy as np
+
+from pokerapp.batchevaluator import score_many
+from pokerapp.entities import ChatId, Money, PlayerState, UserId
+from pokerapp.handlog import EventType, ReplayedHand, read_hands
+
+SHOWDOWN_BATCH = 4096
+TOP_POTS = 10
+
+# Actions which put money in the pot by the will of the player.
+_VOLUNTARY = (
+    EventType.CALL,
+    EventType.BET,
+    EventType.RAISE,
+    EventType.ALL_IN,
+)
+_AGGRESSIVE = (EventType.BET, EventType.RAISE, EventType.ALL_IN)
+_MONEY = _VOLUNTARY + (EventType.BLIND,)
+
+
+class PlayerStats:
+    def __init__(self):
+        self.hands = 0
+        # Hands where the player put money in before the flop.
+        self.vpip_hands = 0
+        self.aggressive_actions = 0
+        self.calls = 0
+        self.won_hands = 0
+        self.won_money = 0
+        self.put_money = 0
+        self.showdowns = 0
+        self.showdown_wins = 0
+
+    @property
+    def vpip(self) -> float:
+        return self.vpip_hands / self.hands if self.hands else 0.0
+
+    @property
+    def aggression(self) -> float:
+        """ Bets, raises and all-ins per call. """
+        if self.calls == 0:
+            return float(self.aggressive_actions)
+        return self.aggressive_actions / self.calls
+
+    @property
+    def win_rate(self) -> float:
+        return self.won_hands / self.hands if self.hands else 0.0
+
+    @property
+    def net(self) -> Money:
+        return self.won_money - self.put_money
+
+    def merge(self, other: "PlayerStats") -> None:
+        for (name, value) in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+
+class ChatStats:
+    def __init__(self):
+        self.hands = 0
+        self.volume = 0
+
+    def merge(self, other: "ChatStats") -> None:
+        self.hands += other.hands
+        self.volume += other.volume
+
+
+class Pot(NamedTuple):
+    amount: Money
+    game_id: str
+    chat_id: ChatId
+
+
+class HandStats:
+    """ Totals of a stream of hands, the memory does not grow with it.
+
+        Only the stats of the players and the chats, the biggest pots
+        and the pending showdowns are kept. Showdowns are re-scored in
+        batches by score_many.
+    """
+
+    def __init__(
+        self,
+        top_pots: int = TOP_POTS,
+        showdown_batch: int = SHOWDOWN_BATCH,
+    ):
+        self.hands = 0
+        self.players: Dict[UserId, PlayerStats] = {}
+        self.chats: Dict[ChatId, ChatStats] = {}
+        # Hands where the best scored hand got no money.
+        self.mismatches = 0
+        self._top_pots = top_pots
+        self._pots: List[Pot] = []
+        self._showdown_batch = showdown_batch
+        # The rows of the pending showdowns and their players by the
+        # count of their rows.
+        self._rows: List[List[int]] = []
+        self._showdowns: List[Tuple[List[UserId], Set[UserId]]] = []
+
+    def _player(self, user_id: UserId) -> PlayerStats:
+        stats = self.players.get(user_id)
+        if stats is None:
+            stats = self.players[user_id] = PlayerStats()
+        return stats
+
+    def _push_pot(self, pot: Pot) -> None:
+        if len(self._pots) < self._top_pots:
+            heapq.heappush(self._pots, pot)
+        elif self._pots and pot > self._pots[0]:
+            heapq.heapreplace(self._pots, pot)
+
+    def add(self, hand: ReplayedHand) -> None:
+        game = hand.game
+        self.hands += 1
+
+        chat = self.chats.get(hand.chat_id)
+        if chat is None:
+            chat = self.chats[hand.chat_id] = ChatStats()
+        chat.hands += 1
+        chat.volume += game.pot
+
+        self._push_pot(Pot(game.pot, game.id, hand.chat_id))
+
+        vpip: Set[UserId] = set()
+        preflop = True
+        for event in hand.events:
+            if event.type == EventType.BOARD:
+                preflop = False
+            elif event.type == EventType.DEAL:
+                self._player(event.user_id).hands += 1
+            elif event.type in _MONEY and event.user_id in self.players:
+                stats = self.players[event.user_id]
+                stats.put_money += event.amount
+                if event.type == EventType.CALL:
+                    stats.calls += 1
+                elif event.type in _AGGRESSIVE:
+                    stats.aggressive_actions += 1
+                if preflop and event.type in _VOLUNTARY:
+                    vpip.add(event.user_id)
+
+        for user_id in vpip:
+            self.players[user_id].vpip_hands += 1
+        for (user_id, money) in hand.winnings.items():
+            stats = self._player(user_id)
+            stats.won_hands += 1
+            stats.won_money += money
+
+        self._add_showdown(hand)
+
+    def _add_showdown(self, hand: ReplayedHand) -> None:
+        game = hand.game
+        players = [p for p in game.players if p.state != PlayerState.FOLD]
+        if len(players) < 2 or len(game.cards_table) < 5:
+            return
+
+        board = [card.id for card in game.cards_table]
+        for player in players:
+            self._rows.append(board + [card.id for card in player.cards])
+        self._showdowns.append(
+            ([p.user_id for p in players], set(hand.winnings)),
+        )
+        if len(self._rows) >= self._showdown_batch:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Scores the pending showdowns. """
+        if not self._rows:
+            return
+
+        scores = score_many(np.array(self._rows)).tolist()
+        offset = 0
+        for (user_ids, winners) in self._showdowns:
+            hand_scores = scores[offset:offset + len(user_ids)]
+            offset += len(user_ids)
+            best = max(hand_scores)
+            for (user_id, score) in zip(user_ids, hand_scores):
+                stats = self._player(user_id)
+                stats.showdowns += 1
+                if score == best:
+                    stats.showdown_wins += 1
+                    # The best hand wins at least the main pot.
+                    if user_id not in winners:
+                        self.mismatches += 1
+
+        self._rows = []
+        self._showdowns = []
+
+    def biggest_pots(self) -> List[Pot]:
+        return sorted(self._pots, reverse=True)
+
+    def merge(self, other: "HandStats") -> None:
+        self.flush()
+        other.flush()
+        self.hands += other.hands
+        self.mismatches += other.mismatches
+        for (user_id, stats) in other.players.items():
+            self._player(user_id).merge(stats)
+        for (chat_id, stats) in other.chats.items():
+            chat = self.chats.get(chat_id)
+            if chat is None:
+                chat = self.chats[chat_id] = ChatStats()
+            chat.merge(stats)
+        for pot in other._pots:
+            self._push_pot(pot)
+
+
+def _read_stats(paths: List[str], top_pots: int) -> HandStats:
+    stats = HandStats(top_pots=top_pots)
+    for hand in read_hands(paths):
+        stats.add(hand)
+    stats.flush()
+    return stats
+
+
+def collect(
+    paths: Iterable[str],
+    processes: int = 0,
+    top_pots: int = TOP_POTS,
+) -> HandStats:
+    """ Stats of the hands of the logs. With processes the files are
+        read in parallel, a hand must not span two files then.
+    """
+    paths = list(paths)
+    if processes <= 1 or len(paths) <= 1:
+        return _read_stats(paths, top_pots)
+
+    stats = HandStats(top_pots=top_pots)
+    with ProcessPoolExecutor(min(processes, len(paths))) as executor:
+        for file_stats in executor.map(
+            _read_stats,
+            [[path] for path in paths],
+            [top_pots] * len(paths),
+        ):
+            stats.merge(file_stats)
+    return stats
+
+
+def _report(stats: HandStats, players_limit: int) -> str:
+    lines = [f"{stats.hands} hands"]
+    if stats.mismatches:
+        lines.append(
+            f"{stats.mismatches} showdowns paid the best hand nothing",
+        )
+
+    lines += ["", "player       hands   vpip   aggr    win   showdown     net"]
+    players = sorted(
+        stats.players.items(),
+        key=lambda item: item[1].hands,
+        reverse=True,
+    )
+    for (user_id, p) in players[:players_limit]:
+        lines.append(
+            f"{user_id:<12} {p.hands:>5} {p.vpip:>6.1%} {p.aggression:>6.2f}"
+            f" {p.win_rate:>6.1%} {p.showdown_wins:>5}/{p.showdowns:<5}"
+            f" {p.net:>7}$"
+        )
+
+    lines += ["", "chat             hands      volume"]
+    chats = sorted(
+        stats.chats.items(),
+        key=lambda item: item[1].volume,
+        reverse=True,
+    )
+    for (chat_id, c) in chats:
+        lines.append(f"{chat_id:<15} {c.hands:>6} {c.volume:>10}$")
+
+    lines += ["", "biggest pots"]
+    for pot in stats.biggest_pots():
+        lines.append(f"{pot.amount:>10}$ {pot.game_id} chat {pot.chat_id}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python3 -m pokerapp.handstats",
+        description="Stats of the players and the chats in hand logs.",
+    )
+    parser.add_argument("logs", nargs="+")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="read the files in parallel processes",
+    )
+    parser.add_argument(
+        "--players",
+        type=int,
+        default=50,
+        help="count of the players with the most hands to print",
+    )
+    parser.add_argument(
+        "--pots",
+        type=int,
+        default=TOP_POTS,
+        help="count of the biggest pots to print",
+    )
+    args = parser.parse_args()
+
+    stats = collect(args.logs, processes=args.processes, top_pots=args.pots)
+    print(_report(stats, args.players))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+
+import hashlib
+import os
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+import redis
+
+from pokerapp.config import Config
+
+BACKEND_REDIS = "redis"
+BACKEND_MEMORY = "memory"
+
+Value = Union[bytes, List[bytes], Dict[bytes, bytes]]
+Script = Callable[["MemoryKV", List[str], List], object]
+
+# Python twins of the Lua scripts by the sha1 of the script, like
+# EVALSHA of Redis. The memory backend runs them instead of Lua.
+_SCRIPTS: Dict[str, Script] = {}
+
+
+def _sha(script: str) -> str:
+    return hashlib.sha1(script.encode("utf-8")).hexdigest()
+
+
+def script_twin(script: str) -> Callable[[Script], Script]:
+    """ Registers the function as the twin of the Lua script. """
+    def register(fn: Script) -> Script:
+        _SCRIPTS[_sha(script)] = fn
+        return fn
+    return register
+
+
+def _encode(value) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return str(value).encode("utf-8")
+
+
+class KV:
+    """ The part of the redis client which is used by the models. """
+
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    def set(
+        self,
+        key: str,
+        value,
+        nx: bool = False,
+        ex: Optional[int] = None,
+    ) -> bool:
+        pass
+
+    def incrby(self, key: str, amount: int) -> int:
+        pass
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        pass
+
+    def hmget(self, key: str, *fields: str) -> List[Optional[bytes]]:
+        pass
+
+    def hset(self, key: str, mapping: Dict) -> int:
+        pass
+
+    def expire(self, key: str, seconds: int) -> bool:
+        pass
+
+    def delete(self, *keys: str) -> int:
+        pass
+
+    def rpush(self, key: str, *values) -> int:
+        pass
+
+    def rpop(self, key: str) -> Optional[bytes]:
+        pass
+
+    def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        pass
+
+    def pipeline(self, transaction: bool = True):
+        pass
+
+    def register_script(self, script: str) -> Callable:
+        pass
+
+
+class AppendOnlyFile:
+    """ Commands which changed the data, in the RESP format of Redis.
+
+        Commands of a script or a transaction are written at once, a
+        torn record at the end of the file is dropped on load.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self._path = path
+        self._fsync = fsync
+        self._file: Optional[BinaryIO] = None
+
+    @staticmethod
+    def _dump(command: Tuple) -> bytes:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            arg = _encode(arg)
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def load(self) -> List[Tuple[bytes, ...]]:
+        """ Reads the commands and opens the file to append. """
+        commands = []
+        end = 0
+        if os.path.exists(self._path):
+            with open(self._path, "rb") as f:
+                data = f.read()
+            end = self._parse(data, commands)
+
+        self._file = open(self._path, "ab")
+        self._file.truncate(end)
+        return commands
+
+    @staticmethod
+    def _parse(data: bytes, commands: List[Tuple[bytes, ...]]) -> int:
+        """ Offset after the last complete record. """
+        offset = 0
+        # The offset and the count of the commands before MULTI.
+        multi: Optional[Tuple[int, int]] = None
+        while offset < len(data):
+            try:
+                (command, offset_next) = AppendOnlyFile._parse_one(
+                    data, offset,
+                )
+            except (IndexError, ValueError):
+                break
+            if command[0] == b"MULTI":
+                multi = (offset, len(commands))
+            elif command[0] == b"EXEC":
+                multi = None
+            commands.append(command)
+            offset = offset_next
+
+        if multi is not None:
+            # The transaction is not written to the end.
+            (offset, count) = multi
+            del commands[count:]
+        return offset
+
+    @staticmethod
+    def _parse_one(data: bytes, offset: int) -> Tuple[Tuple, int]:
+        def line() -> bytes:
+            nonlocal offset
+            end = data.index(b"\r\n", offset)
+            (value, offset) = (data[offset:end], end + 2)
+            return value
+
+        header = line()
+        if header[:1] != b"*":
+            raise ValueError("bad record")
+        args = []
+        for _ in range(int(header[1:])):
+            size = line()
+            if size[:1] != b"$":
+                raise ValueError("bad record")
+            end = offset + int(size[1:])
+            if data[end:end + 2] != b"\r\n":
+                raise ValueError("torn record")
+            args.append(data[offset:end])
+            offset = end + 2
+        return (tuple(args), offset)
+
+    def rewrite(self, commands: List[Tuple]) -> None:
+        """ Replaces the file with the commands, atomically. """
+        tmp_path = self._path + ".rewrite"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(self._dump(c) for c in commands))
+            f.flush()
+            os.fsync(f.fileno())
+        self.close()
+        os.replace(tmp_path, self._path)
+        self._file = open(self._path, "ab")
+
+    def write(self, commands: List[Tuple]) -> None:
+        self._file.write(b"".join(self._dump(c) for c in commands))
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class MemoryKV(KV):
+    """ Keeps the data in a dict of the process.
+
+        Calls are atomic under one lock, the scripts run as their
+        Python twins. With an append-only file the data survives a
+        restart, the file is replayed when the store is created and
+        rewritten with only the commands of the current data, so it
+        grows only until the next start.
+    """
+
+    def __init__(self, aof_path: str = "", fsync: bool = False):
+        self._data: Dict[str, Value] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        # Commands of the current script or transaction.
+        self._batch: Optional[List[Tuple]] = None
+        self._aof: Optional[AppendOnlyFile] = None
+
+        if aof_path != "":
+            aof = AppendOnlyFile(aof_path, fsync=fsync)
+            commands = aof.load()
+            for command in commands:
+                self._replay(command)
+            snapshot = self._snapshot()
+            if len(snapshot) < len(commands):
+                aof.rewrite(snapshot)
+            self._aof = aof
+
+    def close(self) -> None:
+        with self._lock:
+            if self._aof is not None:
+                self._aof.close()
+                self._aof = None
+
+    def _log(self, *command) -> None:
+        if self._aof is None:
+            return
+        if self._batch is not None:
+            self._batch.append(command)
+            return
+        self._aof.write([command])
+
+    def _run_batch(self, fn: Callable[[], object]) -> object:
+        """ Runs the calls of fn as one record of the file. """
+        with self._lock:
+            if self._batch is not None:
+                return fn()
+            self._batch = []
+            try:
+                return fn()
+            finally:
+                (batch, self._batch) = (self._batch, None)
+                if batch and self._aof is not None:
+                    if len(batch) > 1:
+                        batch = [("MULTI",)] + batch + [("EXEC",)]
+                    self._aof.write(batch)
+
+    def _snapshot(self) -> List[Tuple]:
+        """ Commands which make the current data. """
+        commands = []
+        for key in list(self._data):
+            value = self._get(key)
+            if value is None:
+                continue
+            if isinstance(value, dict):
+                command = ["HSET", key]
+                for (field, v) in value.items():
+                    command += [field, v]
+                commands.append(tuple(command))
+            elif isinstance(value, list):
+                commands.append(("RPUSH", key, *value))
+            else:
+                commands.append(("SET", key, value))
+            if key in self._expires:
+                commands.append(
+                    ("PEXPIREAT", key, int(self._expires[key] * 1000)),
+                )
+        return commands
+
+    def _replay(self, command: Tuple[bytes, ...]) -> None:
+        (name, args) = (command[0].decode("utf-8"), command[1:])
+        key = args[0].decode("utf-8") if args else ""
+        if name in ("MULTI", "EXEC"):
+            return
+        if name == "SET":
+            self._data[key] = args[1]
+            self._expires.pop(key, None)
+        elif name == "INCRBY":
+            self.incrby(key, int(args[1]))
+        elif name == "HSET":
+            self.hset(key, mapping=dict(zip(args[1::2], args[2::2])))
+        elif name == "PEXPIREAT":
+            self._expires[key] = int(args[1]) / 1000
+        elif name == "DEL":
+            self.delete(*[k.decode("utf-8") for k in args])
+        elif name == "RPUSH":
+            self.rpush(key, *args[1:])
+        elif name == "RPOP":
+            self.rpop(key)
+        else:
+            raise ValueError(f"unknown command in the file: {name}")
+
+    def _get(self, key: str) -> Optional[Value]:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            del self._expires[key]
+            del self._data[key]
+        return self._data.get(key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._get(key)
+
+    def set(
+        self,
+        key: str,
+        value,
+        nx: bool = False,
+        ex: Optional[int] = None,
+    ) -> bool:
+        with self._lock:
+            if nx and self._get(key) is not None:
+                return None
+
+            def run():
+                self._data[key] = _encode(value)
+                self._expires.pop(key, None)
+                self._log("SET", key, self._data[key])
+                if ex is not None:
+                    self.expire(key, ex)
+                return True
+            return self._run_batch(run)
+
+    def incrby(self, key: str, amount: int) -> int:
+        with self._lock:
+            value = int(self._get(key) or 0) + amount
+            self._data[key] = _encode(value)
+            self._log("INCRBY", key, amount)
+            return value
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self._get(k) for k in keys]
+
+    def hmget(self, key: str, *fields: str) -> List[Optional[bytes]]:
+        with self._lock:
+            h = self._get(key) or {}
+            return [h.get(_encode(f)) for f in fields]
+
+    def hset(self, key: str, mapping: Dict) -> int:
+        with self._lock:
+            h = self._get(key)
+            if h is None:
+                h = self._data[key] = {}
+            added = 0
+            command = ["HSET", key]
+            for (field, value) in mapping.items():
+                (field, value) = (_encode(field), _encode(value))
+                added += field not in h
+                h[field] = value
+                command += [field, value]
+            self._log(*command)
+            return added
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            if self._get(key) is None:
+                return False
+            deadline = time.time() + int(seconds)
+            self._expires[key] = deadline
+            self._log("PEXPIREAT", key, int(deadline * 1000))
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            count = 0
+            for key in keys:
+                count += self._get(key) is not None
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            if count > 0:
+                self._log("DEL", *keys)
+            return count
+
+    def rpush(self, key: str, *values) -> int:
+        with self._lock:
+            items = self._get(key)
+            if items is None:
+                items = self._data[key] = []
+            values = [_encode(v) for v in values]
+            items.extend(values)
+            self._log("RPUSH", key, *values)
+            return len(items)
+
+    def rpop(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            items = self._get(key)
+            if not items:
+                return None
+            value = items.pop()
+            if not items:
+                del self._data[key]
+                self._expires.pop(key, None)
+            self._log("RPOP", key)
+            return value
+
+    def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        with self._lock:
+            items = self._get(key) or []
+            # Negative indexes count from the end, the end is inclusive.
+            if start < 0:
+                start = max(0, len(items) + start)
+            end = len(items) + end + 1 if end < 0 else end + 1
+            return items[start:max(0, end)]
+
+    def pipeline(self, transaction: bool = True) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+
+    def register_script(self, script: str) -> Callable:
+        twin = _SCRIPTS[_sha(script)]
+
+        def call(keys=(), args=()):
+            return self._run_batch(lambda: twin(self, list(keys), list(args)))
+        return call
+
+
+class MemoryPipeline:
+    """ Queues the calls until execute, they run as one transaction. """
+
+    def __init__(self, kv: MemoryKV):
+        self._kv = kv
+        self._calls = []
+
+    def __getattr__(self, name: str) -> Callable:
+        method = getattr(self._kv, name)
+
+        def queue(*args, **kwargs):
+            self._calls.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> List:
+        (calls, self._calls) = (self._calls, [])
+        return self._kv._run_batch(lambda: [
+            method(*args, **kwargs) for (method, args, kwargs) in calls
+        ])
+
+
+def connect(cfg: Config) -> KV:
+    """ The store which is selected by the config. """
+    if cfg.KV_BACKEND == BACKEND_MEMORY:
+        return MemoryKV(aof_path=cfg.KV_AOF_PATH, fsync=cfg.KV_AOF_FSYNC)
+    if cfg.KV_BACKEND != BACKEND_REDIS:
+        raise ValueError(f"unknown kv backend {cfg.KV_BACKEND}")
+
+    return redis.Redis(
+        host=cfg.REDIS_HOST,
+        port=cfg.REDIS_PORT,
+        db=cfg.REDIS_DB,
+        password=cfg.REDIS_PASS if cfg.REDIS_PASS != "" else None
+    )
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Hashable, Tuple
+
+from telegram import Bot, Update
+from telegram.ext import Dispatcher
+
+Job = Tuple[Callable, tuple, Future]
+
+
+def update_chat_key(update: Update) -> int:
+    """ The chat of the update, updates of a chat must run in order. """
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return update.update_id
+
+
+class ChatMailbox:
+    """ Runs the jobs of each key one by one and in order, the jobs of
+        different keys run in parallel on a pool of workers.
+
+        A key is taken by one worker while it has jobs, nothing else is
+        locked. Submit blocks when max_pending jobs wait, so a slow
+        consumer holds up the producer instead of growing the queue.
+    """
+
+    def __init__(self, workers: int = 8, max_pending: int = 1024):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="chat-mailbox",
+        )
+        self._mailboxes: Dict[Hashable, Deque[Job]] = {}
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, key: Hashable, fn: Callable, *args) -> Future:
+        self._pending.acquire()
+        future = Future()
+        with self._lock:
+            mailbox = self._mailboxes.get(key)
+            if mailbox is not None:
+                mailbox.append((fn, args, future))
+                return future
+            self._mailboxes[key] = deque([(fn, args, future)])
+
+        self._executor.submit(self._drain, key)
+        return future
+
+    def _drain(self, key: Hashable) -> None:
+        mailbox = self._mailboxes[key]
+        while True:
+            with self._lock:
+                if not mailbox:
+                    del self._mailboxes[key]
+                    return
+                (fn, args, future) = mailbox.popleft()
+
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                logging.exception(e)
+                future.set_exception(e)
+            finally:
+                self._pending.release()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class MailboxDispatcher(Dispatcher):
+    """ Processes the updates of a chat in order and the updates of
+        different chats in parallel.
+
+        process_update returns a future which is resolved when all the
+        handlers of the update are done.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        mailbox: ChatMailbox,
+        workers: int = 4,
+    ):
+        super().__init__(
+            bot=bot,
+            update_queue=queue.Queue(),
+            workers=workers,
+        )
+        self._mailbox = mailbox
+
+    def process_update(self, update: object) -> Future:
+        if not isinstance(update, Update):
+            return self._mailbox.submit(
+                None, super().process_update, update,
+            )
+        return self._mailbox.submit(
+            update_chat_key(update), super().process_update, update,
+        )
+
+    def stop(self) -> None:
+        """ Waits until the submitted updates are processed. """
+        super().stop()
+        self._mailbox.shutdown()
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 
+import atexit
+import json
 import logging
+import secrets
+import signal
 import threading
-import time
-import redis
 
-from typing import Callable
-from telegram import Bot
+from concurrent.futures import Future
+from multiprocessing.queues import JoinableQueue
+from typing import Callable, List, Union
+from urllib.parse import urlsplit
+from telegram import Bot, Message, Update
 from telegram.utils.request import Request
 from telegram.ext import Updater
 from telegram.error import (
@@ -21,11 +26,23 @@ from telegram.error import (
     Unauthorized,
 )
 
+from pokerapp.asyncruntime import AsyncBotApi, AsyncRequest, AsyncRuntime
+from pokerapp.chatscheduler import ChatTask, ChatTaskScheduler, TokenBucket
 from pokerapp.config import Config
-from pokerapp.pokerbotcontrol import PokerBotCotroller
+from pokerapp.desk import DeskImageCache, DeskImageGenerator, ImageFormat
+from pokerapp import kvstore
+from pokerapp.fileids import FileIdStore
+from pokerapp.handlog import HandLog
+from pokerapp.mailbox import ChatMailbox, MailboxDispatcher
+from pokerapp.gamestore import GameStore
+from pokerapp.pokerbotcontrol import ALLOWED_UPDATES, PokerBotCotroller
 from pokerapp.pokerbotmodel import PokerBotModel
 from pokerapp.pokerbotview import PokerBotViewer
-from pokerapp.entities import ChatId
+from pokerapp.webhook import WebhookServer
+from pokerapp.entities import ChatId, MessageId
+
+# Count of the messages which deleteMessages takes at once.
+MAX_DELETE_MESSAGES = 100
 
 
 logging.basicConfig(
@@ -39,34 +56,155 @@ class PokerBot:
         self,
         token: str,
         cfg: Config,
+        shard: str = "",
+        global_bucket: TokenBucket = None,
     ):
         req = Request(con_pool_size=8)
-        bot = MessageDelayBot(token=token, request=req)
+        if cfg.ASYNC_RUNTIME:
+            runtime = AsyncRuntime()
+            runtime.start()
+            # Every Bot API call goes out on the runtime.
+            req = AsyncRequest(runtime=runtime)
+        bot = MessageDelayBot(
+            token=token,
+            request=req,
+            global_bucket=global_bucket,
+        )
         bot.run_tasks_manager()
 
+        # Updates of a chat run in order, chats run in parallel.
         self._updater = Updater(
-            bot=bot,
-            use_context=True,
+            dispatcher=MailboxDispatcher(
+                bot=bot,
+                mailbox=ChatMailbox(workers=cfg.CHAT_WORKERS),
+            ),
+            workers=None,
         )
 
-        kv = redis.Redis(
-            host=cfg.REDIS_HOST,
-            port=cfg.REDIS_PORT,
-            db=cfg.REDIS_DB,
-            password=cfg.REDIS_PASS if cfg.REDIS_PASS != "" else None
+        kv = kvstore.connect(cfg)
+
+        desk_cache = DeskImageCache(
+            generator=DeskImageGenerator(
+                card_size=(cfg.DESK_CARD_WIDTH, cfg.DESK_CARD_HEIGHT),
+                image_format=ImageFormat(cfg.DESK_IMAGE_FORMAT),
+                quality=cfg.DESK_IMAGE_QUALITY,
+            ),
+            max_bytes=cfg.DESK_CACHE_MB * 1024 * 1024,
         )
+        if cfg.DESK_CACHE_PREWARM:
+            threading.Thread(
+                target=desk_cache.prewarm_hole_cards,
+                daemon=True,
+            ).start()
 
-        self._view = PokerBotViewer(bot=bot)
+        self._view = PokerBotViewer(
+            bot=bot,
+            desk_cache=desk_cache,
+            file_ids=FileIdStore(kv=kv),
+        )
+        hand_log = None
+        if cfg.HAND_LOG_PATH != "":
+            # Every shard writes its own log.
+            path = cfg.HAND_LOG_PATH
+            if shard != "":
+                path += "." + shard
+            hand_log = HandLog(
+                path=path,
+                fsync_interval=cfg.HAND_LOG_FSYNC_INTERVAL,
+            )
+            hand_log.start()
+            atexit.register(hand_log.close)
         self._model = PokerBotModel(
             view=self._view,
             bot=bot,
             kv=kv,
             cfg=cfg,
+            hand_log=hand_log,
         )
-        self._controller = PokerBotCotroller(self._model, self._updater)
+        self._controller = PokerBotCotroller(
+            self._model,
+            self._updater,
+            game_store=GameStore(kv=kv),
+        )
+        self._cfg = cfg
 
     def run(self) -> None:
-        self._updater.start_polling()
+        if not self._cfg.WEBHOOK:
+            self._updater.start_polling(allowed_updates=ALLOWED_UPDATES)
+            return
+
+        run_webhook(self._updater, self._cfg, self._cfg.WEBHOOK_WORKERS)
+
+    def run_worker(self, updates: JoinableQueue) -> None:
+        """ Processes updates routed by the front process,
+            None stops the worker.
+        """
+        dispatcher = self._updater.dispatcher
+        while True:
+            data = updates.get()
+            if data is None:
+                updates.task_done()
+                return
+
+            try:
+                update = Update.de_json(json.loads(data), dispatcher.bot)
+                done = dispatcher.process_update(update)
+            except Exception as e:
+                logging.exception(e)
+                updates.task_done()
+                continue
+            # The front process waits for it to move chats.
+            done.add_done_callback(lambda _: updates.task_done())
+
+
+def run_webhook(updater: Updater, cfg: Config, workers: int) -> None:
+    """ Receives updates by webhook until SIGINT or SIGTERM.
+
+        Updater.idle is not used, the updater is not running and its
+        handler would exit the process without stopping anything.
+        Queued updates are processed before it returns.
+        Without a configured secret a random one is used, so only
+        Telegram can post updates.
+    """
+    secret_token = cfg.WEBHOOK_SECRET
+    if secret_token == "":
+        secret_token = secrets.token_urlsafe(32)
+    updater.bot.set_webhook(
+        url=cfg.WEBHOOK_URL,
+        allowed_updates=ALLOWED_UPDATES,
+        api_kwargs={"secret_token": secret_token},
+    )
+
+    server = WebhookServer(
+        dispatcher=updater.dispatcher,
+        bot=updater.bot,
+        listen=cfg.WEBHOOK_LISTEN,
+        port=cfg.WEBHOOK_PORT,
+        path=urlsplit(cfg.WEBHOOK_URL).path or "/",
+        secret_token=secret_token,
+        workers=workers,
+        queue_size=cfg.WEBHOOK_QUEUE_SIZE,
+    )
+    stopped = threading.Event()
+
+    def on_signal(signum, frame) -> None:
+        logging.info("received signal %s, stopping", signum)
+        stopped.set()
+
+    handlers = {
+        signum: signal.signal(signum, on_signal)
+        for signum in (signal.SIGINT, signal.SIGTERM)
+    }
+
+    server.start()
+    logging.info("webhook is listening on port %s", server.port)
+    try:
+        stopped.wait()
+    finally:
+        server.stop()
+        updater.dispatcher.stop()
+        for (signum, handler) in handlers.items():
+            signal.signal(signum, handler)
 
 
 class MessageDelayBot(Bot):
@@ -74,97 +212,119 @@ class MessageDelayBot(Bot):
         self,
         *args,
         tasks_delay=3,
+        tasks_workers=8,
+        global_bucket: TokenBucket = None,
         **kwargs,
     ):
         super(MessageDelayBot, self).__init__(*args, **kwargs)
 
-        self._chat_tasks_lock = threading.Lock()
-        self._tasks_delay = tasks_delay
-        self._chat_tasks = {}
-        self._stop_chat_tasks = threading.Event()
-        self._chat_tasks_thread = threading.Thread(
-            target=self._tasks_manager_loop,
-            args=(self._stop_chat_tasks, ),
+        self._api = None
+        runtime = None
+        if isinstance(self.request, AsyncRequest):
+            # Queued sends run as coroutines on the same connections.
+            runtime = self.request.runtime
+            self._api = AsyncBotApi(
+                base_url=self.base_url,
+                http=self.request.http,
+            )
+        self._scheduler = ChatTaskScheduler(
+            delay=tasks_delay,
+            workers=tasks_workers,
+            runtime=runtime,
+            global_bucket=global_bucket,
         )
         # TODO: Add @decorator to functions in view?
 
     def run_tasks_manager(self) -> None:
-        self._chat_tasks_thread.start()
-
-    def _process_chat_tasks(self) -> None:
-        now = time.time()
-
-        for (chat_id, time_tasks) in self._chat_tasks.items():
-            task_time = time_tasks.get("last_time", 0)
-            tasks = time_tasks.get("tasks", [])
-
-            if now - task_time < self._tasks_delay:
-                continue
-
-            if len(tasks) == 0:
-                continue
-
-            task_callable = tasks.pop()
-
-            try:
-                task_callable()
-            except (
-                TimedOut,
-                NetworkError,
-                RetryAfter
-            ):
-                tasks.insert(0, task_callable)
-            except (
-                BadRequest,
-                ChatMigrated,
-                Conflict,
-                InvalidToken,
-                TelegramError,
-                Unauthorized,
-            ) as e:
-                logging.error(e)
-            finally:
-                self._chat_tasks[chat_id]["last_time"] = now
-
-    def _tasks_manager_loop(self, stop_event: threading.Event) -> None:
-        while not stop_event.is_set():
-            self._chat_tasks_lock.acquire()
-            try:
-                self._process_chat_tasks()
-            finally:
-                self._chat_tasks_lock.release()
-            time.sleep(0.05)
+        self._scheduler.start()
 
     def __del__(self):
         try:
-            self._stop_chat_tasks.set()
-            self._chat_tasks_thread.join()
+            self._scheduler.stop()
         except Exception as e:
             logging.error(e)
 
-    def _add_task(self, chat_id: ChatId, task: Callable) -> None:
-        self._chat_tasks_lock.acquire()
-        try:
-            if chat_id not in self._chat_tasks:
-                self._chat_tasks[chat_id] = {"last_time": 0, "tasks": []}
-            self._chat_tasks[chat_id]["tasks"].insert(0, task)
-        finally:
-            self._chat_tasks_lock.release()
-
-    def send_photo(self, *args, **kwargs) -> None:
-        self._add_task(
+    def _add_task(
+        self,
+        chat_id: ChatId,
+        task: Union[ChatTask, Callable],
+    ) -> Future:
+        """ The future is resolved with the result of the task. """
+        return self._scheduler.add(chat_id, task)
+
+    def send_photo(self, *args, **kwargs) -> Future:
+        return self._add_task(
             chat_id=kwargs.get("chat_id", 0),
             task=lambda:
                 super(MessageDelayBot, self).send_photo(*args, **kwargs),
         )
 
-    def send_message(self, *args, **kwargs) -> None:
-        self._add_task(
+    def send_message(self, *args, **kwargs) -> Future:
+        if args:
+            return self._add_task(
+                chat_id=kwargs.get("chat_id", 0),
+                task=lambda:
+                    super(MessageDelayBot, self).send_message(*args, **kwargs),
+            )
+
+        method = super(MessageDelayBot, self).send_message
+        if self._api is not None:
+            method = self._send_message_async
+
+        # Queued messages to the same chat can be sent as one.
+        return self._add_task(
             chat_id=kwargs.get("chat_id", 0),
-            task=lambda:
-                super(MessageDelayBot, self).send_message(*args, **kwargs),
+            task=ChatTask(
+                method=method,
+                kwargs=kwargs,
+                mergeable=True,
+            ),
+        )
+
+    async def _send_message_async(self, **kwargs) -> Message:
+        result = await self._api.call("sendMessage", **kwargs)
+        return Message.de_json(result, self)
+
+    def delete_messages(
+        self,
+        chat_id: ChatId,
+        message_ids: List[MessageId],
+    ) -> List[Future]:
+        """ Deletes the messages in the background by deleteMessages. """
+        method = self._delete_messages
+        if self._api is not None:
+            method = self._delete_messages_async
+
+        return [
+            self._add_task(
+                chat_id=chat_id,
+                task=ChatTask(
+                    method=method,
+                    kwargs={
+                        "chat_id": chat_id,
+                        "message_ids": message_ids[
+                            i:i + MAX_DELETE_MESSAGES
+                        ],
+                    },
+                ),
+            )
+            for i in range(0, len(message_ids), MAX_DELETE_MESSAGES)
+        ]
+
+    def _delete_messages(
+        self,
+        chat_id: ChatId,
+        message_ids: List[MessageId],
+    ) -> bool:
+        # PTB 13 does not have a method for it.
+        return self._post(
+            "deleteMessages",
+            {"chat_id": chat_id, "message_ids": message_ids},
         )
 
+    async def _delete_messages_async(self, **kwargs) -> bool:
+        return await self._api.call("deleteMessages", **kwargs)
+
     def edit_message_reply_markup(self, *args, **kwargs) -> None:
         def task():
             super(MessageDelayBot, self).edit_message_reply_markup(
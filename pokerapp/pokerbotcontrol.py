@@ -1,20 +1,57 @@
 #!/usr/bin/env python3
 
+import logging
+
 from telegram import Update
 from telegram.ext import (
+    ChatMemberHandler,
     CommandHandler,
     CallbackQueryHandler,
     CallbackContext,
+    DispatcherHandlerStop,
+    Filters,
+    MessageHandler,
+    TypeHandler,
     Updater,
 )
 
 from pokerapp.entities import PlayerAction
+from pokerapp.gamestore import GameLocked, GameStore
 from pokerapp.pokerbotmodel import PokerBotModel
 
+# The game is locked and loaded before the handlers, stored and
+# released after them.
+GROUP_LOAD_GAME = -1
+GROUP_STORE_GAME = 1
+
+# Updates which the bot handles, chat_member is not sent by default.
+ALLOWED_UPDATES = [
+    Update.MESSAGE,
+    Update.CALLBACK_QUERY,
+    Update.MY_CHAT_MEMBER,
+    Update.CHAT_MEMBER,
+]
+
 
 class PokerBotCotroller:
-    def __init__(self, model: PokerBotModel, updater: Updater):
+    def __init__(
+        self,
+        model: PokerBotModel,
+        updater: Updater,
+        game_store: GameStore = None,
+    ):
         self._model = model
+        self._game_store = game_store
+
+        if game_store is not None:
+            updater.dispatcher.add_handler(
+                TypeHandler(Update, self._load_game),
+                group=GROUP_LOAD_GAME,
+            )
+            updater.dispatcher.add_handler(
+                TypeHandler(Update, self._store_game),
+                group=GROUP_STORE_GAME,
+            )
 
         updater.dispatcher.add_handler(
             CommandHandler('ready', self._handle_ready)
@@ -34,6 +71,19 @@ class PokerBotCotroller:
         updater.dispatcher.add_handler(
             CommandHandler('cards', self._handle_cards)
         )
+        updater.dispatcher.add_handler(
+            ChatMemberHandler(
+                self._handle_chat_member,
+                ChatMemberHandler.ANY_CHAT_MEMBER,
+            )
+        )
+        updater.dispatcher.add_handler(
+            MessageHandler(
+                Filters.status_update.new_chat_members |
+                Filters.status_update.left_chat_member,
+                self._handle_chat_member,
+            )
+        )
         updater.dispatcher.add_handler(
             CallbackQueryHandler(
                 self._model.middleware_user_turn(
@@ -42,6 +92,36 @@ class PokerBotCotroller:
             )
         )
 
+    def _load_game(self, update: Update, context: CallbackContext) -> None:
+        if update.effective_chat is None:
+            return
+
+        chat_id = update.effective_chat.id
+        try:
+            self._game_store.lock(chat_id, context.chat_data)
+        except GameLocked as e:
+            # Nothing is sent or paid for an update which is dropped.
+            logging.warning(e)
+            raise DispatcherHandlerStop()
+        self._game_store.load(chat_id, context.chat_data)
+
+    def _store_game(self, update: Update, context: CallbackContext) -> None:
+        if update.effective_chat is None:
+            return
+
+        chat_id = update.effective_chat.id
+        try:
+            self._game_store.store(chat_id, context.chat_data)
+        finally:
+            self._game_store.release(chat_id, context.chat_data)
+
+    def _handle_chat_member(
+        self,
+        update: Update,
+        context: CallbackContext,
+    ) -> None:
+        self._model.chat_members_changed(update)
+
     def _handle_ready(self, update: Update, context: CallbackContext) -> None:
         self._model.ready(update, context)
 
@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
 
 import datetime
+import time
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from threading import Timer
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
 
-import redis
 from telegram import Message, ReplyKeyboardMarkup, Update, Bot
 from telegram.ext import Handler, CallbackContext
 
+from pokerapp.chatcache import ChatMetadataCache
 from pokerapp.config import Config
 from pokerapp.privatechatmodel import UserPrivateChatModel
 from pokerapp.winnerdetermination import WinnerDetermination
+from pokerapp.equity import EquityCalculator
+from pokerapp.handlog import Event, EventType, HandLog
+from pokerapp.kvstore import KV, script_twin
 from pokerapp.cards import Cards
 from pokerapp.entities import (
     Game,
@@ -45,6 +50,7 @@ SMALL_BLIND = 5
 ONE_DAY = 86400
 DEFAULT_MONEY = 1000
 MAX_TIME_FOR_TURN = datetime.timedelta(minutes=2)
+EQUITY_TRIALS = 20000
 DESCRIPTION_FILE = "assets/description_bot.md"
 
 
@@ -54,14 +60,34 @@ class PokerBotModel:
         view: PokerBotViewer,
         bot: Bot,
         cfg: Config,
-        kv,
+        kv: KV,
+        chat_cache: ChatMetadataCache = None,
+        hand_log: HandLog = None,
     ):
         self._view: PokerBotViewer = view
         self._bot: Bot = bot
+        self._chat_cache = chat_cache or ChatMetadataCache(
+            bot=bot,
+            ttl=cfg.CHAT_CACHE_TTL,
+        )
         self._winner_determine: WinnerDetermination = WinnerDetermination()
+        self._equity: EquityCalculator = EquityCalculator(
+            trials=EQUITY_TRIALS,
+        )
         self._kv = kv
+        self._hand_log = hand_log
         self._cfg: Config = cfg
         self._round_rate: RoundRateModel = RoundRateModel()
+        # Hole cards of the players are sent in parallel.
+        self._deal_executor = ThreadPoolExecutor(
+            max_workers=cfg.DEAL_WORKERS,
+            thread_name_prefix="deal",
+        )
+        # Equities of all-in players are simulated off the turn path.
+        self._equity_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="equity",
+        )
 
         self._readyMessages = {}
 
@@ -83,6 +109,25 @@ class PokerBotModel:
         i = game.current_player_index % len(game.players)
         return game.players[i]
 
+    def _log_event(
+        self,
+        game: Game,
+        event_type: EventType,
+        user_id: UserId = 0,
+        amount: Money = 0,
+        cards: Cards = (),
+    ) -> None:
+        if self._hand_log is None:
+            return
+        self._hand_log.append(Event(
+            type=event_type,
+            game_id=game.id,
+            time=time.time(),
+            user_id=user_id,
+            amount=amount,
+            cards=tuple(cards),
+        ))
+
     def ready(self, update: Update, context: CallbackContext) -> None:
         game = self._game_from_context(context)
         chat_id = update.effective_message.chat_id
@@ -131,7 +176,7 @@ class PokerBotModel:
 
         game.players.append(player)
 
-        members_count = self._bot.get_chat_member_count(chat_id)
+        members_count = self._chat_cache.member_count(chat_id)
         players_active = len(game.players)
         # One is the bot.
         if players_active == members_count - 1 and \
@@ -154,7 +199,7 @@ class PokerBotModel:
             return
 
         # One is the bot.
-        members_count = self._bot.get_chat_member_count(chat_id) - 1
+        members_count = self._chat_cache.member_count(chat_id) - 1
         if members_count == 1:
             with open(DESCRIPTION_FILE, 'r') as f:
                 text = f.read()
@@ -211,10 +256,18 @@ class PokerBotModel:
         game.players.sort(key=lambda p: index(old_players_ids, p.user_id))
 
         game.state = GameState.ROUND_PRE_FLOP
+        self._log_event(game, EventType.HAND_START, user_id=chat_id)
         self._divide_cards(game=game, chat_id=chat_id)
 
         game.current_player_index = 1
         self._round_rate.round_pre_flop_rate_before_first_turn(game)
+        for player in game.players[:2]:
+            self._log_event(
+                game,
+                EventType.BLIND,
+                user_id=player.user_id,
+                amount=player.round_rate,
+            )
         self._process_playing(chat_id=chat_id, game=game)
         self._round_rate.round_pre_flop_rate_after_first_turn(game)
 
@@ -294,11 +347,17 @@ class PokerBotModel:
         )
 
     def _check_access(self, chat_id: ChatId, user_id: UserId) -> bool:
-        chat_admins = self._bot.get_chat_administrators(chat_id)
-        for m in chat_admins:
-            if m.user.id == user_id:
-                return True
-        return False
+        return self._chat_cache.is_admin(chat_id, user_id)
+
+    def chat_members_changed(self, update: Update) -> None:
+        """ Members or administrators of the chat are changed. """
+        if update.effective_chat is not None:
+            self._chat_cache.invalidate(update.effective_chat.id)
+
+    @staticmethod
+    def _hole_cards_order(cards: Cards) -> Cards:
+        """ The same order as the pre-rendered images have. """
+        return sorted(cards, key=lambda c: c.id)
 
     def _send_cards_private(self, player: Player, cards: Cards) -> None:
         user_chat_model = UserPrivateChatModel(
@@ -314,39 +373,52 @@ class PokerBotModel:
 
         message_id = self._view.send_desk_cards_img(
             chat_id=private_chat_id,
-            cards=cards,
+            cards=self._hole_cards_order(cards),
             caption="Your cards",
             disable_notification=False,
         ).message_id
 
         try:
-            rm_msg_id = user_chat_model.pop_message()
-            while rm_msg_id is not None:
-                try:
-                    rm_msg_id = rm_msg_id.decode('utf-8')
-                    self._view.remove_message(
-                        chat_id=private_chat_id,
-                        message_id=rm_msg_id,
-                    )
-                except Exception as ex:
-                    print("remove_message", ex)
-                    traceback.print_exc()
-                rm_msg_id = user_chat_model.pop_message()
-
+            old_message_ids = user_chat_model.pop_messages()
             user_chat_model.push_message(message_id=message_id)
+            self._view.remove_messages(
+                chat_id=private_chat_id,
+                message_ids=[int(m) for m in old_message_ids],
+            )
         except Exception as ex:
             print("bulk_remove_message", ex)
             traceback.print_exc()
 
     def _divide_cards(self, game: Game, chat_id: ChatId) -> None:
         for player in game.players:
-            cards = player.cards = [
+            player.cards = [
                 game.remain_cards.pop(),
                 game.remain_cards.pop(),
             ]
+            self._log_event(
+                game,
+                EventType.DEAL,
+                user_id=player.user_id,
+                cards=player.cards,
+            )
+
+        # Images are rendered at once and uploaded in parallel.
+        self._view.render_desk_cards_imgs(
+            [self._hole_cards_order(p.cards) for p in game.players],
+        )
+        futures = {
+            self._deal_executor.submit(
+                self._send_cards_private,
+                player=player,
+                cards=player.cards,
+            ): player
+            for player in game.players
+        }
 
+        for future in as_completed(futures):
+            player = futures[future]
             try:
-                self._send_cards_private(player=player, cards=cards)
+                future.result()
 
                 continue
             except Exception as ex:
@@ -355,58 +427,72 @@ class PokerBotModel:
 
             self._view.send_cards(
                 chat_id=chat_id,
-                cards=cards,
+                cards=player.cards,
                 mention_markdown=player.mention_markdown,
                 ready_message_id=player.ready_message_id,
             )
 
     def _process_playing(self, chat_id: ChatId, game: Game) -> None:
-        game.current_player_index += 1
-        game.current_player_index %= len(game.players)
+        """ Moves the turn to the next player who can act.
 
-        current_player = self._current_turn_player(game)
-
-        # Process next round.
-        if current_player.user_id == game.trading_end_user_id:
-            self._round_rate.to_pot(game)
-            self._goto_next_round(game, chat_id)
+            Rounds which end on the way are closed one after another in
+            the loop. Only the wallet of the player who gets the turn is
+            read.
+        """
+        seats = game.seats
+        seat = game.current_player_index % len(game.players)
+        round_started = False
 
-            game.current_player_index = 0
+        while True:
+            # All fold except one.
+            if seats.in_game_count == 1:
+                self._finish(game, chat_id)
+                return
 
-        # Game finished.
-        if game.state == GameState.INITIAL:
-            return
+            if round_started:
+                next_seat = seats.first_active(seat)
+            else:
+                next_seat = seats.next_active(seat)
+
+            # Process next round.
+            round_end = next_seat is None or not round_started and \
+                seats.passes(
+                    start=seat,
+                    seat=seats.seat_of(game.trading_end_user_id),
+                    stop=next_seat,
+                )
+            if round_end:
+                self._round_rate.to_pot(game)
+                self._goto_next_round(game, chat_id)
 
-        # Player could be changed.
-        current_player = self._current_turn_player(game)
+                # Game finished.
+                if game.state == GameState.INITIAL:
+                    return
 
-        current_player_money = current_player.wallet.value()
+                seat = 0
+                round_started = True
+                continue
 
-        # Player do not have monery so make it ALL_IN.
-        if current_player_money <= 0:
-            current_player.state = PlayerState.ALL_IN
+            seat = next_seat
+            round_started = False
+            current_player = game.players[seat]
+            current_player_money = current_player.wallet.value()
 
-        # Skip inactive players.
-        if current_player.state != PlayerState.ACTIVE:
-            self._process_playing(chat_id, game)
-            return
+            # Player do not have monery so make it ALL_IN.
+            if current_player_money <= 0:
+                seats.set_state(current_player, PlayerState.ALL_IN)
+                continue
 
-        # All fold except one.
-        all_in_active_players = game.players_by(
-            states=(PlayerState.ACTIVE, PlayerState.ALL_IN)
-        )
-        if len(all_in_active_players) == 1:
-            self._finish(game, chat_id)
+            game.current_player_index = seat
+            game.last_turn_time = datetime.datetime.now()
+            self._view.send_turn_actions(
+                chat_id=chat_id,
+                game=game,
+                player=current_player,
+                money=current_player_money,
+            )
             return
 
-        game.last_turn_time = datetime.datetime.now()
-        self._view.send_turn_actions(
-            chat_id=chat_id,
-            game=game,
-            player=current_player,
-            money=current_player_money,
-        )
-
     def add_cards_to_table(
         self,
         count: int,
@@ -415,6 +501,11 @@ class PokerBotModel:
     ) -> None:
         for _ in range(count):
             game.cards_table.append(game.remain_cards.pop())
+        self._log_event(
+            game,
+            EventType.BOARD,
+            cards=game.cards_table[-count:],
+        )
 
         self._view.send_desk_cards_img(
             chat_id=chat_id,
@@ -444,10 +535,19 @@ class PokerBotModel:
             cards_table=game.cards_table,
         )
 
+        pot = game.pot
         winners_hand_money = self._round_rate.finish_rate(
             game=game,
             player_scores=player_scores,
         )
+        for (player, _, money) in winners_hand_money:
+            self._log_event(
+                game,
+                EventType.WIN,
+                user_id=player.user_id,
+                amount=money,
+            )
+        self._log_event(game, EventType.HAND_END, amount=pot)
 
         only_one_player = len(active_players) == 1
         text = "Game is finished with result:\n\n"
@@ -465,22 +565,23 @@ class PokerBotModel:
         text += "/ready to continue"
         self._view.send_message(chat_id=chat_id, text=text)
 
-        for player in game.players:
-            player.wallet.approve(game.id)
-
         game.reset()
 
     def _goto_next_round(self, game: Game, chat_id: ChatId) -> bool:
         # The state of the last player becomes ALL_IN at end of the round .
-        active_players = game.players_by(
-            states=(PlayerState.ACTIVE,)
-        )
-        if len(active_players) == 1:
-            active_players[0].state = PlayerState.ALL_IN
+        seats = game.seats
+        active_count = len(seats)
+        if active_count == 1:
+            last_player = game.players[seats.first_active(0)]
+            seats.set_state(last_player, PlayerState.ALL_IN)
             if len(game.cards_table) == 5:
                 self._finish(game, chat_id)
                 return
 
+        # Nobody can bet anymore, the rest of the board is run out.
+        if active_count <= 1 and game.state != GameState.ROUND_RIVER:
+            self._send_all_in_equity(game, chat_id)
+
         def add_cards(cards_count):
             return self.add_cards_to_table(
                 count=cards_count,
@@ -514,6 +615,58 @@ class PokerBotModel:
         game.state = transation["next_state"]
         transation["processor"]()
 
+    def _send_all_in_equity(
+        self,
+        game: Game,
+        chat_id: ChatId,
+    ) -> Optional[Future]:
+        all_in_players = game.players_by(states=(PlayerState.ALL_IN,))
+        if len(all_in_players) < 2:
+            return None
+
+        folded_cards = []
+        for player in game.players_by(states=(PlayerState.FOLD,)):
+            folded_cards += player.cards
+
+        # The game goes on while the runout is simulated.
+        return self._equity_executor.submit(
+            self._send_equity,
+            chat_id=chat_id,
+            players=[
+                (p.mention_markdown, list(p.cards)) for p in all_in_players
+            ],
+            cards_table=list(game.cards_table),
+            dead_cards=folded_cards,
+        )
+
+    def _send_equity(
+        self,
+        chat_id: ChatId,
+        players: List[Tuple[str, Cards]],
+        cards_table: Cards,
+        dead_cards: Cards,
+    ) -> None:
+        try:
+            equities = self._equity.calculate(
+                hands=[cards for (_, cards) in players],
+                cards_table=cards_table,
+                dead_cards=dead_cards,
+            )
+        except Exception:
+            traceback.print_exc()
+            return
+
+        text = "All in! Chances to win"
+        if cards_table:
+            text += f" on {' '.join(cards_table)}"
+        text += ":\n\n"
+        for ((mention_markdown, cards), equity) in zip(players, equities):
+            text += (
+                f"{mention_markdown} {' '.join(cards)}\n" +
+                f"Win: *{equity.win:.1%}*, tie: {equity.tie:.1%}\n"
+            )
+        self._view.send_message(chat_id=chat_id, text=text)
+
     def middleware_user_turn(self, fn: Handler) -> Handler:
         def m(update, context):
             game = self._game_from_context(context)
@@ -558,7 +711,8 @@ class PokerBotModel:
         game = self._game_from_context(context)
         player = self._current_turn_player(game)
 
-        player.state = PlayerState.FOLD
+        game.seats.set_state(player, PlayerState.FOLD)
+        self._log_event(game, EventType.FOLD, user_id=player.user_id)
 
         self._view.send_message(
             chat_id=update.effective_message.chat_id,
@@ -580,8 +734,10 @@ class PokerBotModel:
         player = self._current_turn_player(game)
 
         action = PlayerAction.CALL.value
+        event_type = EventType.CALL
         if player.round_rate == game.max_round_rate:
             action = PlayerAction.CHECK.value
+            event_type = EventType.CHECK
 
         try:
             amount = game.max_round_rate - player.round_rate
@@ -595,6 +751,12 @@ class PokerBotModel:
             )
 
             self._round_rate.call_check(game, player)
+            self._log_event(
+                game,
+                event_type,
+                user_id=player.user_id,
+                amount=amount,
+            )
         except UserException as e:
             self._view.send_message(chat_id=chat_id, text=str(e))
             return
@@ -616,8 +778,10 @@ class PokerBotModel:
 
         try:
             action = PlayerAction.RAISE_RATE
+            event_type = EventType.RAISE
             if player.round_rate == game.max_round_rate:
                 action = PlayerAction.BET
+                event_type = EventType.BET
 
             if player.wallet.value() < raise_bet_rate.value:
                 return self.all_in(update=update, context=context)
@@ -628,7 +792,14 @@ class PokerBotModel:
                 f" {action.value} {raise_bet_rate.value}$"
             )
 
+            round_rate = player.round_rate
             self._round_rate.raise_rate_bet(game, player, raise_bet_rate.value)
+            self._log_event(
+                game,
+                event_type,
+                user_id=player.user_id,
+                amount=player.round_rate - round_rate,
+            )
         except UserException as e:
             self._view.send_message(chat_id=chat_id, text=str(e))
             return
@@ -641,22 +812,184 @@ class PokerBotModel:
         player = self._current_turn_player(game)
         mention = player.mention_markdown
         amount = self._round_rate.all_in(game, player)
+        self._log_event(
+            game,
+            EventType.ALL_IN,
+            user_id=player.user_id,
+            amount=amount,
+        )
         self._view.send_message(
             chat_id=chat_id,
             text=f"{mention} {PlayerAction.ALL_IN.value} {amount}$"
         )
-        player.state = PlayerState.ALL_IN
+        game.seats.set_state(player, PlayerState.ALL_IN)
         self._process_playing(chat_id=chat_id, game=game)
 
 
+# Money is checked and moved in one step on the Redis side.
+# KEYS[1] is the wallet, KEYS[2] is the authorized money of the game.
+WALLET_INC_SCRIPT = """
+local money = tonumber(redis.call("GET", KEYS[1]) or "0")
+local amount = tonumber(ARGV[1])
+if money + amount < 0 then
+    return false
+end
+return redis.call("INCRBY", KEYS[1], amount)
+"""
+
+WALLET_AUTHORIZE_SCRIPT = """
+local money = tonumber(redis.call("GET", KEYS[1]) or "0")
+local amount = tonumber(ARGV[1])
+if money < amount then
+    return false
+end
+redis.call("INCRBY", KEYS[2], amount)
+return redis.call("DECRBY", KEYS[1], amount)
+"""
+
+WALLET_AUTHORIZE_ALL_SCRIPT = """
+local money = tonumber(redis.call("GET", KEYS[1]) or "0")
+redis.call("INCRBY", KEYS[2], money)
+redis.call("SET", KEYS[1], 0)
+return money
+"""
+
+# The pot is split between the winner groups from the best hand down,
+# a winner gets a share by the authorized money, at most the authorized
+# money times the count of players. Then the shares are paid and the
+# authorized money of all players is approved.
+# KEYS are the wallets and then the authorized money of the players,
+# ARGV is the pot, the count of players and the groups, each as its
+# size and the 1-based indexes of the players.
+WALLET_SETTLE_SCRIPT = """
+local count = #KEYS / 2
+local pot = tonumber(ARGV[1])
+local players_count = tonumber(ARGV[2])
+local authorized = {}
+for i = 1, count do
+    authorized[i] = tonumber(redis.call("GET", KEYS[count + i]) or "0")
+end
+
+local paid = {}
+local credits = {}
+local arg = 3
+while arg <= #ARGV do
+    local size = tonumber(ARGV[arg])
+    local group = {}
+    local players_authorized = 0
+    for j = 1, size do
+        group[j] = tonumber(ARGV[arg + j])
+        players_authorized = players_authorized + authorized[group[j]]
+    end
+    arg = arg + size + 1
+
+    local game_pot = pot
+    for j = 1, size do
+        local money = -1
+        if players_authorized > 0 and pot > 0 then
+            local i = group[j]
+            local real = game_pot * (authorized[i] / players_authorized)
+            -- Halves are rounded to even like in Python.
+            money = math.floor(real)
+            local rest = real - money
+            if rest > 0.5 or (rest == 0.5 and money % 2 == 1) then
+                money = money + 1
+            end
+            money = math.min(money, authorized[i] * players_count)
+            credits[i] = (credits[i] or 0) + money
+            pot = pot - money
+        end
+        paid[#paid + 1] = money
+    end
+end
+
+for i = 1, count do
+    if credits[i] and credits[i] ~= 0 then
+        redis.call("INCRBY", KEYS[i], credits[i])
+    end
+end
+redis.call("DEL", unpack(KEYS, count + 1, #KEYS))
+return paid
+"""
+
+
+@script_twin(WALLET_INC_SCRIPT)
+def _wallet_inc(kv: KV, keys: List[str], args: List) -> Money:
+    amount = int(args[0])
+    if int(kv.get(keys[0]) or 0) + amount < 0:
+        return None
+    return kv.incrby(keys[0], amount)
+
+
+@script_twin(WALLET_AUTHORIZE_SCRIPT)
+def _wallet_authorize(kv: KV, keys: List[str], args: List) -> Money:
+    amount = int(args[0])
+    if int(kv.get(keys[0]) or 0) < amount:
+        return None
+    kv.incrby(keys[1], amount)
+    return kv.incrby(keys[0], -amount)
+
+
+@script_twin(WALLET_AUTHORIZE_ALL_SCRIPT)
+def _wallet_authorize_all(kv: KV, keys: List[str], args: List) -> Money:
+    money = int(kv.get(keys[0]) or 0)
+    kv.incrby(keys[1], money)
+    kv.set(keys[0], 0)
+    return money
+
+
+@script_twin(WALLET_SETTLE_SCRIPT)
+def _wallet_settle(kv: KV, keys: List[str], args: List) -> List[Money]:
+    count = len(keys) // 2
+    pot = int(args[0])
+    players_count = int(args[1])
+    authorized = [int(kv.get(k) or 0) for k in keys[count:]]
+
+    paid = []
+    credits = [0] * count
+    arg = 2
+    while arg < len(args):
+        size = int(args[arg])
+        group = [int(i) - 1 for i in args[arg + 1:arg + 1 + size]]
+        arg += size + 1
+        players_authorized = sum(authorized[i] for i in group)
+
+        game_pot = pot
+        for i in group:
+            money = -1
+            if players_authorized > 0 and pot > 0:
+                money = round(game_pot * (authorized[i] / players_authorized))
+                money = min(money, authorized[i] * players_count)
+                credits[i] += money
+                pot -= money
+            paid.append(money)
+
+    for (key, money) in zip(keys, credits):
+        if money != 0:
+            kv.incrby(key, money)
+    kv.delete(*keys[count:])
+    return paid
+
+
 class WalletManagerModel(Wallet):
-    def __init__(self, user_id: UserId, kv: redis.Redis):
+    def __init__(
+        self,
+        user_id: UserId,
+        kv: KV,
+        create: bool = True,
+    ):
+        """ A new wallet gets the default money if create is set. """
         self.user_id = user_id
         self._kv = kv
+        self._inc_script = kv.register_script(WALLET_INC_SCRIPT)
+        self._authorize_script = kv.register_script(WALLET_AUTHORIZE_SCRIPT)
+        self._authorize_all_script = kv.register_script(
+            WALLET_AUTHORIZE_ALL_SCRIPT,
+        )
+        self._settle_script = kv.register_script(WALLET_SETTLE_SCRIPT)
 
-        key = self._prefix(self.user_id)
-        if self._kv.get(key) is None:
-            self._kv.set(key, DEFAULT_MONEY)
+        if create:
+            self._kv.set(self._prefix(self.user_id), DEFAULT_MONEY, nx=True)
 
     @staticmethod
     def _prefix(id: int, suffix: str = ""):
@@ -691,13 +1024,13 @@ class WalletManagerModel(Wallet):
         """ Increase count of money in the wallet.
             Decrease authorized money.
         """
-        wallet = int(self._kv.get(self._prefix(self.user_id)))
-
-        if wallet + amount < 0:
+        money = self._inc_script(
+            keys=[self._prefix(self.user_id)],
+            args=[amount],
+        )
+        if money is None:
             raise UserException("not enough money")
 
-        self._kv.incrby(self._prefix(self.user_id), amount)
-
     def inc_authorized_money(
         self,
         game_id: str,
@@ -712,17 +1045,24 @@ class WalletManagerModel(Wallet):
 
     def authorize(self, game_id: str, amount: Money) -> None:
         """ Decrease count of money. """
-        self.inc_authorized_money(game_id, amount)
-
-        return self.inc(-amount)
+        money = self._authorize_script(
+            keys=[
+                self._prefix(self.user_id),
+                self._prefix(self.user_id, ":" + game_id),
+            ],
+            args=[amount],
+        )
+        if money is None:
+            raise UserException("not enough money")
 
     def authorize_all(self, game_id: str) -> Money:
         """ Decrease all money of player. """
-        money = int(self._kv.get(self._prefix(self.user_id)))
-        self.inc_authorized_money(game_id, money)
-
-        self._kv.set(self._prefix(self.user_id), 0)
-        return money
+        return int(self._authorize_all_script(
+            keys=[
+                self._prefix(self.user_id),
+                self._prefix(self.user_id, ":" + game_id),
+            ],
+        ))
 
     def value(self) -> Money:
         """ Get count of money in the wallet. """
@@ -732,6 +1072,36 @@ class WalletManagerModel(Wallet):
         key_authorized_money = self._prefix(self.user_id, ":" + game_id)
         self._kv.delete(key_authorized_money)
 
+    @staticmethod
+    def settle(
+        game_id: str,
+        wallets: List["WalletManagerModel"],
+        pot: Money,
+        winners: List[List[int]],
+    ) -> List[Optional[Money]]:
+        """ Pays the winners and approves the authorized money of all
+            the wallets by one script.
+
+            Winners are groups of indexes of the wallets from the best
+            hand down. The money of every winner in the order of the
+            groups is returned, None for the ones who got no share.
+        """
+        if not wallets:
+            return []
+
+        args = [pot, len(wallets)]
+        for group in winners:
+            args.append(len(group))
+            args += [i + 1 for i in group]
+
+        paid = wallets[0]._settle_script(
+            keys=[w._prefix(w.user_id) for w in wallets] + [
+                w._prefix(w.user_id, ":" + game_id) for w in wallets
+            ],
+            args=args,
+        )
+        return [None if money < 0 else int(money) for money in paid]
+
 
 class RoundRateModel:
 
@@ -774,23 +1144,14 @@ class RoundRateModel:
             game.trading_end_user_id = player.user_id
         return amount
 
-    def _sum_authorized_money(
-        self,
-        game: Game,
-        players: List[Tuple[Player, Cards]],
-    ) -> int:
-        sum_authorized_money = 0
-        for player in players:
-            sum_authorized_money += player[0].wallet.authorized_money(
-                game_id=game.id,
-            )
-        return sum_authorized_money
-
     def finish_rate(
         self,
         game: Game,
         player_scores: Dict[Score, List[Tuple[Player, Cards]]],
     ) -> List[Tuple[Player, Cards, Money]]:
+        """ Pays the winners and approves the authorized money of all
+            players in one round trip.
+        """
         sorted_player_scores_items = sorted(
             player_scores.items(),
             reverse=True,
@@ -799,34 +1160,28 @@ class RoundRateModel:
         player_scores_values = list(
             map(lambda x: x[1], sorted_player_scores_items))
 
+        seats = {p.user_id: i for (i, p) in enumerate(game.players)}
+        paid = WalletManagerModel.settle(
+            game_id=game.id,
+            wallets=[p.wallet for p in game.players],
+            pot=game.pot,
+            winners=[
+                [seats[p.user_id] for (p, _) in win_players]
+                for win_players in player_scores_values
+            ],
+        )
+
         res = []
-        for win_players in player_scores_values:
-            players_authorized = self._sum_authorized_money(
-                game=game,
-                players=win_players,
-            )
-            if players_authorized <= 0:
+        win_hands = (
+            (p, best_hand)
+            for win_players in player_scores_values
+            for (p, best_hand) in win_players
+        )
+        for ((win_player, best_hand), win_money) in zip(win_hands, paid):
+            if win_money is None:
                 continue
-
-            game_pot = game.pot
-            for win_player, best_hand in win_players:
-                if game.pot <= 0:
-                    break
-
-                authorized = win_player.wallet.authorized_money(
-                    game_id=game.id,
-                )
-
-                win_money_real = game_pot * (authorized / players_authorized)
-                win_money_real = round(win_money_real)
-
-                win_money_can_get = authorized * len(game.players)
-                win_money = min(win_money_real, win_money_can_get)
-
-                win_player.wallet.inc(win_money)
-                game.pot -= win_money
-                res.append((win_player, best_hand, win_money))
-
+            game.pot -= win_money
+            res.append((win_player, best_hand, win_money))
         return res
 
     def to_pot(self, game) -> None:
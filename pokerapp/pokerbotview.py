@@ -9,9 +9,13 @@ from telegram import (
     Bot,
     InputMediaPhoto,
 )
+from telegram.error import BadRequest
+from concurrent.futures import Future
 from io import BytesIO
+from typing import List
 
-from pokerapp.desk import DeskImageGenerator
+from pokerapp.desk import DeskImageCache
+from pokerapp.fileids import FileIdStore
 from pokerapp.cards import Cards
 from pokerapp.entities import (
     Game,
@@ -23,11 +27,41 @@ from pokerapp.entities import (
     Money,
 )
 
+POKER_HAND_FILE = "./assets/poker_hand.jpg"
+
 
 class PokerBotViewer:
-    def __init__(self, bot: Bot):
+    def __init__(
+        self,
+        bot: Bot,
+        desk_cache: DeskImageCache = None,
+        file_ids: FileIdStore = None,
+    ):
         self._bot = bot
-        self._desk_generator = DeskImageGenerator()
+        # An empty cache is falsy, so it is checked against None.
+        if desk_cache is None:
+            desk_cache = DeskImageCache()
+        self._desk_cache = desk_cache
+        if file_ids is None:
+            file_ids = FileIdStore()
+        self._file_ids = file_ids
+
+    def _remember_file_id(self, key: str, message: Message) -> None:
+        if message is not None and message.photo:
+            self._file_ids.set(key, message.photo[-1].file_id)
+
+    def _remember_file_id_later(self, key: str, result) -> None:
+        """ Delayed sends return a future of the message. """
+        if not isinstance(result, Future):
+            return self._remember_file_id(key, result)
+
+        def done(future: Future) -> None:
+            if future.exception() is not None:
+                self._file_ids.delete(key)
+                return
+            self._remember_file_id(key, future.result())
+
+        result.add_done_callback(done)
 
     def send_message(
         self,
@@ -46,12 +80,20 @@ class PokerBotViewer:
 
     def send_photo(self, chat_id: ChatId) -> None:
         # TODO: photo to args.
-        self._bot.send_photo(
+        file_id = self._file_ids.get(POKER_HAND_FILE)
+        photo = file_id
+        if file_id is None:
+            with open(POKER_HAND_FILE, 'rb') as f:
+                photo = f.read()
+
+        result = self._bot.send_photo(
             chat_id=chat_id,
-            photo=open("./assets/poker_hand.jpg", 'rb'),
+            photo=photo,
             parse_mode=ParseMode.MARKDOWN,
             disable_notification=True,
         )
+        if file_id is None:
+            self._remember_file_id_later(POKER_HAND_FILE, result)
 
     def send_dice_reply(
         self,
@@ -80,29 +122,64 @@ class PokerBotViewer:
             disable_notification=True,
         )
 
-    def send_desk_cards_img(
+    def _send_media_photo(
         self,
         chat_id: ChatId,
-        cards: Cards,
-        caption: str = "",
-        disable_notification: bool = True,
-    ) -> MessageId:
-        im_cards = self._desk_generator.generate_desk(cards)
-        bio = BytesIO()
-        bio.name = 'desk.png'
-        im_cards.save(bio, 'PNG')
-        bio.seek(0)
+        media,
+        caption: str,
+        disable_notification: bool,
+    ) -> Message:
         return self._bot.send_media_group(
             chat_id=chat_id,
             media=[
                 InputMediaPhoto(
-                    media=bio,
+                    media=media,
                     caption=caption,
                 ),
             ],
             disable_notification=disable_notification,
         )[0]
 
+    def _desk_key(self, cards: Cards) -> str:
+        return "desk:" + self._desk_cache.render_key + ":" + \
+            ",".join(str(card.id) for card in cards)
+
+    def render_desk_cards_imgs(self, cards_list: List[Cards]) -> None:
+        """ Renders the images which were not uploaded yet, before they
+            are sent in parallel.
+        """
+        for cards in cards_list:
+            if self._file_ids.get(self._desk_key(cards)) is None:
+                self._desk_cache.get(cards)
+
+    def send_desk_cards_img(
+        self,
+        chat_id: ChatId,
+        cards: Cards,
+        caption: str = "",
+        disable_notification: bool = True,
+    ) -> Message:
+        image_format = self._desk_cache.image_format
+        key = self._desk_key(cards)
+
+        file_id = self._file_ids.get(key)
+        if file_id is not None:
+            try:
+                return self._send_media_photo(
+                    chat_id, file_id, caption, disable_notification,
+                )
+            except BadRequest:
+                # The file is gone, upload it again.
+                self._file_ids.delete(key)
+
+        bio = BytesIO(self._desk_cache.get(cards))
+        bio.name = 'desk.' + image_format.extension
+        message = self._send_media_photo(
+            chat_id, bio, caption, disable_notification,
+        )
+        self._remember_file_id(key, message)
+        return message
+
     @ staticmethod
     def _get_cards_markup(cards: Cards) -> ReplyKeyboardMarkup:
         return ReplyKeyboardMarkup(
@@ -226,3 +303,15 @@ class PokerBotViewer:
             chat_id=chat_id,
             message_id=message_id,
         )
+
+    def remove_messages(
+        self,
+        chat_id: ChatId,
+        message_ids: List[MessageId],
+    ) -> None:
+        """ The messages are deleted in the background. """
+        if message_ids:
+            self._bot.delete_messages(
+                chat_id=chat_id,
+                message_ids=message_ids,
+            )
@@ -1,17 +1,16 @@
 from types import NoneType
-from typing import Union
-
-import redis
+from typing import List, Union
 
 from pokerapp.entities import (
     ChatId,
     MessageId,
     UserId,
 )
+from pokerapp.kvstore import KV
 
 
 class UserPrivateChatModel:
-    def __init__(self, user_id: UserId, kv: redis.Redis):
+    def __init__(self, user_id: UserId, kv: KV):
         self.user_id = user_id
         self._kv = kv
 
@@ -33,5 +32,13 @@ class UserPrivateChatModel:
     def pop_message(self) -> Union[MessageId, NoneType]:
         return self._kv.rpop(self._key+":messages")
 
+    def pop_messages(self) -> List[MessageId]:
+        """ All the messages, read and removed in one transaction. """
+        pipe = self._kv.pipeline(transaction=True)
+        pipe.lrange(self._key+":messages", 0, -1)
+        pipe.delete(self._key+":messages")
+        (message_ids, _) = pipe.execute()
+        return message_ids
+
     def push_message(self, message_id: MessageId) -> None:
         return self._kv.rpush(self._key+":messages", message_id)
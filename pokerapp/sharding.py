@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+
+import bisect
+import hashlib
+import json
+import logging
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import JoinableQueue
+from typing import Dict, List, Tuple
+
+from telegram import Bot, Update
+from telegram.ext import Dispatcher, Updater
+
+from pokerapp.chatscheduler import GLOBAL_BURST, GLOBAL_RATE, SharedTokenBucket
+from pokerapp.config import Config
+from pokerapp.kvstore import BACKEND_MEMORY
+from pokerapp.mailbox import update_chat_key
+from pokerapp.pokerbot import PokerBot, run_webhook
+from pokerapp.pokerbotcontrol import ALLOWED_UPDATES
+
+VNODES = 128
+# Seconds to wait for a worker to process its updates or to stop.
+DRAIN_TIMEOUT = 30
+DRAIN_POLL_INTERVAL = 0.5
+
+Worker = Tuple[BaseProcess, JoinableQueue]
+
+
+class HashRing:
+    """ Consistent hashing of keys to nodes.
+
+        Every node has many points on the ring, so keys are spread evenly
+        and only about 1/n of them move when a node is added or removed.
+    """
+
+    def __init__(self, nodes: List[str] = (), vnodes: int = VNODES):
+        self._vnodes = vnodes
+        self._points: List[int] = []
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        digest = hashlib.md5(key.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    def __len__(self) -> int:
+        return len(set(self._nodes))
+
+    def add(self, node: str) -> None:
+        for i in range(self._vnodes):
+            point = self._hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        pairs = [
+            (p, n) for (p, n) in zip(self._points, self._nodes) if n != node
+        ]
+        self._points = [p for (p, _) in pairs]
+        self._nodes = [n for (_, n) in pairs]
+
+    def node_for(self, key) -> str:
+        if not self._points:
+            raise LookupError("no nodes in the ring")
+        index = bisect.bisect(self._points, self._hash(str(key)))
+        return self._nodes[index % len(self._points)]
+
+
+def _worker_main(
+    name: str,
+    token: str,
+    updates: JoinableQueue,
+    send_budget,
+) -> None:
+    """ A worker has its own bot, view and model, the limit of sends
+        is shared by all the workers.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    bot = PokerBot(
+        token=token,
+        cfg=Config(),
+        shard=name,
+        global_bucket=SharedTokenBucket(
+            GLOBAL_RATE,
+            GLOBAL_BURST,
+            send_budget,
+        ),
+    )
+    logging.info("%s is started", name)
+    bot.run_worker(updates)
+
+
+class ShardRouter(Dispatcher):
+    """ Sends every update to the worker process of its chat.
+
+        Workers are chosen by consistent hashing on the chat id, so the
+        updates of a chat are processed in order by one worker. It is
+        used as the dispatcher of the Updater or the webhook server.
+        A worker whose process died is started again with the same name,
+        the updates it did not process are lost.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        token: str,
+        workers: int,
+        drain_timeout: float = DRAIN_TIMEOUT,
+    ):
+        super().__init__(
+            bot=bot,
+            update_queue=queue.Queue(),
+            workers=1,
+        )
+        self._token = token
+        self._drain_timeout = drain_timeout
+        self._ring = HashRing()
+        self._workers: Dict[str, Worker] = {}
+        self._workers_lock = threading.Lock()
+        self._next_worker = 0
+        # Workers are spawned, not forked from a process with threads.
+        self._mp = multiprocessing.get_context("spawn")
+        self._send_budget = SharedTokenBucket.new_state(self._mp, GLOBAL_BURST)
+        for _ in range(workers):
+            self.add_worker()
+
+    def process_update(self, update: object) -> None:
+        if not isinstance(update, Update):
+            return
+        data = json.dumps(update.to_dict())
+        with self._workers_lock:
+            name = self._ring.node_for(update_chat_key(update))
+            self._alive_worker(name)[1].put(data)
+
+    def _start_worker(self, name: str) -> Worker:
+        updates = self._mp.JoinableQueue()
+        process = self._mp.Process(
+            target=_worker_main,
+            args=(name, self._token, updates, self._send_budget),
+            name=name,
+            daemon=True,
+        )
+        process.start()
+        return (process, updates)
+
+    def _alive_worker(self, name: str) -> Worker:
+        """ The worker, started again if its process died. """
+        (process, updates) = self._workers[name]
+        if process.is_alive():
+            return (process, updates)
+
+        logging.error(
+            "%s exited with code %s, starting it again",
+            name,
+            process.exitcode,
+        )
+        self._workers[name] = self._start_worker(name)
+        return self._workers[name]
+
+    def _drain(self) -> None:
+        """ Waits until the workers process the routed updates,
+            so a moved chat does not run on two workers at once.
+
+            A dead worker never marks its updates as done, it is started
+            again. A worker which does not finish in drain_timeout
+            seconds is left to run, its chats may move before it ends.
+        """
+        for name in list(self._workers):
+            (process, updates) = self._workers[name]
+            # JoinableQueue.join has no timeout, a waiter of a dead
+            # worker is left blocked.
+            waiter = threading.Thread(target=updates.join, daemon=True)
+            waiter.start()
+            deadline = time.monotonic() + self._drain_timeout
+            while waiter.is_alive() and process.is_alive() and \
+                    time.monotonic() < deadline:
+                waiter.join(DRAIN_POLL_INTERVAL)
+
+            if not process.is_alive():
+                self._alive_worker(name)
+            elif waiter.is_alive():
+                logging.warning(
+                    "%s did not process its updates in %s seconds",
+                    name,
+                    self._drain_timeout,
+                )
+
+    def _join_worker(self, name: str, process: BaseProcess) -> None:
+        process.join(self._drain_timeout)
+        if process.is_alive():
+            logging.warning("%s did not stop, terminating it", name)
+            process.terminate()
+            process.join()
+
+    def add_worker(self) -> str:
+        name = "worker-" + str(self._next_worker)
+        self._next_worker += 1
+        worker = self._start_worker(name)
+
+        with self._workers_lock:
+            self._drain()
+            self._workers[name] = worker
+            self._ring.add(name)
+        logging.info("%s is added, %s workers", name, len(self._ring))
+        return name
+
+    def remove_worker(self, name: str) -> None:
+        with self._workers_lock:
+            if len(self._workers) <= 1:
+                raise ValueError("the last worker can not be removed")
+            self._drain()
+            self._ring.remove(name)
+            (process, updates) = self._workers.pop(name)
+
+        updates.put(None)
+        self._join_worker(name, process)
+        logging.info("%s is removed, %s workers", name, len(self._ring))
+
+    def stop_workers(self) -> None:
+        with self._workers_lock:
+            workers = self._workers
+            self._workers = {}
+            self._ring = HashRing()
+        for (_, updates) in workers.values():
+            updates.put(None)
+        for (name, (process, _)) in workers.items():
+            self._join_worker(name, process)
+
+
+class ShardedPokerBot:
+    """ A front process which receives updates and routes them to
+        the worker processes. SIGUSR1 adds a worker.
+    """
+
+    def __init__(self, token: str, cfg: Config):
+        if cfg.KV_BACKEND == BACKEND_MEMORY:
+            # Wallets are shared by the chats of all the workers.
+            raise ValueError("workers can not share the memory kv backend")
+
+        self._cfg = cfg
+        bot = Bot(token=token)
+        self._router = ShardRouter(
+            bot=bot,
+            token=token,
+            workers=cfg.WORKERS,
+        )
+        self._updater = Updater(dispatcher=self._router, workers=None)
+
+    def _on_add_worker(self, signum, frame) -> None:
+        threading.Thread(target=self._router.add_worker).start()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGUSR1, self._on_add_worker)
+
+        if self._cfg.WEBHOOK:
+            # Routing is cheap, one thread keeps the order of updates.
+            run_webhook(self._updater, self._cfg, workers=1)
+        else:
+            self._updater.start_polling(allowed_updates=ALLOWED_UPDATES)
+            self._updater.idle()
+
+        self._router.stop_workers()
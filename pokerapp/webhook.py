@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import hmac
+import json
+import logging
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+from telegram import Bot, Update
+from telegram.ext import Dispatcher
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class WebhookServer:
+    """ Receives updates from Telegram by HTTP POST requests.
+
+        Updates are put in a bounded queue and processed by the
+        dispatcher in worker threads. When the queue is full the server
+        answers 503 and Telegram sends the update again later.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        listen: str = "0.0.0.0",
+        port: int = 8443,
+        path: str = "/",
+        secret_token: str = "",
+        workers: int = 4,
+        queue_size: int = 256,
+    ):
+        if secret_token == "":
+            raise ValueError("the webhook needs a secret token")
+        self._dispatcher = dispatcher
+        self._bot = bot
+        self._path = path
+        self._secret_token = secret_token
+        self._workers_count = workers
+        self._updates = queue.Queue(maxsize=queue_size)
+        self._workers: List[threading.Thread] = []
+        self._httpd = ThreadingHTTPServer((listen, port), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_port
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.send_response(server._receive(self))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logging.debug(format, *args)
+
+        return Handler
+
+    def _receive(self, request: BaseHTTPRequestHandler) -> int:
+        """ HTTP status of the answer. """
+        if request.path != self._path:
+            return 404
+
+        token = request.headers.get(SECRET_TOKEN_HEADER, "")
+        if not hmac.compare_digest(token, self._secret_token):
+            return 403
+
+        length = int(request.headers.get("Content-Length", 0))
+        if length <= 0 or length > MAX_BODY_SIZE:
+            return 400
+
+        try:
+            data = json.loads(request.rfile.read(length))
+            update = Update.de_json(data, self._bot)
+        except ValueError as e:
+            logging.warning("bad update: %s", e)
+            return 400
+
+        try:
+            self._updates.put_nowait(update)
+        except queue.Full:
+            return 503
+        return 200
+
+    def _work(self) -> None:
+        while True:
+            update = self._updates.get()
+            if update is None:
+                return
+            try:
+                self._dispatcher.process_update(update)
+            except Exception as e:
+                logging.exception(e)
+            finally:
+                self._updates.task_done()
+
+    def start(self) -> None:
+        for i in range(self._workers_count):
+            worker = threading.Thread(
+                target=self._work,
+                name="webhook-worker-" + str(i),
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        threading.Thread(
+            target=self._httpd.serve_forever,
+            name="webhook-server",
+            daemon=True,
+        ).start()
+
+    def join(self) -> None:
+        """ Waits until the queued updates are processed. """
+        self._updates.join()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        for _ in self._workers:
+            self._updates.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
@@ -2,13 +2,15 @@
 
 import enum
 from itertools import combinations
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
-from pokerapp.cards import Card, Cards
+from pokerapp.cards import CARDS_COUNT, RANKS, SUITS, Card, Cards
 from pokerapp.entities import Player, Score
 
 HAND_RANK = 15**5
 
+RANK_VALUES = tuple(range(2, len(RANKS) + 2))
+
 
 class HandsOfPoker(enum.Enum):
     ROYAL_FLUSH = 10
@@ -151,13 +153,226 @@ class WinnerDetermination:
         cards_table: Cards,
     ) -> Dict[Score, List[Tuple[Player, Cards]]]:
         res = {}
+        evaluator = LookupEvaluator.instance()
 
         for player in players:
-            player_hands = self._make_combinations(player.cards + cards_table)
-            best_hand, score = self._best_hand_score(player_hands)
+            cards = player.cards + cards_table
+            (score, best_hand) = evaluator.evaluate_hand(cards)
 
             if score not in res:
                 res[score] = []
             res[score].append((player, best_hand))
 
         return res
+
+
+class LookupEvaluator:
+    """ Scores 5, 6 or 7 cards with two table lookups.
+
+        Non-flush hands are looked up by the multiset of their ranks,
+        flushes by the 13-bit rank mask of the suited cards. Tables are
+        derived from WinnerDetermination._check_hand_get_score, so the
+        scores are exactly the same as the combinations scan gives.
+    """
+
+    _instance = None
+
+    def __init__(self):
+        # Per card id: base 5 rank key, suit index and rank bit.
+        self._id_rank_keys = [
+            self._rank_key(i % len(RANKS) + 2) for i in range(CARDS_COUNT)
+        ]
+        self._id_suits = [i // len(RANKS) for i in range(CARDS_COUNT)]
+        self._id_bits = [1 << (i % len(RANKS)) for i in range(CARDS_COUNT)]
+        self._rank_scores: Dict[int, Score] = {}
+        self._flush_scores: List[Score] = [0] * (1 << len(RANK_VALUES))
+        # The 5-card key and the 5-bit mask of the best hand of a key
+        # or a mask, to pick the best cards without a rescan.
+        self._rank_hands: Dict[int, int] = {}
+        self._flush_hands: List[int] = [0] * (1 << len(RANK_VALUES))
+        self._build_tables()
+
+    @classmethod
+    def instance(cls) -> "LookupEvaluator":
+        """ The tables take a moment to build, so they are shared. """
+        if cls._instance is None:
+            cls._instance = LookupEvaluator()
+        return cls._instance
+
+    @staticmethod
+    def _rank_key(value: int) -> int:
+        # Base 5 digit per rank, a rank occurs at most 4 times.
+        return 5 ** (value - 2)
+
+    @classmethod
+    def _rank_multisets(cls, max_size: int) -> List[Dict[int, Tuple[int]]]:
+        """ Multisets of ranks by size: {key: values in ascending order}. """
+        levels = [{0: ()}]
+        for _ in range(max_size):
+            level = {}
+            for key, values in levels[-1].items():
+                start = values[-1] if values else RANK_VALUES[0]
+                for value in range(start, RANK_VALUES[-1] + 1):
+                    rank_key = cls._rank_key(value)
+                    if key // rank_key % 5 == 4:
+                        continue
+                    level[key + rank_key] = values + (value,)
+            levels.append(level)
+        return levels
+
+    def _build_tables(self) -> None:
+        reference = WinnerDetermination()
+        mixed_suits = SUITS + SUITS[:1]
+        multisets = self._rank_multisets(7)
+
+        for key, values in multisets[5].items():
+            if values.count(values[0]) == 5:
+                continue
+            hand = [
+                Card(RANKS[v - 2] + suit)
+                for v, suit in zip(values, mixed_suits)
+            ]
+            self._rank_scores[key] = reference._check_hand_get_score(hand)
+            self._rank_hands[key] = key
+
+            if len(set(values)) == 5:
+                hand = [Card(RANKS[v - 2] + SUITS[0]) for v in values]
+                mask = sum(1 << (v - 2) for v in values)
+                self._flush_scores[mask] = \
+                    reference._check_hand_get_score(hand)
+                self._flush_hands[mask] = mask
+
+        # The best 5 of n cards is the best 5 of one of the n - 1 subsets.
+        scores, hands = self._rank_scores, self._rank_hands
+        for size in (6, 7):
+            for key, values in multisets[size].items():
+                sub_key = max(
+                    [key - self._rank_key(v) for v in set(values)],
+                    key=scores.__getitem__,
+                )
+                scores[key] = scores[sub_key]
+                hands[key] = hands[sub_key]
+
+        for mask in range(len(self._flush_scores)):
+            if mask.bit_count() not in (6, 7):
+                continue
+            sub_mask = max(
+                [
+                    mask & ~(1 << i)
+                    for i in range(len(RANK_VALUES))
+                    if mask & (1 << i)
+                ],
+                key=self._flush_scores.__getitem__,
+            )
+            self._flush_scores[mask] = self._flush_scores[sub_mask]
+            self._flush_hands[mask] = self._flush_hands[sub_mask]
+
+    def evaluate(self, cards: Cards) -> Score:
+        """ Score of the best 5-card hand, 0 for less than 5 cards. """
+        return self.evaluate_ids([card.id for card in cards])
+
+    def evaluate_ids(self, card_ids: List[int]) -> Score:
+        if len(card_ids) < 5:
+            return 0
+
+        rank_keys, suits, bits = \
+            self._id_rank_keys, self._id_suits, self._id_bits
+        key = 0
+        suit_masks = [0, 0, 0, 0]
+        for i in card_ids:
+            key += rank_keys[i]
+            suit_masks[suits[i]] |= bits[i]
+
+        # With at most 7 cards a flush beats anything the rest can make.
+        for mask in suit_masks:
+            if mask.bit_count() >= 5:
+                return self._flush_scores[mask]
+
+        return self._rank_scores[key]
+
+    def evaluate_boards(
+        self,
+        hands: List[Sequence[int]],
+        boards: Iterable[Sequence[int]],
+    ) -> Iterator[List[Score]]:
+        """ Scores of every hand for each board, by card ids.
+
+            The board part of the lookup key is computed once per board,
+            so this is what runouts and simulations should use.
+            A board and a hand must make 5 to 7 cards together.
+        """
+        rank_keys, suits, bits = \
+            self._id_rank_keys, self._id_suits, self._id_bits
+        rank_scores, flush_scores = self._rank_scores, self._flush_scores
+        # Suit counts are packed in 4-bit fields, one field per suit.
+        suit_units = [1 << (4 * suit) for suit in suits]
+
+        hand_keys = []
+        hand_masks = []
+        for hand in hands:
+            hand_keys.append(sum(rank_keys[i] for i in hand))
+            suit_masks = [0, 0, 0, 0]
+            for i in hand:
+                suit_masks[suits[i]] |= bits[i]
+            hand_masks.append(suit_masks)
+
+        # A field gets its high bit when the board could make a flush.
+        flush_from = 5 - max(len(hand) for hand in hands)
+        flush_bias = sum((8 - flush_from) << (4 * s) for s in range(4))
+
+        for board in boards:
+            key = 0
+            suit_counts = 0
+            for i in board:
+                key += rank_keys[i]
+                suit_counts += suit_units[i]
+
+            if not (suit_counts + flush_bias) & 0x8888:
+                yield [rank_scores[key + k] for k in hand_keys]
+                continue
+
+            suit_masks = [0, 0, 0, 0]
+            for i in board:
+                suit_masks[suits[i]] |= bits[i]
+
+            scores = []
+            for (k, masks) in zip(hand_keys, hand_masks):
+                score = rank_scores[key + k]
+                for suit in range(4):
+                    mask = suit_masks[suit] | masks[suit]
+                    if mask.bit_count() >= 5:
+                        score = flush_scores[mask]
+                scores.append(score)
+            yield scores
+
+    def evaluate_hand(self, cards: Cards) -> Tuple[Score, Cards]:
+        """ Score and the best 5 cards in the order of the given cards,
+            (0, []) for less than 5 cards.
+        """
+        if len(cards) < 5:
+            return (0, [])
+
+        suit_masks = [0, 0, 0, 0]
+        key = 0
+        for card in cards:
+            key += self._id_rank_keys[card.id]
+            suit_masks[card.suit_index] |= card.rank_bit
+
+        for (suit, mask) in enumerate(suit_masks):
+            if mask.bit_count() >= 5:
+                best = self._flush_hands[mask]
+                return (self._flush_scores[mask], [
+                    card for card in cards
+                    if card.suit_index == suit and card.rank_bit & best
+                ])
+
+        # Take the ranks of the best key digit by digit, the suits do
+        # not matter without a flush.
+        best = self._rank_hands[key]
+        hand = []
+        for card in cards:
+            rank_key = self._id_rank_keys[card.id]
+            if best // rank_key % 5:
+                best -= rank_key
+                hand.append(card)
+        return (self._rank_scores[key], hand)
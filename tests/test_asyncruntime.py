@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from telegram import (
+    Bot,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InputMediaPhoto,
+)
+from telegram.error import BadRequest, RetryAfter
+
+from pokerapp.asyncruntime import AsyncBotApi, AsyncRequest, AsyncRuntime
+from pokerapp.chatscheduler import ChatTask, ChatTaskScheduler, TokenBucket
+from pokerapp.pokerbot import MessageDelayBot
+
+TIMEOUT = 5
+TOKEN = "123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi"
+
+
+class FakeBotApiHandler(BaseHTTPRequestHandler):
+    responses = {
+        "/bot/sendMessage": (200, {"ok": True, "result": {"message_id": 1}}),
+        "/bot/flood": (429, {
+            "ok": False,
+            "error_code": 429,
+            "description": "Too Many Requests",
+            "parameters": {"retry_after": 7},
+        }),
+        "/bot/bad": (400, {
+            "ok": False,
+            "error_code": 400,
+            "description": "Bad Request: chat not found",
+        }),
+    }
+    requests = []
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        self.requests.append(json.loads(self.rfile.read(length)))
+
+        (status, body) = self.responses[self.path]
+        body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAsyncBotApi(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBotApiHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.runtime = AsyncRuntime()
+        cls.runtime.start()
+        cls.api = AsyncBotApi(
+            base_url=f"http://127.0.0.1:{cls.server.server_port}/bot",
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.runtime.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_call(self):
+        markup = InlineKeyboardMarkup([[
+            InlineKeyboardButton(text="check", callback_data="check"),
+        ]])
+        result = self.runtime.run(self.api.call(
+            "sendMessage",
+            chat_id=-1,
+            text="turn",
+            reply_markup=markup,
+            reply_to_message_id=None,
+        ), TIMEOUT)
+
+        self.assertEqual({"message_id": 1}, result)
+        self.assertEqual({
+            "chat_id": -1,
+            "text": "turn",
+            "reply_markup": markup.to_dict(),
+        }, FakeBotApiHandler.requests[-1])
+
+    def test_errors(self):
+        with self.assertRaises(RetryAfter) as e:
+            self.runtime.run(self.api.call("flood"), TIMEOUT)
+        self.assertEqual(7, e.exception.retry_after)
+
+        with self.assertRaises(BadRequest):
+            self.runtime.run(self.api.call("bad"), TIMEOUT)
+
+
+class FakeMessageHandler(BaseHTTPRequestHandler):
+    message = {
+        "message_id": 5,
+        "date": 0,
+        "chat": {"id": -1, "type": "group"},
+        "dice": {"emoji": "🎲", "value": 3},
+    }
+    requests = []
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        self.requests.append(
+            (self.path, self.headers["Content-Type"], self.rfile.read(length)),
+        )
+
+        result = self.message
+        if self.path.endswith("/sendMediaGroup"):
+            result = [self.message]
+        body = json.dumps({"ok": True, "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        body = b"file " + self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def form_fields(content_type: str, body: bytes):
+    message = BytesParser().parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body,
+    )
+    return {
+        part.get_param("name", header="content-disposition"):
+            part.get_payload(decode=True)
+        for part in message.get_payload()
+    }
+
+
+class TestAsyncRequest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeMessageHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.runtime = AsyncRuntime()
+        cls.runtime.start()
+        cls.bot = Bot(
+            token=TOKEN,
+            base_url=f"http://127.0.0.1:{cls.server.server_port}/bot",
+            request=AsyncRequest(runtime=cls.runtime),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.runtime.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_json(self):
+        message = self.bot.send_dice(chat_id=-1)
+
+        self.assertEqual(3, message.dice.value)
+        (path, content_type, body) = FakeMessageHandler.requests[-1]
+        self.assertEqual(f"/bot{TOKEN}/sendDice", path)
+        self.assertEqual("application/json", content_type)
+        self.assertEqual("-1", json.loads(body)["chat_id"])
+
+    def test_upload(self):
+        self.bot.send_photo(chat_id=-1, photo=b"\x89PNG image")
+
+        (path, content_type, body) = FakeMessageHandler.requests[-1]
+        self.assertEqual(f"/bot{TOKEN}/sendPhoto", path)
+        self.assertTrue(content_type.startswith("multipart/form-data"))
+        fields = form_fields(content_type, body)
+        self.assertEqual(b"-1", fields["chat_id"])
+        self.assertEqual(b"\x89PNG image", fields["photo"])
+
+    def test_media_group_upload(self):
+        photo = BytesIO(b"\x89PNG desk")
+        photo.name = "desk.png"
+        (message,) = self.bot.send_media_group(
+            chat_id=-1,
+            media=[InputMediaPhoto(media=photo, caption="pot")],
+        )
+
+        self.assertEqual(5, message.message_id)
+        (path, content_type, body) = FakeMessageHandler.requests[-1]
+        self.assertEqual(f"/bot{TOKEN}/sendMediaGroup", path)
+        fields = form_fields(content_type, body)
+        (media,) = json.loads(fields["media"])
+        self.assertEqual("pot", media["caption"])
+        attached = media["media"][len("attach://"):]
+        self.assertEqual(b"\x89PNG desk", fields[attached])
+
+    def test_retrieve(self):
+        url = f"http://127.0.0.1:{self.server.server_port}/file/a"
+        self.assertEqual(b"file /file/a", self.bot.request.retrieve(url))
+
+    def test_message_delay_bot(self):
+        request = AsyncRequest(runtime=self.runtime)
+        bot = MessageDelayBot(
+            token=TOKEN,
+            base_url=f"http://127.0.0.1:{self.server.server_port}/bot",
+            request=request,
+            tasks_delay=0,
+        )
+        bot.run_tasks_manager()
+
+        message = bot.send_message(chat_id=-1, text="turn").result(TIMEOUT)
+        bot._scheduler.stop()
+
+        self.assertEqual(5, message.message_id)
+        (path, content_type, body) = FakeMessageHandler.requests[-1]
+        self.assertEqual(f"/bot{TOKEN}/sendMessage", path)
+        self.assertEqual({"chat_id": -1, "text": "turn"}, json.loads(body))
+
+    def test_blocking_call_on_loop(self):
+        async def get_me():
+            return self.bot.get_me()
+
+        with self.assertRaises(RuntimeError):
+            self.runtime.run(get_me(), TIMEOUT)
+
+
+class TestAsyncTasks(unittest.TestCase):
+    def test_sends_in_flight_are_not_limited_by_workers(self):
+        runtime = AsyncRuntime()
+        runtime.start()
+        scheduler = ChatTaskScheduler(
+            delay=0,
+            workers=1,
+            global_rate=1000,
+            global_burst=1000,
+            new_chat_bucket=lambda _: TokenBucket(rate=1, capacity=1),
+            runtime=runtime,
+        )
+        scheduler.start()
+
+        async def send():
+            await asyncio.sleep(0.2)
+            return True
+
+        start = time.monotonic()
+        futures = [
+            scheduler.add(chat_id, ChatTask(send))
+            for chat_id in range(50)
+        ]
+        self.assertTrue(all(f.result(TIMEOUT) for f in futures))
+        self.assertLess(time.monotonic() - start, 1)
+
+        scheduler.stop()
+        runtime.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
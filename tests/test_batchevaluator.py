@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+import unittest
+
+import numpy as np
+
+from pokerapp.batchevaluator import score_many
+from pokerapp.cards import Card
+from pokerapp.winnerdetermination import LookupEvaluator
+
+
+SAMPLE_SIZE = 100000
+
+
+class TestScoreMany(unittest.TestCase):
+    def assert_equal_to_lookup(self, hands: np.ndarray):
+        evaluator = LookupEvaluator.instance()
+        want = [evaluator.evaluate_ids(hand) for hand in hands.tolist()]
+        got = score_many(hands)
+        self.assertListEqual(want, got.tolist())
+
+    def test_random_hands(self):
+        rng = np.random.default_rng(42)
+        for size in (5, 6, 7):
+            hands = rng.random((SAMPLE_SIZE // 3, 52)) \
+                .argpartition(size, axis=1)[:, :size]
+            self.assert_equal_to_lookup(hands)
+
+    def test_rare_hands(self):
+        hands = [
+            "10♥ J♥ Q♥ K♥ A♥ 2♠ 2♣",  # Royal flush.
+            "9♥ 10♥ J♥ Q♥ K♥ A♥ 2♣",  # Royal flush over straight flush.
+            "A♥ 2♥ 3♥ 4♥ 5♥ 9♠ 9♣",  # Wheel is just a flush.
+            "A♠ 2♥ 3♦ 4♣ 5♥ 9♠ 10♣",  # Wheel is no straight.
+            "7♠ 7♥ 7♦ 7♣ 5♥ 5♠ 5♣",  # Four of a kind.
+            "7♠ 7♥ 7♦ 5♣ 5♥ 5♠ 2♣",  # Full house from two trips.
+            "7♠ 7♥ 5♦ 5♣ 3♥ 3♠ 2♣",  # Three pairs.
+        ]
+        ids = [[Card(c).id for c in hand.split()] for hand in hands]
+        self.assert_equal_to_lookup(np.array(ids))
+
+    def test_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            score_many(np.zeros((3, 4), dtype=np.int64))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image, ImageChops
+
+from pokerapp.cardatlas import CARD_ASSETS, CardAtlas
+from pokerapp.cards import Card
+
+
+class TestCardAtlas(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.atlas = CardAtlas.build(card_size=(42, 64))
+
+    def assertSameImage(self, expected: Image, actual: Image):
+        self.assertEqual(expected.size, actual.size)
+        self.assertIsNone(ImageChops.difference(expected, actual).getbbox())
+
+    def test_crop_card(self):
+        cards = self.atlas.crop_cards()
+
+        card = Card("Q♣")
+        with Image.open(CARD_ASSETS.joinpath("QC.jpg")) as im:
+            expected = im.convert("RGB").resize((42, 64))
+        self.assertSameImage(expected, cards[card.id])
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("atlas", "cards.png")
+            self.atlas.save(path)
+            loaded = CardAtlas.load(path)
+
+        self.assertEqual(self.atlas.card_size, loaded.card_size)
+        self.assertSameImage(self.atlas.image, loaded.image)
+
+    def test_build_other_card_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp).joinpath("cards.png")
+            self.atlas.save(path)
+
+            atlas = CardAtlas.load_or_build(path, card_size=(21, 32))
+
+        self.assertEqual((21, 32), atlas.card_size)
+        self.assertEqual((21 * 13, 32 * 4), atlas.image.size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pokerapp.cards import DECK, Card
+
+
+class TestCard(unittest.TestCase):
+    def test_interned(self):
+        card = Card("A♠")
+        self.assertIs(card, Card("A♠"))
+        self.assertIs(card, Card.from_id(card.id))
+        self.assertEqual(52, len({c.id for c in DECK}))
+
+    def test_outlined_suit(self):
+        card = Card("A♤")
+        self.assertIs(Card("A♠"), card)
+        self.assertEqual(("A♠", "♠"), (str(card), card.suit))
+
+    def test_unknown(self):
+        for text in ("1♠", "A", "", "1♤", "A♤♤"):
+            with self.assertRaises(ValueError):
+                Card(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+import unittest
+from types import SimpleNamespace
+
+from pokerapp.chatcache import ChatMetadataCache
+
+
+class CountingBot:
+    def __init__(self):
+        self.calls = []
+        self.members_count = 3
+
+    def get_chat_member_count(self, chat_id):
+        self.calls.append(("get_chat_member_count", chat_id))
+        return self.members_count
+
+    def get_chat_administrators(self, chat_id):
+        self.calls.append(("get_chat_administrators", chat_id))
+        return [SimpleNamespace(user=SimpleNamespace(id=7))]
+
+
+class InvalidatingBot(CountingBot):
+    """ Members change while the count is asked. """
+
+    def __init__(self):
+        super().__init__()
+        self.cache = None
+
+    def get_chat_member_count(self, chat_id):
+        count = super().get_chat_member_count(chat_id)
+        if len(self.calls) == 1:
+            self.cache.invalidate(chat_id)
+        return count
+
+
+class TestChatMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self._now = 0
+        self._bot = CountingBot()
+        self._cache = ChatMetadataCache(
+            bot=self._bot,
+            ttl=60,
+            max_chats=2,
+            clock=lambda: self._now,
+        )
+
+    def test_member_count_ttl(self):
+        self.assertEqual(3, self._cache.member_count(-1))
+        self._bot.members_count = 4
+        self._now = 59
+        self.assertEqual(3, self._cache.member_count(-1))
+        self._now = 60
+        self.assertEqual(4, self._cache.member_count(-1))
+        self.assertEqual(2, len(self._bot.calls))
+
+    def test_is_admin(self):
+        self.assertTrue(self._cache.is_admin(-1, 7))
+        self.assertFalse(self._cache.is_admin(-1, 8))
+        self.assertEqual(
+            [("get_chat_administrators", -1)],
+            self._bot.calls,
+        )
+
+    def test_invalidate(self):
+        self._cache.member_count(-1)
+        self._cache.member_count(-2)
+        self._bot.members_count = 4
+
+        self._cache.invalidate(-1)
+
+        self.assertEqual(4, self._cache.member_count(-1))
+        self.assertEqual(3, self._cache.member_count(-2))
+
+    def test_invalidate_while_fetching(self):
+        bot = InvalidatingBot()
+        cache = ChatMetadataCache(bot=bot, ttl=60)
+        bot.cache = cache
+
+        cache.member_count(-1)
+        cache.member_count(-1)
+
+        self.assertEqual(2, len(bot.calls))
+
+    def test_both_values_of_chat_count_once(self):
+        self._cache.member_count(-1)
+        self._cache.administrators(-1)
+        self._cache.member_count(-2)
+        self._cache.administrators(-2)
+        self._bot.calls.clear()
+
+        self._cache.member_count(-1)
+        self._cache.administrators(-2)
+
+        self.assertEqual([], self._bot.calls)
+
+    def test_evicts_least_recently_used(self):
+        self._cache.member_count(-1)
+        self._cache.member_count(-2)
+        self._cache.member_count(-1)
+        self._cache.member_count(-3)
+        self._bot.calls.clear()
+
+        self._cache.member_count(-1)
+        self._cache.member_count(-2)
+
+        self.assertEqual(
+            [("get_chat_member_count", -2)],
+            self._bot.calls,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
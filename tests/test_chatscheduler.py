@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import multiprocessing
+import threading
+import time
+import unittest
+
+from telegram.error import BadRequest, RetryAfter, TimedOut
+
+from pokerapp.chatscheduler import (
+    MAX_MESSAGE_LENGTH,
+    ChatTask,
+    ChatTaskScheduler,
+    SharedTokenBucket,
+    TokenBucket,
+)
+
+DELAY = 0.05
+TIMEOUT = 5
+
+
+class TestChatTaskScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = ChatTaskScheduler(
+            delay=DELAY,
+            workers=4,
+            new_chat_bucket=lambda _: TokenBucket(rate=100, capacity=1),
+        )
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_delay_between_tasks_of_chat(self):
+        futures = [
+            self.scheduler.add(1, time.monotonic)
+            for _ in range(3)
+        ]
+        times = [f.result(TIMEOUT) for f in futures]
+
+        self.assertEqual(times, sorted(times))
+        for (prev, cur) in zip(times, times[1:]):
+            self.assertGreaterEqual(cur - prev, DELAY)
+
+    def test_slow_chat_does_not_block_others(self):
+        release = threading.Event()
+        slow = self.scheduler.add(1, lambda: release.wait(TIMEOUT))
+
+        fast = [self.scheduler.add(chat_id, lambda: True)
+                for chat_id in range(2, 5)]
+        for f in fast:
+            self.assertTrue(f.result(TIMEOUT))
+        self.assertFalse(slow.done())
+
+        release.set()
+        self.assertTrue(slow.result(TIMEOUT))
+
+    def test_retry_on_timeout(self):
+        calls = []
+
+        def task():
+            calls.append(1)
+            if len(calls) == 1:
+                raise TimedOut()
+            return len(calls)
+
+        self.assertEqual(2, self.scheduler.add(1, task).result(TIMEOUT))
+
+    def test_bad_request_is_not_retried(self):
+        def task():
+            raise BadRequest("Wrong file identifier")
+
+        future = self.scheduler.add(1, task)
+        with self.assertRaises(BadRequest):
+            future.result(TIMEOUT)
+
+    def test_retry_after(self):
+        times = []
+
+        def task():
+            times.append(time.monotonic())
+            if len(times) == 1:
+                raise RetryAfter(0.2)
+
+        self.scheduler.add(1, task).result(TIMEOUT)
+        self.assertGreaterEqual(times[1] - times[0], 0.2)
+
+    def test_merge_queued_messages(self):
+        sent = []
+        release = threading.Event()
+        self.scheduler.add(1, lambda: release.wait(TIMEOUT))
+
+        def send(**kwargs):
+            sent.append(kwargs)
+            return len(sent)
+
+        futures = [
+            self.scheduler.add(1, ChatTask(
+                send, {"chat_id": 1, "text": text}, mergeable=True,
+            ))
+            for text in ("fold", "turn")
+        ]
+        release.set()
+
+        self.assertEqual([1, 1], [f.result(TIMEOUT) for f in futures])
+        self.assertEqual([{"chat_id": 1, "text": "fold\n\nturn"}], sent)
+
+
+class TestChatTask(unittest.TestCase):
+    @staticmethod
+    def _message(text: str, **kwargs) -> ChatTask:
+        return ChatTask(print, {"text": text, **kwargs}, mergeable=True)
+
+    def test_only_last_message_has_markup(self):
+        first = self._message("a", reply_markup="keyboard")
+        self.assertFalse(first.merge(self._message("b")))
+
+        first = self._message("a")
+        self.assertTrue(first.merge(self._message("b", reply_markup="kb")))
+        self.assertEqual("kb", first.kwargs["reply_markup"])
+        self.assertEqual(2, len(first.futures))
+
+    def test_do_not_merge(self):
+        first = self._message("a", parse_mode="Markdown")
+        self.assertFalse(first.merge(self._message("b")))
+        self.assertFalse(first.merge(ChatTask(print)))
+
+        first = self._message("a" * (MAX_MESSAGE_LENGTH - 2))
+        self.assertFalse(first.merge(self._message("b")))
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rate(self):
+        bucket = TokenBucket(rate=2, capacity=2)
+        now = time.monotonic()
+
+        bucket.take(now)
+        bucket.take(now)
+        self.assertAlmostEqual(0.5, bucket.wait_time(now))
+        self.assertEqual(0, bucket.wait_time(now + 0.5))
+
+    def test_shared(self):
+        state = SharedTokenBucket.new_state(multiprocessing, 2)
+        first = SharedTokenBucket(rate=2, capacity=2, state=state)
+        second = SharedTokenBucket(rate=2, capacity=2, state=state)
+        now = time.monotonic()
+
+        first.take(now)
+        second.take(now)
+        self.assertAlmostEqual(0.5, first.wait_time(now))
+        self.assertAlmostEqual(0.5, second.wait_time(now))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+import unittest
+from io import BytesIO
+
+from PIL import Image
+
+from pokerapp.cards import Cards, DECK
+from pokerapp.desk import DeskImageCache, DeskImageGenerator, ImageFormat
+
+
+class CountingGenerator:
+    def __init__(self):
+        self.rendered = 0
+
+    def render(self, cards: Cards) -> bytes:
+        self.rendered += 1
+        return "".join(cards).encode("utf-8")
+
+
+class TestDeskImageCache(unittest.TestCase):
+    def test_render_once(self):
+        generator = CountingGenerator()
+        cache = DeskImageCache(generator=generator)
+
+        first = cache.get(DECK[:5])
+        second = cache.get(list(DECK[:5]))
+
+        self.assertIs(first, second)
+        self.assertEqual(1, generator.rendered)
+
+    def test_order_matters(self):
+        generator = CountingGenerator()
+        cache = DeskImageCache(generator=generator)
+
+        cache.get(DECK[:2])
+        cache.get(DECK[1::-1])
+
+        self.assertEqual(2, generator.rendered)
+
+    def test_evict_least_recently_used(self):
+        generator = CountingGenerator()
+        image_size = len(generator.render(DECK[:2]))
+        cache = DeskImageCache(generator=generator, max_bytes=2 * image_size)
+
+        cache.get(DECK[0:2])
+        cache.get(DECK[2:4])
+        cache.get(DECK[0:2])
+        cache.get(DECK[4:6])
+        self.assertEqual(2, len(cache))
+        self.assertLessEqual(cache.size, 2 * image_size)
+
+        generator.rendered = 0
+        cache.get(DECK[0:2])
+        self.assertEqual(0, generator.rendered)
+        cache.get(DECK[2:4])
+        self.assertEqual(1, generator.rendered)
+
+
+class TestDeskImageGenerator(unittest.TestCase):
+    def test_image_formats(self):
+        expected = {
+            ImageFormat.PNG: ("PNG", "RGBA"),
+            ImageFormat.PNG_PALETTE: ("PNG", "P"),
+            ImageFormat.JPEG: ("JPEG", "RGB"),
+            ImageFormat.WEBP: ("WEBP", "RGBA"),
+        }
+        generator = DeskImageGenerator()
+        for (image_format, (name, mode)) in expected.items():
+            generator.image_format = image_format
+            im = Image.open(BytesIO(generator.render(DECK[:2])))
+
+            self.assertEqual(name, im.format)
+            self.assertEqual(mode, im.mode)
+            self.assertEqual((84 * 2 + 10, 128), im.size)
+
+
+if __name__ == '__main__':
+    unittest.main()
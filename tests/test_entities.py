@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pokerapp.entities import Game, Player, PlayerState, SeatRing
+
+
+def new_players(*states: PlayerState):
+    players = []
+    for (user_id, state) in enumerate(states):
+        player = Player(
+            user_id=user_id,
+            mention_markdown="@" + str(user_id),
+            wallet=None,
+            ready_message_id="",
+        )
+        player.state = state
+        players.append(player)
+    return players
+
+
+class TestSeatRing(unittest.TestCase):
+    def test_next_active(self):
+        seats = SeatRing(new_players(
+            PlayerState.ACTIVE,
+            PlayerState.FOLD,
+            PlayerState.ACTIVE,
+            PlayerState.ALL_IN,
+        ))
+
+        self.assertEqual(2, len(seats))
+        self.assertEqual(3, seats.in_game_count)
+        self.assertEqual(2, seats.next_active(0))
+        self.assertEqual(2, seats.next_active(1))
+        self.assertEqual(0, seats.next_active(2))
+        self.assertEqual(0, seats.next_active(3))
+        self.assertEqual(0, seats.first_active(0))
+        self.assertEqual(2, seats.first_active(1))
+
+    def test_set_state(self):
+        players = new_players(*[PlayerState.ACTIVE] * 4)
+        seats = SeatRing(players)
+
+        seats.set_state(players[1], PlayerState.FOLD)
+        seats.set_state(players[2], PlayerState.ALL_IN)
+
+        self.assertEqual(PlayerState.FOLD, players[1].state)
+        self.assertEqual(2, len(seats))
+        self.assertEqual(3, seats.in_game_count)
+        self.assertEqual(3, seats.next_active(0))
+        self.assertEqual(3, seats.next_active(1))
+        self.assertEqual(0, seats.next_active(3))
+
+        seats.set_state(players[3], PlayerState.FOLD)
+        self.assertEqual(0, seats.next_active(0))
+        self.assertEqual(0, seats.next_active(1))
+
+        seats.set_state(players[0], PlayerState.ALL_IN)
+        self.assertEqual(0, len(seats))
+        self.assertIsNone(seats.next_active(0))
+
+    def test_passes(self):
+        self.assertTrue(SeatRing.passes(start=1, seat=2, stop=3))
+        self.assertTrue(SeatRing.passes(start=1, seat=3, stop=3))
+        self.assertFalse(SeatRing.passes(start=1, seat=1, stop=3))
+        self.assertTrue(SeatRing.passes(start=3, seat=0, stop=1))
+        self.assertFalse(SeatRing.passes(start=3, seat=2, stop=1))
+        self.assertTrue(SeatRing.passes(start=2, seat=2, stop=2))
+
+    def test_game_seats(self):
+        game = Game()
+        game.players = new_players(PlayerState.ACTIVE, PlayerState.FOLD)
+
+        self.assertIs(game.seats, game.seats)
+        self.assertEqual(1, len(game.seats))
+
+        game.reset()
+        self.assertEqual(0, len(game.seats))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pokerapp.cards import Card
+from pokerapp.equity import EquityCalculator
+from pokerapp.winnerdetermination import LookupEvaluator
+
+
+def parse(cards: str):
+    return [Card(c) for c in cards.split()]
+
+
+class TestEquityCalculator(unittest.TestCase):
+    def test_river_is_decided(self):
+        calc = EquityCalculator()
+        got = calc.calculate(
+            hands=[parse("A♥ A♠"), parse("K♥ K♠")],
+            cards_table=parse("2♦ 7♣ 9♥ J♠ 3♣"),
+        )
+
+        self.assertEqual((1, 0, 0), (got[0].win, got[0].tie, got[0].lose))
+        self.assertEqual((0, 0, 1), (got[1].win, got[1].tie, got[1].lose))
+
+    def test_turn_is_enumerated(self):
+        hands = [parse("A♥ K♥"), parse("Q♠ Q♣")]
+        table = parse("2♥ 7♥ Q♦ 3♣")
+
+        evaluator = LookupEvaluator.instance()
+        known = hands[0] + hands[1] + table
+        wins = 0
+        rivers = [c for c in map(Card.from_id, range(52)) if c not in known]
+        for river in rivers:
+            first = evaluator.evaluate(hands[0] + table + [river])
+            second = evaluator.evaluate(hands[1] + table + [river])
+            wins += first > second
+
+        got = EquityCalculator().calculate(hands=hands, cards_table=table)
+        self.assertAlmostEqual(wins / len(rivers), got[0].win)
+        self.assertAlmostEqual(1 - wins / len(rivers), got[1].win)
+
+    def test_pre_flop_is_sampled(self):
+        calc = EquityCalculator(trials=20000)
+        got = calc.calculate(
+            hands=[parse("A♥ A♠"), parse("K♥ K♠")],
+            cards_table=[],
+        )
+
+        for equity in got:
+            self.assertAlmostEqual(
+                1, equity.win + equity.tie + equity.lose, places=6,
+            )
+        self.assertAlmostEqual(0.82, got[0].win, delta=0.02)
+        self.assertAlmostEqual(got[0].tie, got[1].tie)
+
+
+if __name__ == '__main__':
+    unittest.main()
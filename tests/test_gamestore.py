@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pokerapp.cards import Card
+from pokerapp.config import Config
+from pokerapp.entities import Game, GameState, Player, PlayerState
+from pokerapp.gamestore import (
+    GameLocked,
+    GameStore,
+    GameVersionConflict,
+    dumps_game,
+    loads_game,
+)
+from pokerapp.kvstore import connect
+from pokerapp.pokerbotmodel import KEY_CHAT_DATA_GAME, KEY_OLD_PLAYERS
+
+
+def new_game() -> Game:
+    game = Game()
+    game.state = GameState.ROUND_FLOP
+    game.pot = 120
+    game.max_round_rate = 40
+    game.current_player_index = 1
+    game.trading_end_user_id = 2
+    game.ready_users = {1, 2}
+    for _ in range(3):
+        game.cards_table.append(game.remain_cards.pop())
+
+    for user_id in (1, 2):
+        player = Player(
+            user_id=user_id,
+            mention_markdown=f"[Игрок {user_id}](tg://user?id={user_id})",
+            wallet=None,
+            ready_message_id=user_id + 100,
+        )
+        player.cards = [game.remain_cards.pop(), game.remain_cards.pop()]
+        player.round_rate = 20 * user_id
+        game.players.append(player)
+    game.players[0].state = PlayerState.FOLD
+    return game
+
+
+class TestGameSerializer(unittest.TestCase):
+    def test_dumps_loads(self):
+        game = new_game()
+
+        (loaded, old_players) = loads_game(
+            dumps_game(game, old_players=[2, 1]),
+            new_wallet=lambda user_id: "wallet" + str(user_id),
+        )
+
+        self.assertEqual([2, 1], old_players)
+        for attr in (
+            "id", "pot", "max_round_rate", "state", "current_player_index",
+            "trading_end_user_id", "ready_users", "last_turn_time",
+            "cards_table", "remain_cards",
+        ):
+            self.assertEqual(getattr(game, attr), getattr(loaded, attr))
+        self.assertIsInstance(loaded.cards_table[0], Card)
+
+        for (p, lp) in zip(game.players, loaded.players):
+            for attr in (
+                "user_id", "mention_markdown", "state", "cards",
+                "round_rate", "ready_message_id",
+            ):
+                self.assertEqual(getattr(p, attr), getattr(lp, attr))
+            self.assertEqual("wallet" + str(p.user_id), lp.wallet)
+
+    def test_empty_ready_message_id(self):
+        game = Game()
+        game.players.append(Player(
+            user_id=1,
+            mention_markdown="@1",
+            wallet=None,
+            ready_message_id="",
+        ))
+
+        (loaded, _) = loads_game(dumps_game(game), lambda _: None)
+        self.assertEqual("", loaded.players[0].ready_message_id)
+
+
+class TestGameStore(unittest.TestCase):
+    def setUp(self):
+        cfg: Config = Config()
+        self._kv = connect(cfg)
+        self._store = GameStore(self._kv, lock_wait=0)
+        self._chat_id = "game_store_test"
+        self._kv.delete(
+            self._store._key(self._chat_id),
+            self._store._lock_key(self._chat_id),
+        )
+
+    def test_store_load(self):
+        chat_data = {KEY_CHAT_DATA_GAME: new_game(), KEY_OLD_PLAYERS: [1]}
+        self._store.load(self._chat_id, chat_data)
+        self._store.store(self._chat_id, chat_data)
+
+        loaded = {}
+        self._store.load(self._chat_id, loaded)
+        self.assertEqual(
+            chat_data[KEY_CHAT_DATA_GAME].id,
+            loaded[KEY_CHAT_DATA_GAME].id,
+        )
+        self.assertEqual([1], loaded[KEY_OLD_PLAYERS])
+
+    def test_version_conflict(self):
+        first = {KEY_CHAT_DATA_GAME: new_game()}
+        second = {KEY_CHAT_DATA_GAME: new_game()}
+        self._store.load(self._chat_id, first)
+        self._store.load(self._chat_id, second)
+
+        self._store.store(self._chat_id, first)
+        with self.assertRaises(GameVersionConflict):
+            self._store.store(self._chat_id, second)
+
+    def test_lock(self):
+        first = {}
+        second = {}
+        self._store.lock(self._chat_id, first)
+        with self.assertRaises(GameLocked):
+            self._store.lock(self._chat_id, second)
+
+        self._store.release(self._chat_id, first)
+        self._store.lock(self._chat_id, second)
+        # An expired owner must not release the lock of another one.
+        first["game_lock"] = "expired"
+        self._store.release(self._chat_id, first)
+        with self.assertRaises(GameLocked):
+            self._store.lock(self._chat_id, first)
+        self._store.release(self._chat_id, second)
+
+
+if __name__ == '__main__':
+    unittest.main()
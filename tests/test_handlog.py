@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+import uuid
+
+from pokerapp.cards import Card
+from pokerapp.entities import GameState, PlayerState
+from pokerapp.handlog import (
+    Event,
+    EventType,
+    HandLog,
+    pack_event,
+    read_events,
+    replay_hands,
+    showdown_scores,
+)
+
+
+def hand_events(game_id: str, chat_id: int = -100, time: float = 1.5):
+    def event(event_type, user_id=0, amount=0, cards=()):
+        return Event(event_type, game_id, time, user_id, amount, cards)
+
+    return [
+        event(EventType.HAND_START, user_id=chat_id),
+        event(EventType.DEAL, 1, cards=(Card("A♠"), Card("A♥"))),
+        event(EventType.DEAL, 2, cards=(Card("2♠"), Card("7♥"))),
+        event(EventType.DEAL, 3, cards=(Card("K♠"), Card("K♥"))),
+        event(EventType.BLIND, 1, 5),
+        event(EventType.BLIND, 2, 10),
+        event(EventType.CALL, 3, 10),
+        event(EventType.FOLD, 1),
+        event(EventType.CHECK, 2),
+        event(EventType.BOARD, cards=(Card("3♦"), Card("9♣"), Card("J♦"))),
+        event(EventType.BET, 2, 25),
+        event(EventType.ALL_IN, 3, 100),
+        event(EventType.CALL, 2, 75),
+        event(EventType.BOARD, cards=(Card("4♣"),)),
+        event(EventType.BOARD, cards=(Card("5♥"),)),
+        event(EventType.WIN, 3, 225),
+        event(EventType.HAND_END, amount=225),
+    ]
+
+
+class TestHandLog(unittest.TestCase):
+    def setUp(self):
+        (fd, self._path) = tempfile.mkstemp()
+        os.close(fd)
+        self._game_id = str(uuid.uuid4())
+
+    def tearDown(self):
+        os.remove(self._path)
+
+    def test_write_read(self):
+        events = hand_events(self._game_id)
+        log = HandLog(self._path)
+        for event in events:
+            log.append(event)
+        log.close()
+
+        self.assertEqual(events, list(read_events(self._path)))
+
+    def test_torn_record(self):
+        events = hand_events(self._game_id)
+        with open(self._path, "wb") as f:
+            for event in events:
+                f.write(pack_event(event))
+            f.write(pack_event(events[0])[:-3])
+
+        self.assertEqual(events, list(read_events(self._path)))
+
+    def test_append_after_torn_record(self):
+        events = hand_events(self._game_id)
+        with open(self._path, "wb") as f:
+            for event in events[:3]:
+                f.write(pack_event(event))
+            f.write(pack_event(events[3])[:-3])
+
+        log = HandLog(self._path)
+        for event in events[3:]:
+            log.append(event)
+        log.close()
+
+        self.assertEqual(events, list(read_events(self._path)))
+
+    def test_replay(self):
+        other_id = str(uuid.uuid4())
+        # The start of the other hand is not in the log.
+        events = [Event(EventType.CALL, other_id, 1.0, 5, 10)]
+        events += hand_events(self._game_id)
+
+        (hand,) = replay_hands(events)
+        game = hand.game
+
+        self.assertEqual(-100, hand.chat_id)
+        self.assertEqual(self._game_id, game.id)
+        self.assertEqual(GameState.FINISHED, game.state)
+        self.assertEqual(225, game.pot)
+        self.assertEqual(5, len(game.cards_table))
+        self.assertEqual({3: 225}, hand.winnings)
+        self.assertEqual(
+            [PlayerState.FOLD, PlayerState.ACTIVE, PlayerState.ALL_IN],
+            [p.state for p in game.players],
+        )
+
+        scores = showdown_scores(hand)
+        self.assertEqual({2, 3}, set(scores))
+        self.assertGreater(scores[3], scores[2])
+
+    def test_new_hand_drops_open_one(self):
+        open_id = str(uuid.uuid4())
+        other_id = str(uuid.uuid4())
+        # Hands without an end in this chat and another one.
+        events = hand_events(open_id)[:-1]
+        events += hand_events(other_id, chat_id=-200)[:5]
+        events += hand_events(self._game_id)
+        # Late events of the dropped hand are skipped.
+        events += hand_events(open_id)[-1:]
+        events += hand_events(other_id, chat_id=-200)[5:]
+
+        hands = list(replay_hands(events))
+
+        self.assertEqual(
+            [self._game_id, other_id],
+            [hand.game.id for hand in hands],
+        )
+
+    def test_old_open_hand_dropped(self):
+        open_id = str(uuid.uuid4())
+        events = hand_events(open_id, chat_id=-200)[:-1]
+        events += hand_events(self._game_id, time=100)
+        events += hand_events(open_id, chat_id=-200, time=100)[-1:]
+
+        hands = list(replay_hands(events, max_age=60))
+
+        self.assertEqual([self._game_id], [hand.game.id for hand in hands])
+
+
+if __name__ == '__main__':
+    unittest.main()
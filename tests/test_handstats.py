@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+import uuid
+
+from pokerapp.cards import Card
+from pokerapp.handlog import Event, EventType, pack_event, read_hands
+from pokerapp.handstats import HandStats, Pot, collect
+
+
+def cards(text: str):
+    return tuple(Card(c) for c in text.split())
+
+
+def showdown_hand(chat_id: int, winner: int):
+    """ 1 raises, 2 calls, 3 folds and 1 or 2 gets the pot of 40$.
+        2 has the best hand.
+    """
+    game_id = str(uuid.uuid4())
+
+    def event(event_type, user_id=0, amount=0, board=""):
+        return Event(event_type, game_id, 0.0, user_id, amount, cards(board))
+
+    return [
+        event(EventType.HAND_START, user_id=chat_id),
+        event(EventType.DEAL, 1, board="A♠ K♠"),
+        event(EventType.DEAL, 2, board="9♦ 9♥"),
+        event(EventType.DEAL, 3, board="2♣ 7♣"),
+        event(EventType.BLIND, 1, 5),
+        event(EventType.BLIND, 2, 10),
+        event(EventType.RAISE, 1, 15),
+        event(EventType.CALL, 2, 10),
+        event(EventType.FOLD, 3),
+        event(EventType.BOARD, board="9♠ 4♦ J♥"),
+        event(EventType.CHECK, 2),
+        event(EventType.CHECK, 1),
+        event(EventType.BOARD, board="3♠"),
+        event(EventType.BOARD, board="5♥"),
+        event(EventType.WIN, winner, 40),
+        event(EventType.HAND_END, amount=40),
+    ]
+
+
+def fold_hand(chat_id: int, pot: int):
+    """ 3 bets the pot and the others fold. """
+    game_id = str(uuid.uuid4())
+    return [
+        Event(EventType.HAND_START, game_id, 0.0, chat_id),
+        Event(EventType.DEAL, game_id, 0.0, 1, 0, cards("2♠ 3♠")),
+        Event(EventType.DEAL, game_id, 0.0, 3, 0, cards("4♠ 5♠")),
+        Event(EventType.BET, game_id, 0.0, 3, pot),
+        Event(EventType.FOLD, game_id, 0.0, 1),
+        Event(EventType.WIN, game_id, 0.0, 3, pot),
+        Event(EventType.HAND_END, game_id, 0.0, 0, pot),
+    ]
+
+
+class TestHandStats(unittest.TestCase):
+    def setUp(self):
+        self._paths = []
+
+    def tearDown(self):
+        for path in self._paths:
+            os.remove(path)
+
+    def write_log(self, events) -> str:
+        (fd, path) = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            for event in events:
+                f.write(pack_event(event))
+        self._paths.append(path)
+        return path
+
+    def test_players(self):
+        path = self.write_log(
+            showdown_hand(-1, winner=2) + fold_hand(-1, pot=100),
+        )
+        stats = collect([path])
+
+        self.assertEqual(2, stats.hands)
+        p1 = stats.players[1]
+        self.assertEqual((2, 1), (p1.hands, p1.vpip_hands))
+        self.assertEqual((1, 0), (p1.aggressive_actions, p1.calls))
+        self.assertEqual((0, -20), (p1.won_hands, p1.net))
+        self.assertEqual((1, 0), (p1.showdowns, p1.showdown_wins))
+
+        p2 = stats.players[2]
+        self.assertEqual(1.0, p2.vpip)
+        self.assertEqual(0.0, p2.aggression)
+        self.assertEqual(1.0, p2.win_rate)
+        self.assertEqual((1, 1), (p2.showdowns, p2.showdown_wins))
+        self.assertEqual(20, p2.net)
+
+        p3 = stats.players[3]
+        self.assertEqual(0.5, p3.vpip)
+        self.assertEqual(1.0, p3.aggression)
+        self.assertEqual(0, p3.net)
+        self.assertEqual(0, stats.mismatches)
+
+    def test_mismatch(self):
+        path = self.write_log(showdown_hand(-1, winner=1))
+        self.assertEqual(1, collect([path]).mismatches)
+
+    def test_chats_and_pots(self):
+        events = []
+        for pot in (30, 500, 70, 200):
+            events += fold_hand(-2, pot)
+        events += showdown_hand(-1, winner=2)
+        stats = collect([self.write_log(events)], top_pots=2)
+
+        self.assertEqual(
+            [(1, 40), (4, 800)],
+            sorted((c.hands, c.volume) for c in stats.chats.values()),
+        )
+        self.assertEqual(
+            [500, 200],
+            [pot.amount for pot in stats.biggest_pots()],
+        )
+        self.assertIsInstance(stats.biggest_pots()[0], Pot)
+
+    def test_showdown_batches(self):
+        events = []
+        for _ in range(5):
+            events += showdown_hand(-1, winner=2)
+        stats = HandStats(showdown_batch=4)
+        for hand in read_hands([self.write_log(events)]):
+            stats.add(hand)
+        self.assertEqual(4, stats.players[2].showdown_wins)
+        stats.flush()
+        self.assertEqual(5, stats.players[2].showdown_wins)
+
+    def test_processes(self):
+        paths = [
+            self.write_log(showdown_hand(-1, winner=2)),
+            self.write_log(fold_hand(-2, pot=100) + fold_hand(-2, pot=10)),
+        ]
+        sequential = collect(paths, top_pots=2)
+        parallel = collect(paths, processes=2, top_pots=2)
+
+        self.assertEqual(sequential.hands, parallel.hands)
+        self.assertEqual(
+            {u: vars(p) for (u, p) in sequential.players.items()},
+            {u: vars(p) for (u, p) in parallel.players.items()},
+        )
+        self.assertEqual(sequential.biggest_pots(), parallel.biggest_pots())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+
+from pokerapp.gamestore import STORE_GAME_SCRIPT
+from pokerapp.kvstore import MemoryKV
+from pokerapp.pokerbotmodel import WALLET_AUTHORIZE_SCRIPT
+
+
+class TestMemoryKV(unittest.TestCase):
+    def setUp(self):
+        self._kv = MemoryKV()
+
+    def test_strings(self):
+        self.assertTrue(self._kv.set("a", 1))
+        self.assertIsNone(self._kv.set("a", 2, nx=True))
+        self.assertEqual(b"1", self._kv.get("a"))
+        self.assertEqual(6, self._kv.incrby("a", 5))
+        self.assertEqual(-2, self._kv.incrby("b", -2))
+        self.assertEqual([b"6", b"-2", None], self._kv.mget(["a", "b", "c"]))
+        self.assertEqual(2, self._kv.delete("a", "b", "c"))
+        self.assertIsNone(self._kv.get("a"))
+
+    def test_lists(self):
+        self.assertEqual(2, self._kv.rpush("l", 1, "2"))
+        self.assertEqual(b"2", self._kv.rpop("l"))
+        self.assertEqual(b"1", self._kv.rpop("l"))
+        self.assertIsNone(self._kv.rpop("l"))
+
+    def test_lrange(self):
+        self._kv.rpush("l", 1, 2, 3)
+        self.assertEqual([b"1", b"2", b"3"], self._kv.lrange("l", 0, -1))
+        self.assertEqual([b"2"], self._kv.lrange("l", 1, 1))
+        self.assertEqual([b"1", b"2"], self._kv.lrange("l", 0, -2))
+        self.assertEqual([b"2", b"3"], self._kv.lrange("l", -2, -1))
+        self.assertEqual([], self._kv.lrange("l", 0, -5))
+        self.assertEqual([b"1", b"2", b"3"], self._kv.lrange("l", -9, 9))
+
+    def test_hashes(self):
+        self.assertEqual(2, self._kv.hset("h", mapping={"a": 1, "b": b"2"}))
+        self.assertEqual(
+            [b"1", b"2", None],
+            self._kv.hmget("h", "a", "b", "c"),
+        )
+
+    def test_expire(self):
+        self._kv.set("a", 1)
+        self.assertTrue(self._kv.expire("a", 0))
+        self.assertIsNone(self._kv.get("a"))
+        self.assertFalse(self._kv.expire("a", 10))
+        self.assertTrue(self._kv.set("a", 1, ex=0))
+        self.assertIsNone(self._kv.get("a"))
+
+    def test_pipeline(self):
+        pipe = self._kv.pipeline(transaction=True)
+        pipe.incrby("a", 1)
+        pipe.incrby("a", 2)
+        pipe.delete("b")
+        self.assertEqual([1, 3, 0], pipe.execute())
+
+    def test_script(self):
+        authorize = self._kv.register_script(WALLET_AUTHORIZE_SCRIPT)
+        self._kv.set("wallet", 100)
+
+        self.assertEqual(60, authorize(keys=["wallet", "game"], args=[40]))
+        self.assertIsNone(authorize(keys=["wallet", "game"], args=[61]))
+        self.assertEqual(b"40", self._kv.get("game"))
+
+
+class TestAppendOnlyFile(unittest.TestCase):
+    def setUp(self):
+        (fd, self._path) = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self._path)
+
+    def test_replay(self):
+        kv = MemoryKV(aof_path=self._path)
+        kv.set("a", "x")
+        kv.incrby("b", 3)
+        kv.rpush("l", 1, 2)
+        kv.rpop("l")
+        kv.delete("a")
+        store = kv.register_script(STORE_GAME_SCRIPT)
+        store(keys=["g"], args=[0, b"\x00\r\n\xff", 60])
+        pipe = kv.pipeline()
+        pipe.incrby("b", 1)
+        pipe.set("c", 1)
+        pipe.execute()
+        kv.close()
+
+        kv = MemoryKV(aof_path=self._path)
+        self.assertIsNone(kv.get("a"))
+        self.assertEqual(b"4", kv.get("b"))
+        self.assertEqual(b"1", kv.get("c"))
+        self.assertEqual(b"1", kv.rpop("l"))
+        self.assertEqual(
+            [b"1", b"\x00\r\n\xff"],
+            kv.hmget("g", "version", "data"),
+        )
+        kv.close()
+
+    def test_rewrite_on_load(self):
+        kv = MemoryKV(aof_path=self._path)
+        for i in range(100):
+            kv.set("a", i)
+            kv.rpush("l", i)
+            kv.rpop("l")
+        kv.rpush("l", "x", "y")
+        kv.hset("h", mapping={"f": 1})
+        kv.set("e", 1)
+        kv.expire("e", 60)
+        kv.close()
+        size = os.path.getsize(self._path)
+
+        kv = MemoryKV(aof_path=self._path)
+        kv.incrby("b", 1)
+        kv.close()
+        self.assertLess(os.path.getsize(self._path), size / 10)
+
+        kv = MemoryKV(aof_path=self._path)
+        self.assertEqual(b"99", kv.get("a"))
+        self.assertEqual(b"1", kv.get("b"))
+        self.assertEqual(b"1", kv.get("e"))
+        self.assertEqual([b"x", b"y"], kv.lrange("l", 0, -1))
+        self.assertEqual([b"1"], kv.hmget("h", "f"))
+        self.assertIn("e", kv._expires)
+        kv.close()
+
+    def test_torn_record(self):
+        kv = MemoryKV(aof_path=self._path)
+        kv.set("a", 1)
+        kv.close()
+        with open(self._path, "ab") as f:
+            f.write(b"*3\r\n$3\r\nSET\r\n$1\r\nb\r\n$1")
+
+        kv = MemoryKV(aof_path=self._path)
+        self.assertEqual(b"1", kv.get("a"))
+        self.assertIsNone(kv.get("b"))
+        kv.set("c", 2)
+        kv.close()
+
+        kv = MemoryKV(aof_path=self._path)
+        self.assertEqual(b"2", kv.get("c"))
+        kv.close()
+
+    def test_torn_transaction(self):
+        kv = MemoryKV(aof_path=self._path)
+        kv.set("a", 1)
+        pipe = kv.pipeline()
+        pipe.incrby("a", 1)
+        pipe.incrby("b", 1)
+        pipe.execute()
+        kv.close()
+        with open(self._path, "rb+") as f:
+            f.truncate(os.path.getsize(self._path) - len(b"*1\r\n$4\r\n"))
+
+        kv = MemoryKV(aof_path=self._path)
+        self.assertEqual(b"1", kv.get("a"))
+        self.assertIsNone(kv.get("b"))
+        kv.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
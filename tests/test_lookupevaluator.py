@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import random
+import unittest
+
+from pokerapp.cards import get_cards
+from pokerapp.winnerdetermination import LookupEvaluator, WinnerDetermination
+
+
+SAMPLE_SIZE = 20000
+
+
+class TestLookupEvaluator(unittest.TestCase):
+    def test_equal_to_combinations_scan(self):
+        """
+        Test the lookup tables against the 21 combinations scan
+        """
+
+        rnd = random.Random(42)
+        reference = WinnerDetermination()
+        evaluator = LookupEvaluator.instance()
+        deck = get_cards()
+
+        for i in range(SAMPLE_SIZE):
+            cards = rnd.sample(deck, 5 + i % 3)
+            want_score = reference._best_hand_score(
+                reference._make_combinations(cards),
+            )[1]
+
+            got_score = evaluator.evaluate(cards)
+            self.assertEqual(want_score, got_score, cards)
+
+            (hand_score, got_hand) = evaluator.evaluate_hand(cards)
+            self.assertEqual(want_score, hand_score, cards)
+            self.assertEqual(5, len(got_hand), cards)
+            self.assertEqual(
+                [c for c in cards if c in got_hand], got_hand, cards,
+            )
+            self.assertEqual(
+                want_score,
+                reference._check_hand_get_score(got_hand),
+                cards,
+            )
+
+    def test_less_than_five_cards(self):
+        evaluator = LookupEvaluator.instance()
+        cards = get_cards()[:4]
+
+        self.assertEqual(0, evaluator.evaluate(cards))
+        self.assertEqual((0, []), evaluator.evaluate_hand(cards))
+
+
+if __name__ == '__main__':
+    unittest.main()
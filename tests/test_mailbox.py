@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import json
+import threading
+import time
+import unittest
+
+from telegram import Update
+from telegram.ext import CommandHandler
+
+from pokerapp.mailbox import ChatMailbox, MailboxDispatcher
+
+UPDATE_FILE = "./tests/update_start.json"
+TIMEOUT = 5
+
+
+class TestChatMailbox(unittest.TestCase):
+    def setUp(self):
+        self.mailbox = ChatMailbox(workers=4)
+
+    def tearDown(self):
+        self.mailbox.shutdown()
+
+    def test_order_of_key(self):
+        done = []
+
+        def job(i):
+            # The first job is the slowest.
+            time.sleep(0.01 * (5 - i))
+            done.append(i)
+
+        futures = [self.mailbox.submit("chat", job, i) for i in range(5)]
+        for f in futures:
+            f.result(TIMEOUT)
+        self.assertEqual(list(range(5)), done)
+
+    def test_keys_in_parallel(self):
+        release = threading.Event()
+        blocked = self.mailbox.submit(1, release.wait, TIMEOUT)
+
+        self.assertEqual(2, self.mailbox.submit(2, lambda: 2).result(TIMEOUT))
+        self.assertFalse(blocked.done())
+
+        release.set()
+        self.assertTrue(blocked.result(TIMEOUT))
+
+    def test_exception(self):
+        def job():
+            raise ValueError("job")
+
+        with self.assertRaises(ValueError):
+            self.mailbox.submit(1, job).result(TIMEOUT)
+        self.assertEqual(1, self.mailbox.submit(1, lambda: 1).result(TIMEOUT))
+
+
+class FakeBot:
+    username = "pokerbot"
+    defaults = None
+
+
+class TestMailboxDispatcher(unittest.TestCase):
+    def test_process_update(self):
+        bot = FakeBot()
+        dispatcher = MailboxDispatcher(bot=bot, mailbox=ChatMailbox())
+        chats = []
+        dispatcher.add_handler(CommandHandler(
+            "start",
+            lambda update, context: chats.append(update.effective_chat.id),
+        ))
+
+        with open(UPDATE_FILE, "r") as f:
+            update = Update.de_json(json.load(f), bot)
+        dispatcher.process_update(update).result(TIMEOUT)
+
+        self.assertEqual([-1001], chats)
+
+    def test_stop_waits_for_updates(self):
+        bot = FakeBot()
+        dispatcher = MailboxDispatcher(bot=bot, mailbox=ChatMailbox())
+        chats = []
+
+        def slow_start(update, context):
+            time.sleep(0.1)
+            chats.append(update.effective_chat.id)
+
+        dispatcher.add_handler(CommandHandler("start", slow_start))
+        with open(UPDATE_FILE, "r") as f:
+            update = Update.de_json(json.load(f), bot)
+        dispatcher.process_update(update)
+        dispatcher.stop()
+
+        self.assertEqual([-1001], chats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pokerapp.pokerbot import MAX_DELETE_MESSAGES, MessageDelayBot
+
+TIMEOUT = 5
+TOKEN = "123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi"
+
+
+class PostRecordingBot(MessageDelayBot):
+    def __init__(self):
+        super().__init__(token=TOKEN, tasks_delay=0)
+        self.posts = []
+
+    def _post(self, endpoint, data=None, timeout=None, api_kwargs=None):
+        self.posts.append((endpoint, data))
+        return True
+
+
+class TestMessageDelayBot(unittest.TestCase):
+    def setUp(self):
+        self.bot = PostRecordingBot()
+        self.bot.run_tasks_manager()
+
+    def tearDown(self):
+        self.bot._scheduler.stop()
+
+    def test_delete_messages_in_chunks(self):
+        message_ids = list(range(MAX_DELETE_MESSAGES + 1))
+
+        futures = self.bot.delete_messages(
+            chat_id=-1,
+            message_ids=message_ids,
+        )
+        for f in futures:
+            self.assertTrue(f.result(TIMEOUT))
+
+        self.assertEqual(
+            [
+                ("deleteMessages", {
+                    "chat_id": -1,
+                    "message_ids": message_ids[:MAX_DELETE_MESSAGES],
+                }),
+                ("deleteMessages", {
+                    "chat_id": -1,
+                    "message_ids": message_ids[MAX_DELETE_MESSAGES:],
+                }),
+            ],
+            self.bot.posts,
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
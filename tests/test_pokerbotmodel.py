@@ -1,14 +1,27 @@
 #!/usr/bin/env python3
 
 import unittest
+from types import SimpleNamespace
 from typing import Tuple
 
-import redis
-
 from pokerapp.cards import Cards, Card
 from pokerapp.config import Config
-from pokerapp.entities import Money, Player, Game
-from pokerapp.pokerbotmodel import RoundRateModel, WalletManagerModel
+from pokerapp.entities import (
+    GameState,
+    Money,
+    Player,
+    PlayerState,
+    Game,
+    UserException,
+    Wallet,
+)
+from pokerapp.kvstore import MemoryKV, connect
+from pokerapp.pokerbotmodel import (
+    PokerBotModel,
+    RoundRateModel,
+    WalletManagerModel,
+)
+from pokerapp.privatechatmodel import UserPrivateChatModel
 
 
 HANDS_FILE = "./tests/hands.txt"
@@ -24,12 +37,7 @@ class TestRoundRateModel(unittest.TestCase):
         self._user_id = 0
         self._round_rate = RoundRateModel()
         cfg: Config = Config()
-        self._kv = redis.Redis(
-            host=cfg.REDIS_HOST,
-            port=cfg.REDIS_PORT,
-            db=cfg.REDIS_DB,
-            password=cfg.REDIS_PASS if cfg.REDIS_PASS != "" else None
-        )
+        self._kv = connect(cfg)
 
     def _next_player(self, game: Game, autorized: Money) -> Player:
         self._user_id += 1
@@ -170,6 +178,265 @@ class TestRoundRateModel(unittest.TestCase):
             g.id, first_winner, second_winner, third_loser, fourth_loser
         )
 
+    def test_finish_rate_approves_authorized_money(self):
+        g = Game()
+        winner = self._next_player(g, 50)
+        folded = self._next_player(g, 20)
+        loser = self._next_player(g, 50)
+
+        self._round_rate.finish_rate(g, player_scores={
+            1: [with_cards(winner)],
+            0: [with_cards(loser)],
+        })
+
+        self.assertAlmostEqual(120, winner.wallet.value(), places=1)
+        self.assert_authorized_money_zero(g.id, winner, folded, loser)
+
+
+class TestWalletManagerModel(unittest.TestCase):
+    def setUp(self):
+        cfg: Config = Config()
+        self._kv = connect(cfg)
+        self._wallet = WalletManagerModel("wallet_test", kv=self._kv)
+        self._wallet.authorize_all("clean_wallet_game")
+        self._wallet.inc(100)
+        self._game = Game()
+
+    def tearDown(self):
+        self._wallet.approve(self._game.id)
+
+    def test_authorize(self):
+        self._wallet.authorize(self._game.id, 40)
+
+        self.assertEqual(60, self._wallet.value())
+        self.assertEqual(40, self._wallet.authorized_money(self._game.id))
+
+    def test_authorize_not_enough_money(self):
+        with self.assertRaises(UserException):
+            self._wallet.authorize(self._game.id, 101)
+
+        self.assertEqual(100, self._wallet.value())
+        self.assertEqual(0, self._wallet.authorized_money(self._game.id))
+
+    def test_authorize_all(self):
+        self._wallet.authorize(self._game.id, 40)
+
+        self.assertEqual(60, self._wallet.authorize_all(self._game.id))
+        self.assertEqual(0, self._wallet.value())
+        self.assertEqual(100, self._wallet.authorized_money(self._game.id))
+
+    def test_inc_not_enough_money(self):
+        with self.assertRaises(UserException):
+            self._wallet.inc(-101)
+
+        self.assertEqual(100, self._wallet.value())
+
+    def test_settle(self):
+        wallets = [self._wallet]
+        for user_id in ("settle_test_1", "settle_test_2"):
+            wallet = WalletManagerModel(user_id, kv=self._kv)
+            wallet.authorize_all("clean_wallet_game")
+            wallet.inc(100)
+            wallets.append(wallet)
+        for (wallet, amount) in zip(wallets, (5, 5, 20)):
+            wallet.authorize(self._game.id, amount)
+
+        # 12.5$ is rounded to even like in Python, the rest goes on.
+        paid = WalletManagerModel.settle(
+            game_id=self._game.id,
+            wallets=wallets,
+            pot=25,
+            winners=[[0, 1], [2], []],
+        )
+
+        self.assertEqual([12, 12, 1], paid)
+        self.assertEqual(
+            [107, 107, 81],
+            [wallet.value() for wallet in wallets],
+        )
+        for wallet in wallets:
+            self.assertEqual(0, wallet.authorized_money(self._game.id))
+
+    def test_settle_empty_pot(self):
+        paid = WalletManagerModel.settle(
+            game_id=self._game.id,
+            wallets=[self._wallet],
+            pot=0,
+            winners=[[0]],
+        )
+        self.assertEqual([None], paid)
+
+
+class CountingWallet(Wallet):
+    def __init__(self, money: Money):
+        self.money = money
+        self.reads = 0
+
+    def value(self) -> Money:
+        self.reads += 1
+        return self.money
+
+
+class TurnView:
+    def __init__(self):
+        self.turns = []
+
+    def send_turn_actions(self, chat_id, game, player, money) -> None:
+        self.turns.append((player.user_id, money))
+
+    def send_desk_cards_img(self, chat_id, cards, caption) -> None:
+        pass
+
+
+class TestTurnOrder(unittest.TestCase):
+    def setUp(self):
+        self._view = TurnView()
+        self._model = PokerBotModel(
+            view=self._view,
+            bot=None,
+            cfg=Config(),
+            kv=None,
+        )
+        self._game = Game()
+        self._game.state = GameState.ROUND_PRE_FLOP
+        for (user_id, state) in enumerate((
+            PlayerState.ACTIVE,
+            PlayerState.FOLD,
+            PlayerState.FOLD,
+            PlayerState.ACTIVE,
+        )):
+            player = Player(
+                user_id=user_id,
+                mention_markdown="@" + str(user_id),
+                wallet=CountingWallet(50),
+                ready_message_id="",
+            )
+            player.state = state
+            self._game.players.append(player)
+        self._game.current_player_index = 0
+        self._game.trading_end_user_id = 0
+
+    def test_skips_folded_players(self):
+        self._model._process_playing(chat_id=-1, game=self._game)
+
+        self.assertEqual([(3, 50)], self._view.turns)
+        self.assertEqual(3, self._game.current_player_index)
+        self.assertEqual(
+            [0, 0, 0, 1],
+            [p.wallet.reads for p in self._game.players],
+        )
+
+    def test_next_round(self):
+        self._game.current_player_index = 3
+
+        self._model._process_playing(chat_id=-1, game=self._game)
+
+        self.assertEqual(GameState.ROUND_FLOP, self._game.state)
+        self.assertEqual(3, len(self._game.cards_table))
+        self.assertEqual([(0, 50)], self._view.turns)
+
+    def test_player_without_money(self):
+        self._game.players[0].wallet.money = 0
+        self._game.current_player_index = 3
+
+        self._model._process_playing(chat_id=-1, game=self._game)
+
+        self.assertEqual(PlayerState.ALL_IN, self._game.players[0].state)
+        self.assertEqual(GameState.ROUND_FLOP, self._game.state)
+        self.assertEqual([(3, 50)], self._view.turns)
+
+
+class MessageView:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id, text, **kwargs) -> None:
+        self.messages.append(text)
+
+
+class TestAllInEquity(unittest.TestCase):
+    def test_sent_in_background(self):
+        view = MessageView()
+        model = PokerBotModel(view=view, bot=None, cfg=Config(), kv=None)
+        game = Game()
+        for (user_id, cards) in enumerate(("A♥ A♠", "K♥ K♠", "2♣ 7♦")):
+            player = Player(
+                user_id=user_id,
+                mention_markdown="@" + str(user_id),
+                wallet=None,
+                ready_message_id="",
+            )
+            player.cards = [Card(c) for c in cards.split()]
+            player.state = PlayerState.ALL_IN
+            game.players.append(player)
+        game.players[2].state = PlayerState.FOLD
+        game.cards_table = [Card("2♦"), Card("7♣"), Card("9♥")]
+
+        future = model._send_all_in_equity(game, chat_id=-1)
+        # The game goes on before the equities are sent.
+        game.cards_table.append(Card("A♦"))
+        future.result()
+
+        (text,) = view.messages
+        self.assertIn("on 2♦ 7♣ 9♥:", text)
+        self.assertIn("@0 A♥ A♠", text)
+        self.assertIn("@1 K♥ K♠", text)
+        self.assertNotIn("@2", text)
+
+    def test_one_all_in_player(self):
+        model = PokerBotModel(
+            view=MessageView(), bot=None, cfg=Config(), kv=None,
+        )
+        self.assertIsNone(model._send_all_in_equity(Game(), chat_id=-1))
+
+
+class DealView:
+    def __init__(self):
+        self.rendered = []
+        self.private = []
+        self.group = []
+
+    def render_desk_cards_imgs(self, cards_list) -> None:
+        self.rendered += cards_list
+
+    def send_desk_cards_img(self, chat_id, cards, **kwargs):
+        self.private.append(chat_id)
+        return SimpleNamespace(message_id=len(self.private))
+
+    def remove_messages(self, chat_id, message_ids) -> None:
+        pass
+
+    def send_cards(self, chat_id, cards, mention_markdown, **kwargs):
+        self.group.append(mention_markdown)
+
+
+class TestDivideCards(unittest.TestCase):
+    def test_private_and_group_chat(self):
+        kv = MemoryKV()
+        view = DealView()
+        model = PokerBotModel(view=view, bot=None, cfg=Config(), kv=kv)
+        game = Game()
+        for user_id in range(1, 5):
+            game.players.append(Player(
+                user_id=user_id,
+                mention_markdown="@" + str(user_id),
+                wallet=None,
+                ready_message_id="",
+            ))
+            # Odd players did not start a private chat.
+            if user_id % 2 == 0:
+                UserPrivateChatModel(user_id=user_id, kv=kv) \
+                    .set_chat_id(chat_id=user_id)
+
+        model._divide_cards(game=game, chat_id=-1)
+
+        self.assertEqual(4, len(view.rendered))
+        self.assertEqual(["2", "4"], sorted(view.private))
+        self.assertEqual(["@1", "@3"], sorted(view.group))
+        for player in game.players:
+            self.assertEqual(2, len(player.cards))
+        self.assertEqual(52 - 8, len(game.remain_cards))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+import time
+import unittest
+from types import SimpleNamespace
+
+from telegram.error import BadRequest
+
+from pokerapp.cards import DECK
+from pokerapp.desk import DeskImageCache, ImageFormat
+from pokerapp.fileids import FileIdStore
+from pokerapp.kvstore import MemoryKV
+from pokerapp.pokerbotview import PokerBotViewer
+
+
+class FakeGenerator:
+    image_format = ImageFormat.PNG
+    render_key = "png:84x128:q85:p10"
+
+    def render(self, cards) -> bytes:
+        return b"png"
+
+
+class MediaBot:
+    def __init__(self, stale_file_ids=()):
+        self.media = []
+        self._stale_file_ids = stale_file_ids
+
+    def send_media_group(self, chat_id, media, **kwargs):
+        sent = media[0].media
+        if sent in self._stale_file_ids:
+            raise BadRequest("Wrong file identifier")
+        self.media.append(sent)
+        file_id = "file" + str(len(self.media))
+        return [SimpleNamespace(photo=[SimpleNamespace(file_id=file_id)])]
+
+
+class TestSendDeskCardsImg(unittest.TestCase):
+    def _viewer(self, bot: MediaBot, file_ids: FileIdStore):
+        return PokerBotViewer(
+            bot=bot,
+            desk_cache=DeskImageCache(generator=FakeGenerator()),
+            file_ids=file_ids,
+        )
+
+    def test_reuse_file_id(self):
+        bot = MediaBot()
+        viewer = self._viewer(bot, FileIdStore())
+
+        viewer.send_desk_cards_img(chat_id=1, cards=DECK[:3])
+        viewer.send_desk_cards_img(chat_id=2, cards=DECK[:3])
+
+        self.assertNotIsInstance(bot.media[0], str)
+        self.assertEqual("file1", bot.media[1])
+
+    def test_upload_again_on_stale_file_id(self):
+        file_ids = FileIdStore()
+        bot = MediaBot(stale_file_ids=("stale",))
+        viewer = self._viewer(bot, file_ids)
+        key = "desk:png:84x128:q85:p10:" + \
+            ",".join(str(card.id) for card in DECK[:3])
+        file_ids.set(key, "stale")
+
+        viewer.send_desk_cards_img(chat_id=1, cards=DECK[:3])
+
+        self.assertEqual(1, len(bot.media))
+        self.assertNotIsInstance(bot.media[0], str)
+        self.assertEqual("file1", file_ids.get(key))
+
+    def test_empty_cache_is_used(self):
+        desk_cache = DeskImageCache(generator=FakeGenerator())
+        viewer = PokerBotViewer(bot=None, desk_cache=desk_cache)
+        self.assertIs(desk_cache, viewer._desk_cache)
+
+    def test_key_of_render_settings(self):
+        bot = MediaBot()
+        file_ids = FileIdStore()
+        self._viewer(bot, file_ids) \
+            .send_desk_cards_img(chat_id=1, cards=DECK[:3])
+
+        # Cards of another size must not reuse the old file.
+        generator = FakeGenerator()
+        generator.render_key = "png:42x64:q85:p10"
+        viewer = PokerBotViewer(
+            bot=bot,
+            desk_cache=DeskImageCache(generator=generator),
+            file_ids=file_ids,
+        )
+        viewer.send_desk_cards_img(chat_id=1, cards=DECK[:3])
+
+        self.assertEqual(2, len(bot.media))
+        self.assertNotIsInstance(bot.media[1], str)
+
+
+class TestFileIdStore(unittest.TestCase):
+    def test_least_recently_used_evicted(self):
+        file_ids = FileIdStore(max_local=2)
+        file_ids.set("a", "1")
+        file_ids.set("b", "2")
+        file_ids.get("a")
+        file_ids.set("c", "3")
+
+        self.assertEqual(2, len(file_ids))
+        self.assertIsNone(file_ids.get("b"))
+        self.assertEqual("1", file_ids.get("a"))
+
+    def test_kv_keys_expire(self):
+        kv = MemoryKV()
+        file_ids = FileIdStore(kv=kv, max_local=1, ttl=60)
+        file_ids.set("a", "1")
+        file_ids.set("b", "2")
+
+        # Evicted from the process, still in the kv.
+        self.assertEqual("1", file_ids.get("a"))
+        deadline = kv._expires["pokerbot:file_ids:a"]
+        self.assertAlmostEqual(time.time() + 60, deadline, delta=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pokerapp.kvstore import MemoryKV
+from pokerapp.privatechatmodel import UserPrivateChatModel
+
+
+class TestUserPrivateChatModel(unittest.TestCase):
+    def test_pop_messages(self):
+        model = UserPrivateChatModel(user_id=1, kv=MemoryKV())
+        model.push_message(message_id=10)
+        model.push_message(message_id=11)
+
+        self.assertEqual([b"10", b"11"], model.pop_messages())
+        self.assertEqual([], model.pop_messages())
+        self.assertIsNone(model.pop_message())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import json
+import queue
+import time
+import unittest
+from collections import Counter
+
+from telegram import Bot, Update
+
+from pokerapp.config import Config
+from pokerapp.kvstore import BACKEND_MEMORY, BACKEND_REDIS
+from pokerapp.sharding import HashRing, ShardedPokerBot, ShardRouter
+
+CHATS = range(-10000, 0)
+TOKEN = "123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi"
+UPDATE_FILE = "./tests/update_start.json"
+
+
+class TestHashRing(unittest.TestCase):
+    def test_spread(self):
+        ring = HashRing(["a", "b", "c", "d"])
+        counts = Counter(ring.node_for(chat_id) for chat_id in CHATS)
+
+        self.assertEqual({"a", "b", "c", "d"}, set(counts))
+        for count in counts.values():
+            self.assertGreater(count, len(CHATS) / 4 * 0.7)
+            self.assertLess(count, len(CHATS) / 4 * 1.3)
+
+    def test_same_node(self):
+        ring = HashRing(["a", "b"])
+        other = HashRing(["b", "a"])
+        for chat_id in CHATS:
+            self.assertEqual(ring.node_for(chat_id), other.node_for(chat_id))
+
+    def test_add_node_moves_keys_to_it(self):
+        ring = HashRing(["a", "b", "c"])
+        before = {chat_id: ring.node_for(chat_id) for chat_id in CHATS}
+
+        ring.add("d")
+        moved = [
+            chat_id for chat_id in CHATS
+            if ring.node_for(chat_id) != before[chat_id]
+        ]
+
+        self.assertLess(len(moved), len(CHATS) / 4 * 1.3)
+        for chat_id in moved:
+            self.assertEqual("d", ring.node_for(chat_id))
+
+        ring.remove("d")
+        for chat_id in CHATS:
+            self.assertEqual(before[chat_id], ring.node_for(chat_id))
+
+    def test_empty(self):
+        with self.assertRaises(LookupError):
+            HashRing().node_for(1)
+
+
+class FakeProcess:
+    def __init__(self, alive: bool = True):
+        self.alive = alive
+        self.exitcode = None if alive else 1
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def join(self, timeout: float = None) -> None:
+        pass
+
+    def terminate(self) -> None:
+        self.alive = False
+
+
+class TestShardedPokerBot(unittest.TestCase):
+    def setUp(self):
+        self._cfg = Config()
+        self._cfg.KV_BACKEND = BACKEND_REDIS
+        # Workers are not spawned, the updates go to queues of the test.
+        self._cfg.WORKERS = 0
+
+    def test_updater_with_router(self):
+        bot = ShardedPokerBot(token=TOKEN, cfg=self._cfg)
+        self.assertIs(bot._router, bot._updater.dispatcher)
+        self.assertIsInstance(bot._router, ShardRouter)
+
+    def test_memory_backend(self):
+        self._cfg.KV_BACKEND = BACKEND_MEMORY
+        with self.assertRaises(ValueError):
+            ShardedPokerBot(token=TOKEN, cfg=self._cfg)
+
+    def _router(self, names=()) -> ShardRouter:
+        router = ShardedPokerBot(token=TOKEN, cfg=self._cfg)._router
+        router._drain_timeout = 0.2
+        router._start_worker = lambda name: (FakeProcess(), queue.Queue())
+        for name in names:
+            router._workers[name] = router._start_worker(name)
+            router._ring.add(name)
+        return router
+
+    def _update(self) -> Update:
+        with open(UPDATE_FILE, "r") as f:
+            return Update.de_json(json.load(f), Bot(TOKEN))
+
+    def test_route_by_chat(self):
+        router = self._router(("a", "b", "c"))
+        updates = {name: w[1] for (name, w) in router._workers.items()}
+
+        update = self._update()
+        router.process_update(update)
+
+        name = router._ring.node_for(update.effective_chat.id)
+        data = json.loads(updates[name].get_nowait())
+        self.assertEqual(update.update_id, data["update_id"])
+        self.assertTrue(all(q.empty() for q in updates.values()))
+
+    def test_route_to_restarted_worker(self):
+        router = self._router(("a",))
+        (process, updates) = router._workers["a"]
+        process.alive = False
+
+        router.process_update(self._update())
+
+        (new_process, new_updates) = router._workers["a"]
+        self.assertIsNot(process, new_process)
+        self.assertTrue(updates.empty())
+        self.assertFalse(new_updates.empty())
+
+    def test_drain_skips_dead_worker(self):
+        router = self._router(("a", "b"))
+        (process, updates) = router._workers["a"]
+        # Taken by the worker and never marked as done.
+        updates.put("update")
+        updates.get()
+        process.alive = False
+
+        router.remove_worker("b")
+
+        self.assertIsNot(process, router._workers["a"][0])
+
+    def test_drain_timeout(self):
+        router = self._router(("a", "b"))
+        router._workers["a"][1].put("update")
+
+        started = time.monotonic()
+        router.add_worker()
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(3, len(router._ring))
+
+
+if __name__ == '__main__':
+    unittest.main()
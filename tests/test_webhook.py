@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+import os
+import queue
+import signal
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+from telegram.ext import Dispatcher
+
+from pokerapp.config import Config
+from pokerapp.pokerbot import run_webhook
+from pokerapp.pokerbotcontrol import PokerBotCotroller
+from pokerapp.pokerbotmodel import PokerBotModel
+from pokerapp.pokerbotview import PokerBotViewer
+from pokerapp.webhook import SECRET_TOKEN_HEADER, WebhookServer
+
+UPDATE_FILE = "./tests/update_start.json"
+SECRET = "secret"
+
+
+class RecordingBot:
+    username = "pokerbot"
+    defaults = None
+
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.messages.append((chat_id, text))
+
+    def get_chat_member_count(self, chat_id):
+        return 4
+
+
+class TestWebhookServer(unittest.TestCase):
+    def setUp(self):
+        self.server = self._server(workers=2, queue_size=256)
+        self.server.start()
+
+        with open(UPDATE_FILE, "rb") as f:
+            self.update = f.read()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _server(self, workers: int, queue_size: int) -> WebhookServer:
+        self.bot = RecordingBot()
+        dispatcher = Dispatcher(
+            bot=self.bot,
+            update_queue=queue.Queue(),
+            workers=1,
+        )
+        model = PokerBotModel(
+            view=PokerBotViewer(bot=self.bot),
+            bot=self.bot,
+            cfg=Config(),
+            kv=None,
+        )
+        PokerBotCotroller(model, SimpleNamespace(dispatcher=dispatcher))
+
+        return WebhookServer(
+            dispatcher=dispatcher,
+            bot=self.bot,
+            listen="127.0.0.1",
+            port=0,
+            path="/hook",
+            secret_token=SECRET,
+            workers=workers,
+            queue_size=queue_size,
+        )
+
+    def _post(self, path: str, secret: str) -> int:
+        request = urllib.request.Request(
+            url=f"http://127.0.0.1:{self.server.port}{path}",
+            data=self.update,
+            headers={
+                "Content-Type": "application/json",
+                SECRET_TOKEN_HEADER: secret,
+            },
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def test_start_command(self):
+        self.assertEqual(200, self._post("/hook", SECRET))
+        self.server.join()
+
+        self.assertEqual([(-1001, "Not enough player")], self.bot.messages)
+
+    def test_wrong_secret_token(self):
+        self.assertEqual(403, self._post("/hook", "wrong"))
+        self.assertEqual(403, self._post("/hook", ""))
+        self.assertEqual(404, self._post("/other", SECRET))
+        self.server.join()
+
+        self.assertEqual([], self.bot.messages)
+
+    def test_no_secret_token(self):
+        with self.assertRaises(ValueError):
+            WebhookServer(dispatcher=None, bot=self.bot, port=0)
+
+    def test_full_queue(self):
+        self.server.stop()
+        # Nobody takes updates from the queue.
+        self.server = self._server(workers=0, queue_size=1)
+        self.server.start()
+
+        self.assertEqual(200, self._post("/hook", SECRET))
+        self.assertEqual(503, self._post("/hook", SECRET))
+
+
+class StoppedDispatcher:
+    def __init__(self):
+        self.stopped = False
+
+    def process_update(self, update):
+        pass
+
+    def stop(self):
+        self.stopped = True
+
+
+class WebhookBot(RecordingBot):
+    def set_webhook(self, **kwargs):
+        self.webhook = kwargs
+
+
+class TestRunWebhook(unittest.TestCase):
+    def test_stop_by_signal(self):
+        cfg = Config()
+        cfg.WEBHOOK_URL = "https://example.com/hook"
+        cfg.WEBHOOK_LISTEN = "127.0.0.1"
+        cfg.WEBHOOK_PORT = 0
+        updater = SimpleNamespace(
+            bot=WebhookBot(),
+            dispatcher=StoppedDispatcher(),
+        )
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def terminate():
+            # The default handler would kill the tests.
+            while signal.getsignal(signal.SIGTERM) is previous:
+                time.sleep(0.01)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        threading.Thread(target=terminate, daemon=True).start()
+        run_webhook(updater, cfg, workers=1)
+
+        self.assertEqual(cfg.WEBHOOK_URL, updater.bot.webhook["url"])
+        # No secret is configured, a random one is set.
+        secret = updater.bot.webhook["api_kwargs"]["secret_token"]
+        self.assertGreaterEqual(len(secret), 32)
+        self.assertTrue(updater.dispatcher.stopped)
+        self.assertIs(previous, signal.getsignal(signal.SIGTERM))
+
+
+if __name__ == '__main__':
+    unittest.main()